@@ -1,25 +1,24 @@
 from logging.config import fileConfig
-import os
-from dotenv import load_dotenv
 
-from sqlalchemy import create_engine, pool
+from sqlalchemy import pool
+from outreach.config import get_database_url
+from outreach.engine import create_outreach_engine
 from outreach.models import Base
 
 from alembic import context
 
-# Load environment variables
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set")
+DATABASE_URL = get_database_url()
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
 target_metadata = Base.metadata
-engine = create_engine(DATABASE_URL)
+# Migrations hold one connection and may legitimately run for a long time
+# (concurrent index builds, batched backfills): no pool, no statement timeout.
+engine = create_outreach_engine(
+    DATABASE_URL, statement_timeout_ms=0, poolclass=pool.NullPool
+)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,88 @@
+"""add leads.email_normalized for duplicate detection
+
+Revision ID: 3b8e6a1f0c92
+Revises: e7c41b09d2a5
+Create Date: 2026-10-17 16:05:41.228307
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e6a1f0c92'
+down_revision: Union[str, None] = 'e7c41b09d2a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Override with: alembic -x batch_size=20000 upgrade head
+DEFAULT_BATCH_SIZE = 5000
+
+# outreach.models.normalize_email in SQL: trim, lowercase, and drop a +tag
+# from the local part (everything before the last '@').
+NORMALIZED = r"""
+    regexp_replace(lower(btrim(email, E' \t\r\n')), '^([^+]*)\+.*(@[^@]*)$', '\1\2')
+"""
+
+
+def _batch_size() -> int:
+    return int(context.get_x_argument(as_dictionary=True).get('batch_size', DEFAULT_BATCH_SIZE))
+
+
+def _backfill(conn, batch_size: int) -> None:
+    """Fill email_normalized in primary key order, one batch per statement.
+
+    Each batch commits on its own and only rows still missing a value are
+    touched, so a killed run picks up where it stopped.
+    """
+    update_batch = sa.text(
+        f"""
+        WITH batch AS (
+            SELECT lead_id FROM leads
+            WHERE lead_id > :last_id AND email_normalized IS NULL
+            ORDER BY lead_id
+            LIMIT :batch_size
+        )
+        UPDATE leads SET email_normalized = {NORMALIZED}
+        FROM batch
+        WHERE leads.lead_id = batch.lead_id
+        RETURNING leads.lead_id
+        """
+    )
+    last_id = '00000000-0000-0000-0000-000000000000'
+    while True:
+        lead_ids = conn.execute(
+            update_batch, {'last_id': last_id, 'batch_size': batch_size}
+        ).scalars().all()
+        if not lead_ids:
+            return
+        last_id = max(lead_ids)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('ALTER TABLE leads ADD COLUMN IF NOT EXISTS email_normalized VARCHAR')
+
+    with op.get_context().autocommit_block():
+        _backfill(op.get_bind(), _batch_size())
+        op.create_index(
+            'ix_leads_email_normalized_contacted',
+            'leads',
+            ['email_normalized', 'last_contacted_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_leads_email_normalized_contacted',
+            table_name='leads',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('leads', 'email_normalized')
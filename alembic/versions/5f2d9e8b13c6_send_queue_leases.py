@@ -0,0 +1,54 @@
+"""send queue leases
+
+Revision ID: 5f2d9e8b13c6
+Revises: 8a3f5d2c71b4
+Create Date: 2026-10-17 14:02:51.307118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2d9e8b13c6'
+down_revision: Union[str, None] = '8a3f5d2c71b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_leads_send_queue', ['campaign_id', 'created_at', 'lead_id'], "status = 'pending'"),
+    ('ix_leads_sending_lease', ['lease_expires_at'], "status = 'sending'"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable columns without a default are a catalog-only change.
+    op.add_column('leads', sa.Column('claimed_by', sa.String(), nullable=True))
+    op.add_column('leads', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    with op.get_context().autocommit_block():
+        for name, columns, where in INDEXES:
+            op.create_index(
+                name,
+                'leads',
+                columns,
+                postgresql_where=sa.text(where),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='leads',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_column('leads', 'lease_expires_at')
+    op.drop_column('leads', 'claimed_by')
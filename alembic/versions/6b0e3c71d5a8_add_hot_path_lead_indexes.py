@@ -0,0 +1,54 @@
+"""add hot path lead indexes
+
+Revision ID: 6b0e3c71d5a8
+Revises: fd2977d94130
+Create Date: 2026-10-17 10:03:17.228961
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b0e3c71d5a8'
+down_revision: Union[str, None] = 'fd2977d94130'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_leads_status_created_at', ['status', 'created_at', 'lead_id'], None),
+    ('ix_leads_campaign_id_status', ['campaign_id', 'status'], None),
+    ('ix_leads_company_id', ['company_id'], None),
+    ('ix_leads_import_run', ['import_run'], None),
+    ('ix_leads_unsent', ['campaign_id', 'created_at'], 'email_sent_at IS NULL'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block. It
+    # does not lock out writes, so this is safe to run against a live table.
+    with op.get_context().autocommit_block():
+        for name, columns, where in INDEXES:
+            op.create_index(
+                name,
+                'leads',
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='leads',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
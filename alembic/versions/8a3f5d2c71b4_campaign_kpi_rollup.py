@@ -0,0 +1,177 @@
+"""campaign kpi rollup
+
+Revision ID: 8a3f5d2c71b4
+Revises: c41f8a2e9b67
+Create Date: 2026-10-17 13:12:44.519203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a3f5d2c71b4'
+down_revision: Union[str, None] = 'c41f8a2e9b67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+APPLY_LEAD_CHANGES = """
+CREATE OR REPLACE FUNCTION campaign_kpis_apply_lead_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO campaign_kpis AS k (
+            campaign_id, imported, verified, emailed, replied, positive_replies
+        )
+        SELECT campaign_id, sum(imported), sum(verified), sum(emailed),
+               sum(replied), sum(positive_replies)
+        FROM (
+        SELECT campaign_id,
+               1 AS imported,
+               1 * (email_verification_status IS NOT DISTINCT FROM 'valid')::int,
+               1 * (email_sent_at IS NOT NULL)::int,
+               1 * (reply_received_at IS NOT NULL)::int,
+               1 * (status IN ('interested'))::int
+        FROM new_leads
+        ) AS changes (campaign_id, imported, verified, emailed, replied,
+                      positive_replies)
+        GROUP BY campaign_id
+        -- Updates that leave every counter unchanged (icebreakers,
+        -- enrichment) neither write nor lock the rollup row.
+        HAVING (sum(imported), sum(verified), sum(emailed), sum(replied),
+                sum(positive_replies)) <> (0, 0, 0, 0, 0)
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            imported = k.imported + excluded.imported,
+            verified = k.verified + excluded.verified,
+            emailed = k.emailed + excluded.emailed,
+            replied = k.replied + excluded.replied,
+            positive_replies = k.positive_replies + excluded.positive_replies,
+            updated_at = now();
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO campaign_kpis AS k (
+            campaign_id, imported, verified, emailed, replied, positive_replies
+        )
+        SELECT campaign_id, sum(imported), sum(verified), sum(emailed),
+               sum(replied), sum(positive_replies)
+        FROM (
+        SELECT campaign_id,
+               1 AS imported,
+               1 * (email_verification_status IS NOT DISTINCT FROM 'valid')::int,
+               1 * (email_sent_at IS NOT NULL)::int,
+               1 * (reply_received_at IS NOT NULL)::int,
+               1 * (status IN ('interested'))::int
+        FROM new_leads
+        UNION ALL
+        SELECT campaign_id,
+               -1 AS imported,
+               -1 * (email_verification_status IS NOT DISTINCT FROM 'valid')::int,
+               -1 * (email_sent_at IS NOT NULL)::int,
+               -1 * (reply_received_at IS NOT NULL)::int,
+               -1 * (status IN ('interested'))::int
+        FROM old_leads
+        ) AS changes (campaign_id, imported, verified, emailed, replied,
+                      positive_replies)
+        GROUP BY campaign_id
+        -- Updates that leave every counter unchanged (icebreakers,
+        -- enrichment) neither write nor lock the rollup row.
+        HAVING (sum(imported), sum(verified), sum(emailed), sum(replied),
+                sum(positive_replies)) <> (0, 0, 0, 0, 0)
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            imported = k.imported + excluded.imported,
+            verified = k.verified + excluded.verified,
+            emailed = k.emailed + excluded.emailed,
+            replied = k.replied + excluded.replied,
+            positive_replies = k.positive_replies + excluded.positive_replies,
+            updated_at = now();
+    ELSE
+        INSERT INTO campaign_kpis AS k (
+            campaign_id, imported, verified, emailed, replied, positive_replies
+        )
+        SELECT campaign_id, sum(imported), sum(verified), sum(emailed),
+               sum(replied), sum(positive_replies)
+        FROM (
+        SELECT campaign_id,
+               -1 AS imported,
+               -1 * (email_verification_status IS NOT DISTINCT FROM 'valid')::int,
+               -1 * (email_sent_at IS NOT NULL)::int,
+               -1 * (reply_received_at IS NOT NULL)::int,
+               -1 * (status IN ('interested'))::int
+        FROM old_leads
+        ) AS changes (campaign_id, imported, verified, emailed, replied,
+                      positive_replies)
+        GROUP BY campaign_id
+        -- Updates that leave every counter unchanged (icebreakers,
+        -- enrichment) neither write nor lock the rollup row.
+        HAVING (sum(imported), sum(verified), sum(emailed), sum(replied),
+                sum(positive_replies)) <> (0, 0, 0, 0, 0)
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            imported = k.imported + excluded.imported,
+            verified = k.verified + excluded.verified,
+            emailed = k.emailed + excluded.emailed,
+            replied = k.replied + excluded.replied,
+            positive_replies = k.positive_replies + excluded.positive_replies,
+            updated_at = now();
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+# (name, event, transition tables)
+TRIGGERS = [
+    ('leads_campaign_kpis_insert', 'INSERT', 'NEW TABLE AS new_leads'),
+    ('leads_campaign_kpis_update', 'UPDATE', 'OLD TABLE AS old_leads NEW TABLE AS new_leads'),
+    ('leads_campaign_kpis_delete', 'DELETE', 'OLD TABLE AS old_leads'),
+]
+
+BACKFILL = """
+    INSERT INTO campaign_kpis (
+        campaign_id, imported, verified, emailed, replied, positive_replies
+    )
+    SELECT
+        campaign_id,
+        count(*),
+        count(*) FILTER (WHERE email_verification_status = 'valid'),
+        count(*) FILTER (WHERE email_sent_at IS NOT NULL),
+        count(*) FILTER (WHERE reply_received_at IS NOT NULL),
+        count(*) FILTER (WHERE status IN ('interested'))
+    FROM leads
+    GROUP BY campaign_id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'campaign_kpis',
+        sa.Column('campaign_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('imported', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('verified', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('emailed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('replied', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('positive_replies', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('campaign_id'),
+    )
+    op.execute(APPLY_LEAD_CHANGES)
+    # CREATE TRIGGER blocks writes to leads until this transaction commits,
+    # so the backfill below and the triggers see exactly the same rows.
+    for name, event, transitions in TRIGGERS:
+        op.execute(
+            f"CREATE TRIGGER {name} AFTER {event} ON leads "
+            f"REFERENCING {transitions} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION campaign_kpis_apply_lead_changes()"
+        )
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _, _ in reversed(TRIGGERS):
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON leads")
+    op.execute("DROP FUNCTION IF EXISTS campaign_kpis_apply_lead_changes()")
+    op.drop_table('campaign_kpis')
@@ -0,0 +1,210 @@
+"""campaign archive and cascading lead deletes
+
+Revision ID: 9c4e2b7d1f05
+Revises: 3b8e6a1f0c92
+Create Date: 2026-10-17 17:21:09.604415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2b7d1f05'
+down_revision: Union[str, None] = '3b8e6a1f0c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Leads deleted by ON DELETE CASCADE belong to a campaign that is already
+# gone, with its rollup row; the DELETE branch must not re-create that row.
+DELETED_CAMPAIGN_FILTER = """
+        WHERE campaign_id IN (SELECT campaign_id FROM campaigns)"""
+
+# archived_leads runs the same function, so archiving keeps the counters.
+APPLY_LEAD_CHANGES = """
+CREATE OR REPLACE FUNCTION campaign_kpis_apply_lead_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO campaign_kpis AS k (
+            campaign_id, imported, verified, emailed, replied, positive_replies
+        )
+        SELECT campaign_id, sum(imported), sum(verified), sum(emailed),
+               sum(replied), sum(positive_replies)
+        FROM (
+        SELECT campaign_id,
+               1 AS imported,
+               1 * (email_verification_status IS NOT DISTINCT FROM 'valid')::int,
+               1 * (email_sent_at IS NOT NULL)::int,
+               1 * (reply_received_at IS NOT NULL)::int,
+               1 * (status IN ('interested'))::int
+        FROM new_leads
+        ) AS changes (campaign_id, imported, verified, emailed, replied,
+                      positive_replies)
+        GROUP BY campaign_id
+        -- Updates that leave every counter unchanged (icebreakers,
+        -- enrichment) neither write nor lock the rollup row.
+        HAVING (sum(imported), sum(verified), sum(emailed), sum(replied),
+                sum(positive_replies)) <> (0, 0, 0, 0, 0)
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            imported = k.imported + excluded.imported,
+            verified = k.verified + excluded.verified,
+            emailed = k.emailed + excluded.emailed,
+            replied = k.replied + excluded.replied,
+            positive_replies = k.positive_replies + excluded.positive_replies,
+            updated_at = now();
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO campaign_kpis AS k (
+            campaign_id, imported, verified, emailed, replied, positive_replies
+        )
+        SELECT campaign_id, sum(imported), sum(verified), sum(emailed),
+               sum(replied), sum(positive_replies)
+        FROM (
+        SELECT campaign_id,
+               1 AS imported,
+               1 * (email_verification_status IS NOT DISTINCT FROM 'valid')::int,
+               1 * (email_sent_at IS NOT NULL)::int,
+               1 * (reply_received_at IS NOT NULL)::int,
+               1 * (status IN ('interested'))::int
+        FROM new_leads
+        UNION ALL
+        SELECT campaign_id,
+               -1 AS imported,
+               -1 * (email_verification_status IS NOT DISTINCT FROM 'valid')::int,
+               -1 * (email_sent_at IS NOT NULL)::int,
+               -1 * (reply_received_at IS NOT NULL)::int,
+               -1 * (status IN ('interested'))::int
+        FROM old_leads
+        ) AS changes (campaign_id, imported, verified, emailed, replied,
+                      positive_replies)
+        GROUP BY campaign_id
+        -- Updates that leave every counter unchanged (icebreakers,
+        -- enrichment) neither write nor lock the rollup row.
+        HAVING (sum(imported), sum(verified), sum(emailed), sum(replied),
+                sum(positive_replies)) <> (0, 0, 0, 0, 0)
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            imported = k.imported + excluded.imported,
+            verified = k.verified + excluded.verified,
+            emailed = k.emailed + excluded.emailed,
+            replied = k.replied + excluded.replied,
+            positive_replies = k.positive_replies + excluded.positive_replies,
+            updated_at = now();
+    ELSE
+        INSERT INTO campaign_kpis AS k (
+            campaign_id, imported, verified, emailed, replied, positive_replies
+        )
+        SELECT campaign_id, sum(imported), sum(verified), sum(emailed),
+               sum(replied), sum(positive_replies)
+        FROM (
+        SELECT campaign_id,
+               -1 AS imported,
+               -1 * (email_verification_status IS NOT DISTINCT FROM 'valid')::int,
+               -1 * (email_sent_at IS NOT NULL)::int,
+               -1 * (reply_received_at IS NOT NULL)::int,
+               -1 * (status IN ('interested'))::int
+        FROM old_leads
+        WHERE campaign_id IN (SELECT campaign_id FROM campaigns)
+        ) AS changes (campaign_id, imported, verified, emailed, replied,
+                      positive_replies)
+        GROUP BY campaign_id
+        -- Updates that leave every counter unchanged (icebreakers,
+        -- enrichment) neither write nor lock the rollup row.
+        HAVING (sum(imported), sum(verified), sum(emailed), sum(replied),
+                sum(positive_replies)) <> (0, 0, 0, 0, 0)
+        ON CONFLICT (campaign_id) DO UPDATE SET
+            imported = k.imported + excluded.imported,
+            verified = k.verified + excluded.verified,
+            emailed = k.emailed + excluded.emailed,
+            replied = k.replied + excluded.replied,
+            positive_replies = k.positive_replies + excluded.positive_replies,
+            updated_at = now();
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+PREVIOUS_APPLY_LEAD_CHANGES = APPLY_LEAD_CHANGES.replace(DELETED_CAMPAIGN_FILTER, '')
+
+FOREIGN_KEYS = [
+    ('leads_campaign_id_fkey', 'campaign_id', 'campaigns (campaign_id)'),
+    ('leads_company_id_fkey', 'company_id', 'organizations (organization_id)'),
+]
+
+ARCHIVE_TRIGGERS = [
+    ('archived_leads_campaign_kpis_insert', 'INSERT', 'NEW TABLE AS new_leads'),
+    ('archived_leads_campaign_kpis_delete', 'DELETE', 'OLD TABLE AS old_leads'),
+]
+
+
+def _replace_foreign_keys(on_delete: str) -> None:
+    """Swap the lead foreign keys without scanning leads under a write lock.
+
+    The new constraint is added NOT VALID, which only needs a brief lock,
+    and validated by a second statement that lets writes through.
+    """
+    with op.get_context().autocommit_block():
+        for name, column, target in FOREIGN_KEYS:
+            op.execute(
+                f'ALTER TABLE leads DROP CONSTRAINT IF EXISTS {name}, '
+                f'ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {target}'
+                f'{on_delete} NOT VALID'
+            )
+            op.execute(f'ALTER TABLE leads VALIDATE CONSTRAINT {name}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(APPLY_LEAD_CHANGES)
+    _replace_foreign_keys(' ON DELETE CASCADE')
+
+    op.create_table(
+        'archived_leads',
+        sa.Column('lead_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('campaign_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('company_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('first_name', sa.String(), nullable=True),
+        sa.Column('last_name', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('email_normalized', sa.String(), nullable=True),
+        sa.Column('external_id', sa.String(), nullable=True),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('headline', sa.String(), nullable=True),
+        sa.Column('linkedin_url', sa.String(), nullable=True),
+        sa.Column('linkedin_data', sa.String(), nullable=True),
+        sa.Column('email_verification_status', sa.String(), nullable=True),
+        sa.Column('email_verification_message', sa.String(), nullable=True),
+        sa.Column('email_icebreaker', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('external_datasetid', sa.String(), nullable=True),
+        sa.Column('import_run', sa.String(), nullable=True),
+        sa.Column('language', sa.String(), nullable=True),
+        sa.Column('source', sa.String(), nullable=True),
+        sa.Column('email_sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('reply_received_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_contacted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('claimed_by', sa.String(), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('lead_id'),
+    )
+    op.create_index('ix_archived_leads_campaign_id', 'archived_leads', ['campaign_id'])
+    for name, event, transitions in ARCHIVE_TRIGGERS:
+        op.execute(
+            f"CREATE TRIGGER {name} AFTER {event} ON archived_leads "
+            f"REFERENCING {transitions} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION campaign_kpis_apply_lead_changes()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Archived leads leave the KPI rollup along with their table.
+    op.drop_table('archived_leads')
+    _replace_foreign_keys('')
+    op.execute(PREVIOUS_APPLY_LEAD_CHANGES)
@@ -0,0 +1,257 @@
+"""partition leads by month of created_at
+
+Revision ID: b5d83e1a6c47
+Revises: 9c4e2b7d1f05
+Create Date: 2026-10-17 18:02:37.118245
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d83e1a6c47'
+down_revision: Union[str, None] = '9c4e2b7d1f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Override with: alembic -x batch_size=20000 upgrade head
+DEFAULT_BATCH_SIZE = 5000
+# As outreach.partitions.PARTITION_MONTHS_AHEAD.
+MONTHS_AHEAD = 3
+# The swap waits this long for its lock on leads before giving up.
+LOCK_TIMEOUT = '5s'
+
+KPI_TRIGGERS = [
+    ('leads_campaign_kpis_insert', 'INSERT', 'NEW TABLE AS new_leads'),
+    ('leads_campaign_kpis_update', 'UPDATE', 'OLD TABLE AS old_leads NEW TABLE AS new_leads'),
+    ('leads_campaign_kpis_delete', 'DELETE', 'OLD TABLE AS old_leads'),
+]
+
+# While rows are copied, every write to leads is repeated on leads_new, so
+# the copy never misses a change made behind it. An update is a delete and
+# an insert, since it may move the row to another partition.
+MIRROR_CHANGES = """
+CREATE FUNCTION leads_mirror_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM leads_new
+        WHERE lead_id = OLD.lead_id AND created_at = OLD.created_at;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO leads_new SELECT NEW.* ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+# The primary key of a partitioned table has to include the partition key,
+# so it no longer keeps lead_id unique on its own. lead_ids does, holding
+# every lead_id of leads under its own primary key (outreach.models.LEAD_KEY_DDL).
+# Its triggers go on leads_new before the copy, so copied and mirrored rows
+# fill it as they arrive.
+LEAD_KEYS = """
+CREATE FUNCTION lead_ids_apply_lead_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO lead_ids SELECT lead_id FROM new_leads;
+    ELSIF TG_OP = 'DELETE' THEN
+        DELETE FROM lead_ids WHERE lead_id IN (SELECT lead_id FROM old_leads);
+    ELSE
+        UPDATE lead_ids SET lead_id = NEW.lead_id WHERE lead_id = OLD.lead_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+LEAD_KEY_TRIGGERS = [
+    ('leads_lead_ids_insert', 'INSERT', 'REFERENCING NEW TABLE AS new_leads FOR EACH STATEMENT'),
+    (
+        'leads_lead_ids_update',
+        'UPDATE OF lead_id',
+        'FOR EACH ROW WHEN (OLD.lead_id IS DISTINCT FROM NEW.lead_id)',
+    ),
+    ('leads_lead_ids_delete', 'DELETE', 'REFERENCING OLD TABLE AS old_leads FOR EACH STATEMENT'),
+]
+
+
+def _batch_size() -> int:
+    return int(context.get_x_argument(as_dictionary=True).get('batch_size', DEFAULT_BATCH_SIZE))
+
+
+def _month(moment: datetime) -> date:
+    moment = moment.astimezone(timezone.utc)
+    return date(moment.year, moment.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _bound(month: date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def _create_partitions(conn) -> None:
+    """Partition leads_new by month, from the oldest lead to MONTHS_AHEAD ahead."""
+    now = _month(datetime.now(timezone.utc))
+    oldest = conn.scalar(sa.text('SELECT min(created_at) FROM leads'))
+    month = min(_month(oldest), now) if oldest else now
+    last = now
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    op.execute('CREATE TABLE leads_default PARTITION OF leads_new DEFAULT')
+    while month <= last:
+        end = _next_month(month)
+        op.execute(
+            f'CREATE TABLE leads_p{month.year:04d}_{month.month:02d} PARTITION OF leads_new '
+            f'FOR VALUES FROM ({_bound(month)}) TO ({_bound(end)})'
+        )
+        month = end
+
+
+def _secondary_indexes(conn, table: str) -> list[tuple[str, str]]:
+    return conn.execute(
+        sa.text(
+            'SELECT index.relname, pg_get_indexdef(index.oid) FROM pg_index '
+            'JOIN pg_class AS index ON index.oid = pg_index.indexrelid '
+            'WHERE pg_index.indrelid = CAST(:table AS regclass) '
+            'AND NOT pg_index.indisprimary'
+        ),
+        {'table': table},
+    ).all()
+
+
+def _create_copy(conn, partitioned: bool) -> None:
+    """Create an empty leads_new with the columns, keys and indexes of leads.
+
+    The indexes are built now, on the empty table, because building them
+    after the copy would block the mirrored writes, and so leads, meanwhile.
+    """
+    op.execute('DROP TABLE IF EXISTS leads_new')
+    op.execute('DROP FUNCTION IF EXISTS leads_mirror_changes() CASCADE')
+    op.execute(
+        'CREATE TABLE leads_new (LIKE leads INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        + (' PARTITION BY RANGE (created_at)' if partitioned else '')
+    )
+    if partitioned:
+        _create_partitions(conn)
+    key = 'lead_id, created_at' if partitioned else 'lead_id'
+    op.execute(f'ALTER TABLE leads_new ADD CONSTRAINT leads_new_pkey PRIMARY KEY ({key})')
+    if partitioned:
+        _create_lead_keys()
+    for name, definition in _secondary_indexes(conn, 'leads'):
+        head, _, tail = definition.partition(' USING ')
+        unique = 'UNIQUE ' if head.startswith('CREATE UNIQUE') else ''
+        op.execute(f'CREATE {unique}INDEX {name}_new ON leads_new USING {tail}')
+    foreign_keys = conn.execute(
+        sa.text(
+            'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+            "WHERE conrelid = CAST('leads' AS regclass) AND contype = 'f'"
+        )
+    ).all()
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE leads_new ADD CONSTRAINT {name} {definition}')
+
+    op.execute(MIRROR_CHANGES)
+    op.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute(
+        'CREATE TRIGGER leads_mirror_changes AFTER INSERT OR UPDATE OR DELETE ON leads '
+        'FOR EACH ROW EXECUTE FUNCTION leads_mirror_changes()'
+    )
+    op.execute('RESET lock_timeout')
+
+
+def _create_lead_keys() -> None:
+    op.execute('DROP TABLE IF EXISTS lead_ids')
+    op.execute('DROP FUNCTION IF EXISTS lead_ids_apply_lead_changes()')
+    op.execute('CREATE TABLE lead_ids (lead_id uuid PRIMARY KEY)')
+    op.execute(LEAD_KEYS)
+    for name, event, clause in LEAD_KEY_TRIGGERS:
+        op.execute(
+            f'CREATE TRIGGER {name} AFTER {event} ON leads_new {clause} '
+            'EXECUTE FUNCTION lead_ids_apply_lead_changes()'
+        )
+
+
+def _copy_rows(conn, batch_size: int) -> None:
+    """Copy leads in primary key order, one committed batch per statement.
+
+    FOR SHARE makes a concurrent update or delete of a batch row wait for
+    the batch to commit, so its mirrored change lands after the copy.
+    """
+    copy_batch = sa.text(
+        """
+        WITH batch AS (
+            SELECT * FROM leads
+            WHERE lead_id > :last_id
+            ORDER BY lead_id
+            LIMIT :batch_size
+            FOR SHARE
+        ), copied AS (
+            INSERT INTO leads_new SELECT * FROM batch ON CONFLICT DO NOTHING
+        )
+        SELECT lead_id FROM batch ORDER BY lead_id DESC LIMIT 1
+        """
+    )
+    last_id = '00000000-0000-0000-0000-000000000000'
+    while True:
+        last_id = conn.scalar(copy_batch, {'last_id': last_id, 'batch_size': batch_size})
+        if last_id is None:
+            return
+
+
+def _swap(conn, partitioned: bool) -> None:
+    """Replace leads with leads_new, within the migration's transaction.
+
+    Writers wait for the lock rather than fail; the swap itself is catalog
+    changes only.
+    """
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute('LOCK TABLE leads IN ACCESS EXCLUSIVE MODE')
+    op.execute('DROP TABLE leads')
+    op.execute('DROP FUNCTION leads_mirror_changes()')
+    if not partitioned:
+        op.execute('DROP TABLE lead_ids')
+        op.execute('DROP FUNCTION lead_ids_apply_lead_changes()')
+    op.execute('ALTER TABLE leads_new RENAME TO leads')
+    op.execute('ALTER TABLE leads RENAME CONSTRAINT leads_new_pkey TO leads_pkey')
+    for name, _ in _secondary_indexes(conn, 'leads'):
+        op.execute(f'ALTER INDEX {name} RENAME TO {name.removesuffix("_new")}')
+    for name, event, transitions in KPI_TRIGGERS:
+        op.execute(
+            f'CREATE TRIGGER {name} AFTER {event} ON leads REFERENCING {transitions} '
+            'FOR EACH STATEMENT EXECUTE FUNCTION campaign_kpis_apply_lead_changes()'
+        )
+    op.execute('ANALYZE leads')
+
+
+def _rebuild(partitioned: bool) -> None:
+    """Rebuild leads while it stays in use: copy it aside, then swap.
+
+    The copy runs outside the migration's transaction, one batch at a time;
+    an interrupted run starts it over. Only the final swap locks leads.
+    """
+    conn = op.get_bind()
+    with op.get_context().autocommit_block():
+        _create_copy(conn, partitioned)
+        _copy_rows(conn, _batch_size())
+    _swap(conn, partitioned)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rebuild(partitioned=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Partitions detached by outreach.partitions stay behind as tables.
+    _rebuild(partitioned=False)
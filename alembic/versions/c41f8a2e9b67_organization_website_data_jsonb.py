@@ -0,0 +1,240 @@
+"""organization website data to jsonb and compressed bytea
+
+Revision ID: c41f8a2e9b67
+Revises: 6b0e3c71d5a8
+Create Date: 2026-10-17 11:26:05.873410
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from outreach.types import compress_json, decompress_json
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f8a2e9b67'
+down_revision: Union[str, None] = '6b0e3c71d5a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Override with: alembic -x batch_size=20000 upgrade head
+DEFAULT_BATCH_SIZE = 5000
+
+# CREATE TRIGGER waits this long for its lock on organizations.
+LOCK_TIMEOUT = '5s'
+
+PENDING = """
+    (website_summary_data IS NOT NULL AND website_summary_data_jsonb IS NULL)
+    OR (website_raw_data IS NOT NULL AND website_raw_data_gz IS NULL)
+"""
+
+# While the backfill runs, every write to the old columns is converted into
+# the new ones on the spot, so nothing written meanwhile is left behind.
+# SQL has no gzip, so those rows get their raw data as plain JSON bytes,
+# which outreach.types reads as the "none" codec.
+SYNC_FUNCTIONS = [
+    """
+    CREATE OR REPLACE FUNCTION organizations_website_data_jsonb(value text) RETURNS jsonb
+    LANGUAGE plpgsql IMMUTABLE AS $$
+    BEGIN
+        RETURN value::jsonb;
+    EXCEPTION WHEN invalid_text_representation OR untranslatable_character THEN
+        -- Not JSON: kept as a JSON string, as _as_json does.
+        RETURN to_jsonb(value);
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION organizations_sync_website_data() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT'
+           OR NEW.website_summary_data IS DISTINCT FROM OLD.website_summary_data THEN
+            NEW.website_summary_data_jsonb :=
+                organizations_website_data_jsonb(NEW.website_summary_data);
+        END IF;
+        IF TG_OP = 'INSERT'
+           OR NEW.website_raw_data IS DISTINCT FROM OLD.website_raw_data THEN
+            NEW.website_raw_data_gz := convert_to(
+                organizations_website_data_jsonb(NEW.website_raw_data)::text, 'UTF8'
+            );
+        END IF;
+        RETURN NEW;
+    END
+    $$
+    """,
+]
+
+
+def _batch_size() -> int:
+    return int(context.get_x_argument(as_dictionary=True).get('batch_size', DEFAULT_BATCH_SIZE))
+
+
+def _as_json(value: str):
+    """Parse legacy text; anything that is not JSON is kept as a JSON string."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _create_sync_trigger() -> None:
+    for statement in SYNC_FUNCTIONS:
+        op.execute(statement)
+    op.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute('DROP TRIGGER IF EXISTS organizations_sync_website_data ON organizations')
+    op.execute(
+        'CREATE TRIGGER organizations_sync_website_data '
+        'BEFORE INSERT OR UPDATE OF website_summary_data, website_raw_data ON organizations '
+        'FOR EACH ROW EXECUTE FUNCTION organizations_sync_website_data()'
+    )
+    op.execute('RESET lock_timeout')
+
+
+def _drop_sync_trigger() -> None:
+    op.execute('DROP TRIGGER organizations_sync_website_data ON organizations')
+    op.execute('DROP FUNCTION organizations_sync_website_data()')
+    op.execute('DROP FUNCTION organizations_website_data_jsonb(text)')
+
+
+def _backfill(conn, batch_size: int) -> None:
+    """Convert pending rows in primary key order, one batch per statement.
+
+    Rows are only selected while they still need converting, so a killed
+    run picks up where it stopped. A row rewritten between its SELECT and
+    UPDATE already has its new columns set by the sync trigger, and the
+    UPDATE leaves them alone.
+    """
+    select_batch = sa.text(
+        f"""
+        SELECT organization_id, website_summary_data, website_raw_data
+        FROM organizations
+        WHERE organization_id > :last_id AND ({PENDING})
+        ORDER BY organization_id
+        LIMIT :batch_size
+        """
+    )
+    update_row = sa.text(
+        """
+        UPDATE organizations
+        SET website_summary_data_jsonb = CASE
+                WHEN website_summary_data IS NOT NULL AND website_summary_data_jsonb IS NULL
+                THEN CAST(:summary AS jsonb) ELSE website_summary_data_jsonb END,
+            website_raw_data_gz = CASE
+                WHEN website_raw_data IS NOT NULL AND website_raw_data_gz IS NULL
+                THEN :raw ELSE website_raw_data_gz END
+        WHERE organization_id = :organization_id
+        """
+    ).bindparams(sa.bindparam('raw', type_=sa.LargeBinary))
+
+    last_id = '00000000-0000-0000-0000-000000000000'
+    while True:
+        rows = conn.execute(
+            select_batch, {'last_id': last_id, 'batch_size': batch_size}
+        ).fetchall()
+        if not rows:
+            return
+        conn.execute(
+            update_row,
+            [
+                {
+                    'organization_id': organization_id,
+                    'summary': None if summary is None else json.dumps(_as_json(summary)),
+                    'raw': None if raw is None else compress_json(_as_json(raw)),
+                }
+                for organization_id, summary, raw in rows
+            ],
+        )
+        last_id = rows[-1].organization_id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('ALTER TABLE organizations ADD COLUMN IF NOT EXISTS website_summary_data_jsonb JSONB')
+    op.execute('ALTER TABLE organizations ADD COLUMN IF NOT EXISTS website_raw_data_gz BYTEA')
+
+    # Bulk of the work runs outside the migration transaction: progress is
+    # kept if the run is interrupted and writers are never blocked. The sync
+    # trigger converts whatever is written meanwhile.
+    with op.get_context().autocommit_block():
+        _create_sync_trigger()
+        _backfill(op.get_bind(), _batch_size())
+
+    # Nothing is left to convert, so the swap is catalog changes only.
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute('LOCK TABLE organizations IN ACCESS EXCLUSIVE MODE')
+    _drop_sync_trigger()
+    op.drop_column('organizations', 'website_summary_data')
+    op.drop_column('organizations', 'website_raw_data')
+    op.alter_column('organizations', 'website_summary_data_jsonb', new_column_name='website_summary_data')
+    op.alter_column('organizations', 'website_raw_data_gz', new_column_name='website_raw_data')
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_organizations_website_summary_data',
+            'organizations',
+            ['website_summary_data'],
+            postgresql_using='gin',
+            postgresql_ops={'website_summary_data': 'jsonb_path_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def _as_text(value) -> str:
+    """Inverse of _as_json: JSON strings go back to plain text."""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _restore_raw_text(conn, batch_size: int) -> None:
+    """Decompress website_raw_data into website_raw_data_text, a batch at a time."""
+    select_batch = sa.text(
+        """
+        SELECT organization_id, website_raw_data FROM organizations
+        WHERE organization_id > :last_id AND website_raw_data IS NOT NULL
+        ORDER BY organization_id
+        LIMIT :batch_size
+        """
+    )
+    update_row = sa.text(
+        'UPDATE organizations SET website_raw_data_text = :raw '
+        'WHERE organization_id = :organization_id'
+    )
+    last_id = '00000000-0000-0000-0000-000000000000'
+    while True:
+        rows = conn.execute(
+            select_batch, {'last_id': last_id, 'batch_size': batch_size}
+        ).fetchall()
+        if not rows:
+            return
+        conn.execute(
+            update_row,
+            [
+                {'organization_id': organization_id, 'raw': _as_text(decompress_json(raw))}
+                for organization_id, raw in rows
+            ],
+        )
+        last_id = rows[-1].organization_id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_organizations_website_summary_data', table_name='organizations')
+    op.add_column('organizations', sa.Column('website_raw_data_text', sa.String(), nullable=True))
+    _restore_raw_text(op.get_bind(), _batch_size())
+    op.drop_column('organizations', 'website_raw_data')
+    op.alter_column('organizations', 'website_raw_data_text', new_column_name='website_raw_data')
+    op.alter_column('organizations', 'website_summary_data',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=sa.String(),
+               existing_nullable=True,
+               postgresql_using="""
+                   CASE WHEN jsonb_typeof(website_summary_data) = 'string'
+                        THEN website_summary_data #>> '{}'
+                        ELSE website_summary_data::text
+                   END
+               """)
@@ -0,0 +1,60 @@
+"""replies with full-text search
+
+Revision ID: e2a9c4f7b813
+Revises: b5d83e1a6c47
+Create Date: 2026-10-17 19:11:52.730164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a9c4f7b813'
+down_revision: Union[str, None] = 'b5d83e1a6c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'replies',
+        sa.Column('reply_id', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('message_id', sa.String(), nullable=False),
+        sa.Column('lead_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('campaign_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('from_email', sa.String(), nullable=False),
+        sa.Column('subject', sa.String(), nullable=True),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('received_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('classification', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('reply_id'),
+        sa.UniqueConstraint('message_id'),
+    )
+    op.execute(
+        """
+        ALTER TABLE replies ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            to_tsvector('english', coalesce(subject, '') || ' ' || body)
+        ) STORED
+        """
+    )
+    op.create_index('ix_replies_lead_id', 'replies', ['lead_id'])
+    op.create_index(
+        'ix_replies_campaign_id_received_at',
+        'replies',
+        ['campaign_id', 'received_at', 'reply_id'],
+    )
+    op.create_index(
+        'ix_replies_search_vector', 'replies', ['search_vector'], postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('replies')
@@ -0,0 +1,49 @@
+"""add send scheduler indexes
+
+Revision ID: e7c41b09d2a5
+Revises: 5f2d9e8b13c6
+Create Date: 2026-10-17 15:20:08.662419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c41b09d2a5'
+down_revision: Union[str, None] = '5f2d9e8b13c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_leads_pending_by_company', ['campaign_id', 'company_id', 'created_at', 'lead_id'], "status = 'pending'"),
+    ('ix_leads_campaign_email_sent_at', ['campaign_id', 'email_sent_at'], 'email_sent_at IS NOT NULL'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, columns, where in INDEXES:
+            op.create_index(
+                name,
+                'leads',
+                columns,
+                postgresql_where=sa.text(where),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='leads',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,58 @@
+"""unique organization email_domain
+
+Revision ID: fd2977d94130
+Revises: 454fc965a49b
+Create Date: 2026-10-17 09:12:40.512304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fd2977d94130'
+down_revision: Union[str, None] = '454fc965a49b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Oldest organization per domain survives; duplicates are merged into it.
+DUPLICATES = """
+    SELECT organization_id,
+           first_value(organization_id) OVER (
+               PARTITION BY email_domain ORDER BY created_at, organization_id
+           ) AS keep_id
+    FROM organizations
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        f"""
+        UPDATE leads SET company_id = dup.keep_id
+        FROM ({DUPLICATES}) AS dup
+        WHERE leads.company_id = dup.organization_id
+          AND dup.organization_id <> dup.keep_id
+        """
+    )
+    op.execute(
+        f"""
+        DELETE FROM organizations
+        USING ({DUPLICATES}) AS dup
+        WHERE organizations.organization_id = dup.organization_id
+          AND dup.organization_id <> dup.keep_id
+        """
+    )
+    op.create_index(
+        op.f('ix_organizations_email_domain'),
+        'organizations',
+        ['email_domain'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_organizations_email_domain'), table_name='organizations')
@@ -0,0 +1,24 @@
+"""
+Benchmark suite for the outreach data layer.
+
+Seeds a database at a chosen scale, times every public ``outreach.crud``
+function plus the import, export, status-update and reporting paths, and
+saves p50/p99 latency, rows/sec and peak RSS per benchmark as JSON so runs
+of different commits can be compared.
+
+    python -m benchmarks run --url postgresql+psycopg2://... --scale full
+    python -m benchmarks run --url sqlite:///bench.db --scale small
+    python -m benchmarks compare before.json after.json
+
+Scales (campaigns / organizations / leads): ``small`` 10 / 10k / 100k,
+``medium`` 100 / 100k / 1M, ``full`` 1k / 1M / 10M. A database already
+seeded at the requested scale is reused; pass ``--reseed`` to start over.
+
+Every benchmark runs in a fresh process, so its peak RSS is its own. On
+PostgreSQL, writes happen inside a transaction that is rolled back at the
+end (``session.commit()`` releases a savepoint), so runs leave the seeded
+data as they found it; on SQLite each benchmark works on a copy of the
+database file.
+
+WARNING: seeding drops and recreates all tables in the target database.
+"""
@@ -0,0 +1,281 @@
+"""
+Benchmarks for every public outreach.crud function.
+
+Named ``crud.<function>`` so the runner can report functions added to
+outreach.crud without a benchmark. Lookups rotate through seeded rows and
+clear the identity map first, so each iteration reaches the database.
+"""
+import itertools
+import uuid
+
+from outreach import crud
+
+from .harness import Case, Context, benchmark
+from .seed import seeded_id
+
+LOOKUPS = 1000
+ORGANIZATION_BATCH = 1000
+LEAD_BATCH = 5000
+CLAIM_LIMIT = 100
+
+
+@benchmark("crud.create_campaign", dialects=("postgresql",))
+def create_campaign(ctx: Context) -> Case:
+    # campaign_id comes from the server-side gen_random_uuid() default.
+    def run():
+        crud.create_campaign(ctx.session, f"Benchmark {ctx.unique()}", "")
+        return 1
+
+    return Case(run)
+
+
+@benchmark("crud.get_campaign_by_id", repeat=200)
+def get_campaign_by_id(ctx: Context) -> Case:
+    ids = itertools.cycle(
+        seeded_id("campaign", number) for number in range(ctx.scale.campaigns)
+    )
+
+    def run():
+        crud.get_campaign_by_id(ctx.session, next(ids))
+        return 1
+
+    return Case(run, before=ctx.session.expunge_all)
+
+
+@benchmark("crud.create_organization", repeat=100)
+def create_organization(ctx: Context) -> Case:
+    def run():
+        token = ctx.unique()
+        crud.create_organization(
+            ctx.session,
+            organization_id=uuid.uuid4(),
+            name=f"Benchmark {token}",
+            email_domain=f"bench-{token}.example",
+        )
+        return 1
+
+    return Case(run)
+
+
+@benchmark("crud.get_organization_by_domain", repeat=200)
+def get_organization_by_domain(ctx: Context) -> Case:
+    domains = itertools.cycle(ctx.domains(LOOKUPS))
+
+    def run():
+        crud.get_organization_by_domain(ctx.session, next(domains))
+        return 1
+
+    return Case(run, before=ctx.session.expunge_all)
+
+
+def _organization_rows(ctx: Context) -> list[dict]:
+    """Half seeded domains (updates), half new ones (inserts)."""
+    existing = ctx.domains(ORGANIZATION_BATCH // 2)
+    token = ctx.unique()
+    new = [f"bench-{token}-{i}.example" for i in range(ORGANIZATION_BATCH - len(existing))]
+    return [
+        {"email_domain": domain, "name": f"Organization {domain}", "country": "CH"}
+        for domain in existing + new
+    ]
+
+
+@benchmark("crud.upsert_organizations", repeat=10)
+def upsert_organizations(ctx: Context) -> Case:
+    rows = []
+
+    def before():
+        rows[:] = _organization_rows(ctx)
+
+    def run():
+        return len(crud.upsert_organizations(ctx.session, rows))
+
+    return Case(run, before)
+
+
+@benchmark("crud.resolve_organization_ids", repeat=10)
+def resolve_organization_ids(ctx: Context) -> Case:
+    rows = [
+        {"email_domain": domain, "name": f"Organization {domain}"}
+        for domain in ctx.domains(ORGANIZATION_BATCH)
+    ]
+
+    def run():
+        return len(crud.resolve_organization_ids(ctx.session, rows))
+
+    return Case(run, before=crud.organization_ids.clear)
+
+
+@benchmark("crud.resolve_organization_ids.cached", repeat=50)
+def resolve_organization_ids_cached(ctx: Context) -> Case:
+    rows = [
+        {"email_domain": domain, "name": f"Organization {domain}"}
+        for domain in ctx.domains(ORGANIZATION_BATCH)
+    ]
+
+    def run():
+        return len(crud.resolve_organization_ids(ctx.session, rows))
+
+    return Case(run)
+
+
+@benchmark("crud.create_lead", repeat=100)
+def create_lead(ctx: Context) -> Case:
+    def run():
+        crud.create_lead(
+            ctx.session,
+            lead_id=uuid.uuid4(),
+            campaign_id=ctx.campaign_id,
+            company_id=seeded_id("org", 0),
+            email=f"bench-{ctx.unique()}@org0.example",
+            status=crud.PENDING_STATUS,
+        )
+        return 1
+
+    return Case(run)
+
+
+@benchmark("crud.bulk_import_leads", repeat=5)
+def bulk_import_leads(ctx: Context) -> Case:
+    domains = ctx.domains(LEAD_BATCH // 10)
+
+    def rows():
+        token = ctx.unique()
+        for i in range(LEAD_BATCH):
+            domain = domains[i % len(domains)]
+            yield {
+                "campaign_id": ctx.campaign_id,
+                "email": f"bench-{token}-{i}@{domain}",
+                "first_name": f"First{i}",
+                "last_name": f"Last{i}",
+                "status": crud.PENDING_STATUS,
+                "organization": {"email_domain": domain, "name": f"Organization {domain}"},
+            }
+
+    def run():
+        return crud.bulk_import_leads(ctx.session, rows()).inserted
+
+    return Case(run)
+
+
+@benchmark("crud.get_leads_by_status", repeat=3)
+def get_leads_by_status(ctx: Context) -> Case:
+    # 'interested' is 1% of all leads: 100k ORM objects at full scale.
+    def run():
+        return len(crud.get_leads_by_status(ctx.session, "interested"))
+
+    return Case(run, before=ctx.session.expunge_all)
+
+
+@benchmark("crud.iter_leads_by_status", repeat=5)
+def iter_leads_by_status(ctx: Context) -> Case:
+    def run():
+        leads = crud.iter_leads_by_status(
+            ctx.session, crud.PENDING_STATUS, campaign_id=ctx.campaign_id
+        )
+        return sum(1 for _ in leads)
+
+    return Case(run, before=ctx.session.expunge_all)
+
+
+@benchmark("crud.update_lead_status", repeat=200)
+def update_lead_status(ctx: Context) -> Case:
+    ids = itertools.cycle(ctx.lead_ids(LOOKUPS))
+    statuses = itertools.cycle(("emailed", "replied"))
+
+    def run():
+        crud.update_lead_status(ctx.session, next(ids), next(statuses))
+        return 1
+
+    return Case(run, before=ctx.session.expunge_all)
+
+
+@benchmark("crud.bulk_update_lead_status", repeat=10)
+def bulk_update_lead_status(ctx: Context) -> Case:
+    ids = ctx.lead_ids(LEAD_BATCH)
+    statuses = itertools.cycle(("emailed", "replied"))
+
+    def run():
+        return len(
+            crud.bulk_update_lead_status(
+                ctx.session, ids, next(statuses), timestamps=("last_contacted_at",)
+            )
+        )
+
+    return Case(run)
+
+
+@benchmark("crud.claim_leads_for_sending", repeat=20, dialects=("postgresql",))
+def claim_leads_for_sending(ctx: Context) -> Case:
+    def run():
+        return len(
+            crud.claim_leads_for_sending(
+                ctx.session, ctx.campaign_id, CLAIM_LIMIT, worker_id="bench"
+            )
+        )
+
+    return Case(run)
+
+
+@benchmark("crud.finish_claimed_leads", repeat=20, dialects=("postgresql",))
+def finish_claimed_leads(ctx: Context) -> Case:
+    claimed = []
+
+    def before():
+        leads = crud.claim_leads_for_sending(
+            ctx.session, ctx.campaign_id, CLAIM_LIMIT, worker_id="bench"
+        )
+        claimed[:] = [lead.lead_id for lead in leads]
+
+    def run():
+        return len(crud.finish_claimed_leads(ctx.session, claimed, worker_id="bench"))
+
+    return Case(run, before)
+
+
+@benchmark("crud.release_expired_leases", repeat=20, dialects=("postgresql",))
+def release_expired_leases(ctx: Context) -> Case:
+    def before():
+        crud.claim_leads_for_sending(
+            ctx.session, ctx.campaign_id, CLAIM_LIMIT, worker_id="bench", lease_seconds=-60
+        )
+
+    def run():
+        return len(crud.release_expired_leases(ctx.session, ctx.campaign_id))
+
+    return Case(run, before)
+
+
+def _filled_campaign(ctx: Context) -> uuid.UUID:
+    """A new campaign with LEAD_BATCH leads at seeded organizations."""
+    campaign = crud.create_campaign(ctx.session, f"Benchmark {ctx.unique()}", "")
+    domains = ctx.domains(LEAD_BATCH // 10)
+    token = ctx.unique()
+    crud.bulk_import_leads(
+        ctx.session,
+        (
+            {
+                "campaign_id": campaign.campaign_id,
+                "email": f"bench-{token}-{i}@{domains[i % len(domains)]}",
+                "status": crud.PENDING_STATUS,
+                "organization": {
+                    "email_domain": domains[i % len(domains)],
+                    "name": f"Organization {domains[i % len(domains)]}",
+                },
+            }
+            for i in range(LEAD_BATCH)
+        ),
+    )
+    return campaign.campaign_id
+
+
+@benchmark("crud.delete_campaign", repeat=5, dialects=("postgresql",))
+def delete_campaign(ctx: Context) -> Case:
+    campaigns = []
+
+    def before():
+        campaigns[:] = [_filled_campaign(ctx)]
+
+    def run():
+        return crud.delete_campaign(ctx.session, campaigns[0])
+
+    return Case(run, before)
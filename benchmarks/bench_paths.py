@@ -0,0 +1,259 @@
+"""
+Benchmarks for the import, export, status-update and reporting paths.
+"""
+import csv
+import itertools
+import json
+from datetime import datetime, time, timedelta, timezone
+
+from outreach import archive, crud, export, replies
+from outreach.dedup import DuplicateChecker, find_existing_emails
+from outreach.importer import LeadImporter
+from outreach.kpi import campaign_kpis, compute_campaign_kpis
+from outreach.scheduler import SendPolicy, SendScheduler
+
+from .bench_crud import _filled_campaign
+from .harness import Case, Context, SkipBenchmark, benchmark
+from .seed import seeded_domain
+
+IMPORT_ROWS = 20_000
+DEDUP_LOOKUPS = 5000
+SEND_BATCH = 100
+REPLY_BATCH = 5000
+REPLY_CORPUS = 50_000
+
+IMPORT_MAPPING = {
+    "emailAddress": "email",
+    "firstName": "first_name",
+    "lastName": "last_name",
+    "jobTitle": "title",
+    "companyName": "organization.name",
+    "companyDomain": "organization.email_domain",
+    "companySize": "organization.estimated_num_employees",
+}
+
+
+def _write_import_file(ctx: Context, format: str) -> str:
+    """A scraper export over seeded organizations; every 10th address exists.
+
+    The other addresses are new on every call, so repeated imports insert
+    rather than skip them.
+    """
+    path = ctx.workdir / f"import.{format}"
+    token = ctx.unique()
+    organizations = min(ctx.scale.organizations, IMPORT_ROWS // 10)
+    records = (
+        {
+            "emailAddress": (
+                f"lead{i}@{seeded_domain(i % ctx.scale.organizations)}"
+                if i % 10 == 0
+                else f"new{token}-{i}@{seeded_domain(i % organizations)}"
+            ),
+            "firstName": f"First{i}",
+            "lastName": f"Last{i}",
+            "jobTitle": "Head of Operations",
+            "companyName": f"Organization {i % organizations}",
+            "companyDomain": seeded_domain(i % organizations),
+            "companySize": str(10 + i % 500),
+        }
+        for i in range(IMPORT_ROWS)
+    )
+    with open(path, "w", newline="") as file:
+        if format == "csv":
+            writer = csv.DictWriter(file, fieldnames=list(IMPORT_MAPPING))
+            writer.writeheader()
+            writer.writerows(records)
+        else:
+            file.writelines(json.dumps(record) + "\n" for record in records)
+    return str(path)
+
+
+def _import_case(ctx: Context, format: str, dedup: bool) -> Case:
+    paths = []
+
+    def before():
+        paths[:] = [_write_import_file(ctx, format)]
+
+    def run():
+        importer = LeadImporter(
+            paths[0],
+            ctx.campaign_id,
+            mapping=IMPORT_MAPPING,
+            import_run=ctx.unique(),
+            checkpoint_path=ctx.workdir / "import.checkpoint.json",
+        )
+        checker = DuplicateChecker(ctx.session) if dedup else None
+        return importer.run(ctx.session, checker=checker, restart=True).rows
+
+    return Case(run, before)
+
+
+@benchmark("import.csv", repeat=5)
+def import_csv(ctx: Context) -> Case:
+    return _import_case(ctx, "csv", dedup=False)
+
+
+@benchmark("import.jsonl.skip_existing", repeat=5)
+def import_jsonl_skip_existing(ctx: Context) -> Case:
+    return _import_case(ctx, "jsonl", dedup=True)
+
+
+def _export_case(ctx: Context, format: str) -> Case:
+    path = ctx.workdir / f"export.{format}"
+
+    def run():
+        return export.export_leads(ctx.session, ctx.campaign_id, path)
+
+    return Case(run)
+
+
+@benchmark("export.csv", repeat=5)
+def export_csv(ctx: Context) -> Case:
+    return _export_case(ctx, "csv")
+
+
+@benchmark("export.jsonl", repeat=5)
+def export_jsonl(ctx: Context) -> Case:
+    return _export_case(ctx, "jsonl")
+
+
+@benchmark("export.parquet", repeat=5)
+def export_parquet(ctx: Context) -> Case:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise SkipBenchmark("needs pyarrow")
+    return _export_case(ctx, "parquet")
+
+
+@benchmark("archive.campaign", repeat=5, dialects=("postgresql",))
+def archive_campaign(ctx: Context) -> Case:
+    """Move a campaign's leads into archived_leads, batch by batch."""
+    campaigns = []
+
+    def before():
+        campaigns[:] = [_filled_campaign(ctx)]
+
+    def run():
+        return archive.archive_campaign(ctx.session, campaigns[0])
+
+    return Case(run, before)
+
+
+@benchmark("status.send_cycle", repeat=20, dialects=("postgresql",))
+def send_cycle(ctx: Context) -> Case:
+    """Claim a batch through the scheduler and mark it sent."""
+    # Open around the clock and uncapped, so every iteration gets a batch.
+    policy = SendPolicy(
+        domain_per_minute=SEND_BATCH,
+        domain_daily_cap=None,
+        business_hours=(time(0), time(23, 59, 59)),
+        business_days=frozenset(range(7)),
+    )
+    scheduler = SendScheduler(ctx.session, ctx.campaign_id, policy)
+
+    def run():
+        leads = scheduler.next_batch(SEND_BATCH, worker_id="bench")
+        finished = crud.finish_claimed_leads(
+            ctx.session, [lead.lead_id for lead in leads], worker_id="bench"
+        )
+        return len(finished)
+
+    return Case(run)
+
+
+@benchmark("status.pending_to_emailed", repeat=10)
+def pending_to_emailed(ctx: Context) -> Case:
+    """A guarded transition over a whole campaign's pending leads."""
+    ids = ctx.lead_ids(ctx.scale.leads // ctx.scale.campaigns)
+    statuses = itertools.cycle((("emailed", ["pending"]), ("pending", ["emailed"])))
+
+    def run():
+        new_status, from_statuses = next(statuses)
+        return len(
+            crud.bulk_update_lead_status(
+                ctx.session, ids, new_status, from_statuses=from_statuses
+            )
+        )
+
+    return Case(run)
+
+
+@benchmark("dedup.find_existing_emails", repeat=10)
+def dedup_find_existing_emails(ctx: Context) -> Case:
+    # Half seeded addresses, half unknown ones.
+    emails = [
+        f"lead{i}@{seeded_domain(i % ctx.scale.organizations)}"
+        if i % 2
+        else f"unknown{i}@example.com"
+        for i in range(DEDUP_LOOKUPS)
+    ]
+
+    def run():
+        find_existing_emails(ctx.session, emails, contacted_within=timedelta(days=90))
+        return len(emails)
+
+    return Case(run)
+
+
+@benchmark("kpi.campaign_kpis", repeat=20)
+def kpi_campaign_kpis(ctx: Context) -> Case:
+    def run():
+        return len(campaign_kpis(ctx.session))
+
+    return Case(run)
+
+
+@benchmark("kpi.compute_campaign_kpis", repeat=3)
+def kpi_compute_campaign_kpis(ctx: Context) -> Case:
+    """The full aggregation the rollup table saves."""
+
+    def run():
+        return len(compute_campaign_kpis(ctx.session))
+
+    return Case(run)
+
+
+def _replies(ctx: Context, count: int, mention_every: int = 20):
+    """Replies from seeded addresses; every ``mention_every``-th asks about pricing."""
+    token = ctx.unique()
+    received = datetime.now(timezone.utc)
+    return [
+        {
+            "message_id": f"<{token}-{i}@bench.example>",
+            "from_email": f"lead{i}@{seeded_domain(i % ctx.scale.organizations)}",
+            "subject": "Re: Quick question",
+            "body": (
+                "Could you send your pricing for the team plan?"
+                if i % mention_every == 0
+                else "Thanks, not interested at the moment."
+            ),
+            "received_at": received - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+@benchmark("replies.ingest", repeat=5)
+def replies_ingest(ctx: Context) -> Case:
+    """Match a mailbox batch to leads by sender and store it."""
+    messages = []
+
+    def before():
+        messages[:] = _replies(ctx, REPLY_BATCH)
+
+    def run():
+        return replies.ingest_replies(ctx.session, messages).inserted
+
+    return Case(run, before)
+
+
+@benchmark("replies.search", repeat=20)
+def replies_search(ctx: Context) -> Case:
+    """A page of one campaign's replies mentioning pricing."""
+    replies.ingest_replies(ctx.session, _replies(ctx, REPLY_CORPUS))
+
+    def run():
+        return len(replies.search_replies(ctx.session, "pricing", ctx.campaign_id))
+
+    return Case(run)
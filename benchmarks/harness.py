@@ -0,0 +1,332 @@
+"""
+Registry, runner and result files for the benchmark suite.
+
+A benchmark is a function registered with ``@benchmark`` that receives a
+Context and returns a Case: ``run`` is the timed callable and returns the
+number of rows it handled, ``before`` is untimed per-iteration setup.
+"""
+import importlib
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from outreach import crud
+from outreach.engine import create_outreach_engine
+from outreach.models import Lead
+
+from .seed import SCALES, Scale, seeded_domain, seeded_id
+
+logger = logging.getLogger(__name__)
+
+# Modules that register benchmarks; imported by every worker process.
+BENCHMARK_MODULES = ("benchmarks.bench_crud", "benchmarks.bench_paths")
+
+
+@dataclass
+class Case:
+    run: Callable[[], int]
+    before: Callable[[], None] | None = None
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[["Context"], Case]
+    repeat: int
+    dialects: tuple[str, ...] | None
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark's setup when it cannot run here."""
+
+
+def benchmark(name: str, repeat: int = 20, dialects: tuple[str, ...] | None = None):
+    """Register a benchmark; ``dialects`` limits it to those databases."""
+
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, repeat, dialects)
+        return setup
+
+    return register
+
+
+@dataclass
+class Context:
+    """What a benchmark gets to work with."""
+
+    session: Session
+    scale: Scale
+    dialect: str
+    workdir: Path
+    counter: Iterator[int] = field(default_factory=lambda: iter(range(10**9)))
+
+    @property
+    def campaign_id(self) -> uuid.UUID:
+        """The first seeded campaign; holds leads / campaigns leads."""
+        return seeded_id("campaign", 0)
+
+    def unique(self) -> str:
+        """A token not seen before in this process, for new rows."""
+        return f"{os.getpid()}-{next(self.counter)}"
+
+    def domains(self, count: int, step: int = 7) -> list[str]:
+        """``count`` distinct seeded organization domains."""
+        return [
+            seeded_domain(i * step % self.scale.organizations) for i in range(count)
+        ]
+
+    def lead_ids(self, count: int, status: str | None = None) -> list[uuid.UUID]:
+        """Ids of up to ``count`` leads of the benchmark campaign."""
+        query = select(Lead.lead_id).where(Lead.campaign_id == self.campaign_id)
+        if status is not None:
+            query = query.where(Lead.status == status)
+        return list(self.session.scalars(query.limit(count)))
+
+
+def registered() -> list[str]:
+    """Names of all benchmarks, in registration order."""
+    _load_benchmarks()
+    return list(BENCHMARKS)
+
+
+def _load_benchmarks() -> None:
+    for module in BENCHMARK_MODULES:
+        importlib.import_module(module)
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_benchmark(name: str, url: str, scale_name: str, repeat: int | None) -> dict:
+    """Run one benchmark in this process and return its result record."""
+    _load_benchmarks()
+    spec = BENCHMARKS[name]
+    baseline_rss = _peak_rss_mb()
+
+    with tempfile.TemporaryDirectory(prefix="outreach-bench-") as tmp:
+        workdir = Path(tmp)
+        engine = create_outreach_engine(_working_copy(url, workdir))
+        try:
+            with _disposable_session(engine) as session:
+                ctx = Context(session, SCALES[scale_name], engine.dialect.name, workdir)
+                samples, rows = _measure(spec.setup(ctx), repeat or spec.repeat)
+        except SkipBenchmark as exc:
+            return {"name": name, "skipped": str(exc)}
+        finally:
+            engine.dispose()
+
+    p50 = percentile(samples, 50)
+    return {
+        "name": name,
+        "iterations": len(samples),
+        "rows": rows,
+        "p50_ms": p50 * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "min_ms": min(samples) * 1000,
+        "max_ms": max(samples) * 1000,
+        "rows_per_second": rows / p50 if p50 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "baseline_rss_mb": baseline_rss,
+    }
+
+
+def _measure(case: Case, repeat: int) -> tuple[list[float], int]:
+    """Time ``repeat`` iterations after one untimed warm-up."""
+    if case.before:
+        case.before()
+    case.run()
+    samples = []
+    rows = 0
+    for _ in range(repeat):
+        if case.before:
+            case.before()
+        start = time.perf_counter()
+        rows = case.run()
+        samples.append(time.perf_counter() - start)
+    return samples, rows
+
+
+@contextmanager
+def _disposable_session(engine) -> Iterator[Session]:
+    """A session whose writes are thrown away afterwards.
+
+    On PostgreSQL everything runs in one transaction that is rolled back;
+    commits only release savepoints. SQLite sessions work on a file copy
+    (see _working_copy) and commit for real.
+    """
+    if engine.dialect.name != "postgresql":
+        with Session(engine) as session:
+            yield session
+        return
+    with engine.connect() as conn:
+        outer = conn.begin()
+        session = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            yield session
+        finally:
+            session.close()
+            outer.rollback()
+
+
+def _working_copy(url: str, workdir: Path) -> str:
+    """SQLite benchmarks write to a copy of the database file."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or not parsed.database:
+        return url
+    copy = workdir / "bench.db"
+    shutil.copyfile(parsed.database, copy)
+    return str(parsed.set(database=str(copy)))
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_suite(
+    url: str,
+    scale: Scale,
+    selected: list[str] | None = None,
+    repeat: int | None = None,
+) -> dict:
+    """Run the selected benchmarks, each in a fresh process."""
+    _load_benchmarks()
+    dialect = make_url(url).get_backend_name()
+    names = selected or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    results, skipped, failed = [], {}, {}
+    for name in names:
+        spec = BENCHMARKS[name]
+        if spec.dialects and dialect not in spec.dialects:
+            skipped[name] = f"needs {' or '.join(spec.dialects)}"
+            continue
+        logger.info("Running %s...", name)
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+            try:
+                result = pool.submit(run_benchmark, name, url, scale.name, repeat).result()
+            except Exception as exc:
+                logger.exception("%s failed", name)
+                failed[name] = f"{type(exc).__name__}: {str(exc).splitlines()[0]}"
+                continue
+        if "skipped" in result:
+            skipped[name] = result["skipped"]
+        else:
+            results.append(result)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "dialect": dialect,
+            "scale": asdict(scale),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+        "skipped": skipped,
+        "failed": failed,
+        "uncovered": uncovered_crud_functions(),
+    }
+
+
+def uncovered_crud_functions() -> list[str]:
+    """Public outreach.crud functions without a ``crud.<name>`` benchmark."""
+    return sorted(
+        name
+        for name, value in vars(crud).items()
+        if callable(value)
+        and not name.startswith("_")
+        and getattr(value, "__module__", None) == crud.__name__
+        and not isinstance(value, type)
+        and f"crud.{name}" not in BENCHMARKS
+    )
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(report: dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+def load_results(path: Path) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def compare(old: dict, new: dict) -> list[tuple[str, float, float, float]]:
+    """Benchmarks in both reports as (name, old p50, new p50, ratio)."""
+    before = {result["name"]: result for result in old["results"]}
+    rows = []
+    for result in new["results"]:
+        previous = before.get(result["name"])
+        if previous is None:
+            continue
+        ratio = result["p50_ms"] / previous["p50_ms"] if previous["p50_ms"] else math.inf
+        rows.append((result["name"], previous["p50_ms"], result["p50_ms"], ratio))
+    return rows
+
+
+def format_results(report: dict) -> str:
+    results = report["results"]
+    width = max([len(result["name"]) for result in results] + [9])
+    lines = [
+        f"{'benchmark':<{width}}  {'p50 ms':>10}  {'p99 ms':>10}  {'rows/s':>11}  {'peak RSS':>9}"
+    ]
+    for result in results:
+        rate = result["rows_per_second"]
+        lines.append(
+            f"{result['name']:<{width}}  {result['p50_ms']:>10.2f}  {result['p99_ms']:>10.2f}  "
+            f"{rate if rate is not None else 0:>11.0f}  {result['peak_rss_mb']:>7.0f}MB"
+        )
+    for name, reason in report["skipped"].items():
+        lines.append(f"{name:<{width}}  skipped: {reason}")
+    for name, error in report["failed"].items():
+        lines.append(f"{name:<{width}}  FAILED: {error}")
+    if report["uncovered"]:
+        lines.append(f"crud functions without a benchmark: {', '.join(report['uncovered'])}")
+    return "\n".join(lines)
@@ -0,0 +1,254 @@
+"""
+Deterministic seed data for the benchmark suite.
+
+Ids are derived from each row's number (``md5('campaign' || n)::uuid`` and
+so on), so benchmarks can address seeded rows without looking them up and
+PostgreSQL can generate everything server-side with generate_series.
+Lead ``g`` belongs to campaign ``g % campaigns`` and organization
+``g % organizations``.
+"""
+import hashlib
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, inspect, select, text
+from sqlalchemy.engine import Engine
+
+from outreach import kpi, models
+from outreach.models import Campaign, Lead, Organization
+
+logger = logging.getLogger(__name__)
+
+SEED_CHUNK_SIZE = 1_000_000
+SQLITE_CHUNK_SIZE = 10_000
+IMPORT_RUNS = 10
+
+
+@dataclass(frozen=True)
+class Scale:
+    name: str
+    campaigns: int
+    organizations: int
+    leads: int
+
+
+SCALES = {
+    scale.name: scale
+    for scale in (
+        Scale("small", 10, 10_000, 100_000),
+        Scale("medium", 100, 100_000, 1_000_000),
+        Scale("full", 1_000, 1_000_000, 10_000_000),
+    )
+}
+
+# Share of leads per status, out of 100, by ``g % 100``.
+STATUS_SQL = """
+    CASE
+        WHEN g % 100 < 60 THEN 'pending'
+        WHEN g % 100 < 90 THEN 'emailed'
+        WHEN g % 100 < 96 THEN 'replied'
+        WHEN g % 100 < 97 THEN 'interested'
+        ELSE 'bounced'
+    END
+"""
+
+
+def seeded_id(kind: str, number: int) -> uuid.UUID:
+    """Id of seeded row ``number`` of ``kind`` ('campaign' or 'org')."""
+    return uuid.UUID(hashlib.md5(f"{kind}{number}".encode()).hexdigest())
+
+
+def seeded_domain(number: int) -> str:
+    return f"org{number}.example"
+
+
+def seed_status(g: int) -> str:
+    bucket = g % 100
+    if bucket < 60:
+        return "pending"
+    if bucket < 90:
+        return "emailed"
+    if bucket < 96:
+        return "replied"
+    if bucket < 97:
+        return "interested"
+    return "bounced"
+
+
+def is_seeded(engine: Engine, scale: Scale) -> bool:
+    """Whether the database already holds exactly ``scale``'s data.
+
+    A database seeded by an older commit lacks tables or columns added
+    since, and is not reused even though its row counts match.
+    """
+    try:
+        with engine.connect() as conn:
+            if not _has_schema(conn):
+                return False
+            counts = conn.execute(
+                select(
+                    select(func.count()).select_from(Campaign).scalar_subquery(),
+                    select(func.count()).select_from(Organization).scalar_subquery(),
+                    select(func.count()).select_from(Lead).scalar_subquery(),
+                )
+            ).one()
+    except Exception:
+        return False
+    return tuple(counts) == (scale.campaigns, scale.organizations, scale.leads)
+
+
+def _has_schema(conn) -> bool:
+    """Whether every table and column of the models exists."""
+    inspector = inspect(conn)
+    for table in models.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            return False
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        if not {column.name for column in table.columns} <= existing:
+            return False
+    return True
+
+
+def seed(engine: Engine, scale: Scale) -> None:
+    """Recreate the schema and fill it at ``scale``."""
+    logger.info("Recreating schema...")
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        _seed_postgresql(engine, scale)
+    else:
+        _seed_generated(engine, scale)
+
+
+def _seed_postgresql(engine: Engine, scale: Scale) -> None:
+    params = {
+        "campaigns": scale.campaigns,
+        "organizations": scale.organizations,
+        "import_runs": IMPORT_RUNS,
+    }
+    with engine.begin() as conn:
+        # The KPI rollup is rebuilt once at the end instead of per statement.
+        conn.execute(text("ALTER TABLE leads DISABLE TRIGGER USER"))
+        conn.execute(
+            text(
+                """
+                INSERT INTO campaigns (campaign_id, name, status)
+                SELECT md5('campaign' || g)::uuid, 'Campaign ' || g, 'active'
+                FROM generate_series(0, :campaigns - 1) AS g
+                """
+            ),
+            params,
+        )
+        logger.info("Seeding %d organizations...", scale.organizations)
+        conn.execute(
+            text(
+                """
+                INSERT INTO organizations (
+                    organization_id, name, email_domain, website_url,
+                    estimated_num_employees, country, time_zone
+                )
+                SELECT md5('org' || g)::uuid, 'Organization ' || g, 'org' || g || '.example',
+                       'https://org' || g || '.example', 10 + g % 500,
+                       (ARRAY['CH', 'DE', 'US', 'JP'])[g % 4 + 1],
+                       (ARRAY['Europe/Zurich', 'Europe/Berlin', 'America/New_York', 'Asia/Tokyo'])[g % 4 + 1]
+                FROM generate_series(0, :organizations - 1) AS g
+                """
+            ),
+            params,
+        )
+        for start in range(0, scale.leads, SEED_CHUNK_SIZE):
+            end = min(start + SEED_CHUNK_SIZE, scale.leads)
+            logger.info("Seeding leads %d-%d of %d...", start, end, scale.leads)
+            conn.execute(
+                text(
+                    f"""
+                    INSERT INTO leads (
+                        campaign_id, company_id, email, email_normalized,
+                        first_name, last_name, title, status,
+                        email_verification_status, import_run,
+                        email_sent_at, last_contacted_at, reply_received_at, created_at
+                    )
+                    SELECT md5('campaign' || g % :campaigns)::uuid,
+                           md5('org' || g % :organizations)::uuid,
+                           'lead' || g || '@org' || g % :organizations || '.example',
+                           'lead' || g || '@org' || g % :organizations || '.example',
+                           'First' || g, 'Last' || g, 'Head of Operations',
+                           {STATUS_SQL},
+                           CASE WHEN g % 5 = 0 THEN 'invalid' ELSE 'valid' END,
+                           'seed-' || g % :import_runs,
+                           CASE WHEN g % 100 >= 60 THEN now() - (g % 90 || ' days')::interval END,
+                           CASE WHEN g % 100 >= 60 THEN now() - (g % 90 || ' days')::interval END,
+                           CASE WHEN g % 100 BETWEEN 90 AND 96 THEN now() END,
+                           now() - (g || ' seconds')::interval
+                    FROM generate_series(:start, :end - 1) AS g
+                    """
+                ),
+                {**params, "start": start, "end": end},
+            )
+        conn.execute(text("ALTER TABLE leads ENABLE TRIGGER USER"))
+
+    with engine.begin() as conn:
+        from sqlalchemy.orm import Session
+
+        kpi.rebuild_campaign_kpis(Session(bind=conn))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE"))
+
+
+def _seed_generated(engine: Engine, scale: Scale) -> None:
+    """Seed through a Python generator and executemany (SQLite stand-in)."""
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Campaign),
+            [
+                {"campaign_id": seeded_id("campaign", g), "name": f"Campaign {g}", "status": "active"}
+                for g in range(scale.campaigns)
+            ],
+        )
+        for start in range(0, scale.organizations, SQLITE_CHUNK_SIZE):
+            conn.execute(
+                insert(Organization),
+                [
+                    {
+                        "organization_id": seeded_id("org", g),
+                        "name": f"Organization {g}",
+                        "email_domain": seeded_domain(g),
+                        "estimated_num_employees": 10 + g % 500,
+                    }
+                    for g in range(start, min(start + SQLITE_CHUNK_SIZE, scale.organizations))
+                ],
+            )
+        logger.info("Seeding %d leads...", scale.leads)
+        for start in range(0, scale.leads, SQLITE_CHUNK_SIZE):
+            conn.execute(
+                insert(Lead),
+                [
+                    _generated_lead(g, scale, now)
+                    for g in range(start, min(start + SQLITE_CHUNK_SIZE, scale.leads))
+                ],
+            )
+
+
+def _generated_lead(g: int, scale: Scale, now: datetime) -> dict:
+    email = f"lead{g}@{seeded_domain(g % scale.organizations)}"
+    contacted = now - timedelta(days=g % 90) if g % 100 >= 60 else None
+    return {
+        "lead_id": seeded_id("lead", g),
+        "campaign_id": seeded_id("campaign", g % scale.campaigns),
+        "company_id": seeded_id("org", g % scale.organizations),
+        "email": email,
+        "email_normalized": email,
+        "first_name": f"First{g}",
+        "last_name": f"Last{g}",
+        "title": "Head of Operations",
+        "status": seed_status(g),
+        "email_verification_status": "invalid" if g % 5 == 0 else "valid",
+        "import_run": f"seed-{g % IMPORT_RUNS}",
+        "email_sent_at": contacted,
+        "last_contacted_at": contacted,
+        "reply_received_at": now if 90 <= g % 100 <= 96 else None,
+        "created_at": now - timedelta(seconds=g),
+    }
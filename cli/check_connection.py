@@ -1,8 +1,8 @@
-from outreach.database import engine
+from outreach.database import get_engine
 
 def check_connection():
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             print('✅ Connection successful!')
     except Exception as e:
         print(f'❌ Connection failed: {e}')
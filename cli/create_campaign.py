@@ -11,8 +11,9 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-from outreach.database import SessionLocal
+from outreach.database import SessionLocal, get_engine, get_query_metrics
 from outreach.crud import create_campaign
+from outreach.instrumentation import instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,10 +31,20 @@ def create_new_campaign(name: str, description: str) -> str:
     Returns:
         str: The campaign ID
     """
+    # The engine's own metrics when OUTREACH_DB_INSTRUMENT is set; otherwise
+    # instrument it just for this command.
+    metrics = get_query_metrics()
+    if metrics is None:
+        metrics = instrument(get_engine()).sink
     try:
         db = SessionLocal()
         campaign = create_campaign(db, name=name, description=description)
-        logger.info(f"Created campaign: {campaign.name}")
+        stats = metrics.summary("create_campaign")
+        logger.info(
+            f"Created campaign: {campaign.name} in {stats['seconds'] * 1000:.1f} ms "
+            f"({stats['statements']} statements, "
+            f"{stats['statement_seconds'] * 1000:.1f} ms in the database)"
+        )
         return str(campaign.campaign_id)
     except Exception as e:
         logger.error(f"Error creating campaign: {e}")
@@ -0,0 +1,170 @@
+"""
+CLI script to import leads into a campaign from a CSV or JSONL file.
+
+The file is streamed in batches, so it can be of any size. Progress is
+checkpointed next to the file (FILE.checkpoint.json); run the same command
+again to resume an interrupted import. With --workers N the file is split
+into N byte ranges imported by separate processes; CSV files then must not
+contain quoted line breaks.
+
+Usage: python cli/import_leads.py CAMPAIGN_ID FILE [--map SOURCE=TARGET ...]
+    [--format csv|jsonl] [--import-run NAME] [--status pending]
+    [--batch-size 5000] [--workers 1] [--skip-existing]
+    [--contacted-within-days N] [--bloom] [--restart]
+
+Mapping targets are Lead columns (``email``, ``first_name``...) or
+``organization.<column>`` (``organization.name``...).
+"""
+
+import argparse
+import logging
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from outreach.config import get_database_url
+from outreach.database import SessionLocal
+from outreach.dedup import DuplicateChecker, warm_email_filter
+from outreach.importer import (
+    ESTIMATED_ROW_BYTES,
+    ImportStats,
+    LeadImporter,
+    import_in_parallel,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_mapping(pairs: list[str]) -> dict[str, str]:
+    """
+    Parse ``SOURCE=TARGET`` mapping arguments.
+
+    Args:
+        pairs: Mapping arguments as given on the command line
+
+    Returns:
+        dict: Target field for each source column
+    """
+    mapping = {}
+    for pair in pairs:
+        source, sep, target = pair.partition("=")
+        if not sep or not source or not target:
+            raise ValueError(f"Expected SOURCE=TARGET, got {pair!r}")
+        mapping[source] = target
+    return mapping
+
+
+def log_progress(stats: ImportStats) -> None:
+    logger.info(
+        f"{stats.rows} rows: {stats.inserted} inserted, {stats.duplicates} duplicates, "
+        f"{stats.invalid} invalid ({stats.rows_per_second:.0f} rows/s)"
+    )
+
+
+def import_leads(args: argparse.Namespace) -> ImportStats:
+    """
+    Run an import as described by the command line arguments.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        ImportStats: Totals for the import
+    """
+    importer = LeadImporter(
+        args.file,
+        args.campaign_id,
+        mapping=parse_mapping(args.map),
+        format=args.format,
+        import_run=args.import_run,
+        status=args.status,
+        batch_size=args.batch_size,
+    )
+    dedup = args.skip_existing or args.contacted_within_days is not None
+    within = (
+        None
+        if args.contacted_within_days is None
+        else timedelta(days=args.contacted_within_days)
+    )
+    if args.workers > 1:
+        return import_in_parallel(
+            importer,
+            get_database_url(),
+            args.workers,
+            dedup=dedup,
+            contacted_within=within,
+            bloom=args.bloom,
+            restart=args.restart,
+            progress=log_progress,
+        )
+
+    db = SessionLocal()
+    try:
+        checker = None
+        if dedup:
+            bloom = None
+            if args.bloom:
+                logger.info("Warming the email filter...")
+                bloom = warm_email_filter(db, within, headroom=_estimate_rows(args.file))
+            checker = DuplicateChecker(db, contacted_within=within, bloom=bloom)
+        return importer.run(db, checker=checker, restart=args.restart, progress=log_progress)
+    finally:
+        db.close()
+
+
+def _estimate_rows(path: str) -> int:
+    """Rough row count from the file size, for sizing the email filter."""
+    return max(1, Path(path).stat().st_size // ESTIMATED_ROW_BYTES)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("campaign_id")
+    parser.add_argument("file")
+    parser.add_argument("--map", action="append", default=[], metavar="SOURCE=TARGET")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--import-run", help="defaults to FILE's name and the start time")
+    parser.add_argument("--status", default="pending")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="skip leads whose address is already in any campaign",
+    )
+    parser.add_argument(
+        "--contacted-within-days",
+        type=int,
+        help="skip leads whose address was contacted in the last N days",
+    )
+    parser.add_argument(
+        "--bloom",
+        action="store_true",
+        help="warm an in-memory filter first so new addresses skip the lookup",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore an existing checkpoint"
+    )
+    args = parser.parse_args()
+
+    try:
+        stats = import_leads(args)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Imported {stats.inserted} of {stats.rows} rows")
+    print(
+        f"Skipped: {stats.skipped} already imported, {stats.duplicates} duplicates, "
+        f"{stats.invalid} invalid"
+    )
+    print(f"Throughput: {stats.rows_per_second:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
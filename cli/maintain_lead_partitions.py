@@ -0,0 +1,79 @@
+"""
+CLI script to create upcoming monthly partitions of leads and drop expired ones.
+
+Run it daily from cron. Without --retain-months nothing is dropped.
+
+Usage: python cli/maintain_lead_partitions.py [--months-ahead N]
+    [--retain-months N] [--keep-detached]
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from outreach.database import SessionLocal
+from outreach.partitions import (
+    PARTITION_MONTHS_AHEAD,
+    drop_expired_lead_partitions,
+    ensure_lead_partitions,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def maintain_partitions(args: argparse.Namespace) -> tuple[list[str], list[str]]:
+    """
+    Create and expire lead partitions as described by the command line arguments.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        tuple: Names of the partitions created and of those detached
+    """
+    db = SessionLocal()
+    try:
+        created = ensure_lead_partitions(db, months_ahead=args.months_ahead)
+        expired = []
+        if args.retain_months is not None:
+            expired = drop_expired_lead_partitions(
+                db, args.retain_months, drop=not args.keep_detached
+            )
+        return created, expired
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    parser.add_argument(
+        "--retain-months",
+        type=int,
+        help="drop partitions older than this many months before the current one",
+    )
+    parser.add_argument(
+        "--keep-detached",
+        action="store_true",
+        help="detach expired partitions but keep them as tables",
+    )
+    args = parser.parse_args()
+
+    try:
+        created, expired = maintain_partitions(args)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Created partitions: {', '.join(created) or 'none'}")
+    print(f"Expired partitions: {', '.join(expired) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,12 @@
 """
 Outreach package for CustomerCenter application.
 """
+
+
+def __getattr__(name: str):
+    # Imported on demand so that ``import outreach`` stays cheap.
+    if name == "uow":
+        from .unit_of_work import uow
+
+        return uow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
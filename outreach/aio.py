@@ -0,0 +1,281 @@
+"""
+Async data access for the outreach package: AsyncSession on asyncpg.
+
+Every function mirrors its counterpart in outreach.crud and takes an
+AsyncSession instead of a Session. Most run the crud implementation through
+``AsyncSession.run_sync``, so both APIs share one code path; I/O goes
+through asyncpg and never blocks the event loop. Bulk lead imports use
+asyncpg's native binary COPY.
+
+Lazy loading is not available on async sessions: deferred columns such as
+``Organization.website_raw_data`` must be requested up front with
+``crud.LOAD_ENRICHMENT``, and relationships through the ``load`` presets
+(``crud.LOAD_ORGANIZATION`` and friends).
+
+Requires the optional ``asyncpg`` dependency (``pip install customercenter[async]``).
+"""
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, Mapping, Sequence
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+
+from outreach import archive, crud
+from outreach.config import get_database_url
+from outreach.engine import engine_options, statement_timeout_setting
+from outreach.models import Campaign, Lead, Organization
+from outreach.unit_of_work import UNIT_OF_WORK
+
+_ASYNC_DRIVERS = {"postgresql": "asyncpg"}
+
+_async_engine: AsyncEngine | None = None
+_async_engine_lock = threading.Lock()
+
+
+def async_url(url) -> str:
+    """Rewrite a database URL to use the backend's async driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"outreach.aio supports PostgreSQL only, not {backend}")
+    return url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def create_outreach_async_engine(
+    url, statement_timeout_ms: int | None = None, **overrides
+) -> AsyncEngine:
+    """Async counterpart of outreach.engine.create_outreach_engine."""
+    options = engine_options(url, statement_timeout_ms)
+    # The async engine brings its own adapted queue pool, and asyncpg takes
+    # session settings directly instead of a libpq options string.
+    options.pop("poolclass", None)
+    options.pop("executemany_mode", None)
+    options.pop("connect_args", None)
+    timeout = statement_timeout_setting(statement_timeout_ms)
+    if timeout and make_url(url).get_backend_name() == "postgresql":
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout)}}
+    options.update(overrides)
+    return create_async_engine(async_url(url), **options)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the process-wide async engine, creating it on first use."""
+    global _async_engine
+    if _async_engine is None:
+        with _async_engine_lock:
+            if _async_engine is None:
+                _async_engine = create_outreach_async_engine(get_database_url())
+    return _async_engine
+
+
+class _LazyBindSession(Session):
+    """Sync session behind AsyncSessionLocal; binds to the async engine lazily."""
+
+    def get_bind(self, *args, **kwargs):
+        if self.bind is None:
+            self.bind = get_async_engine().sync_engine
+        return super().get_bind(*args, **kwargs)
+
+
+# Expiring on commit would make the next attribute access lazy load, which
+# async sessions cannot do.
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=_LazyBindSession, autoflush=False, expire_on_commit=False
+)
+
+
+@asynccontextmanager
+async def uow(session_factory=None) -> AsyncIterator[AsyncSession]:
+    """Async counterpart of outreach.uow(): one transaction for the block."""
+    session = (session_factory or AsyncSessionLocal)()
+    session.info[UNIT_OF_WORK] = True
+    try:
+        yield session
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def create_campaign(
+    session: AsyncSession, name: str, description: str, status: str = "draft"
+) -> Campaign:
+    """Create a new Campaign and persist it."""
+    return await session.run_sync(crud.create_campaign, name, description, status)
+
+
+async def get_campaign_by_id(
+    session: AsyncSession, campaign_id, load: Sequence = ()
+) -> Campaign | None:
+    """Retrieve a Campaign by its primary key."""
+    return await session.get(Campaign, campaign_id, options=load)
+
+
+async def delete_campaign(
+    session: AsyncSession, campaign_id, batch_size: int = crud.LEAD_DELETE_BATCH_SIZE
+) -> int:
+    """Delete a campaign with its leads in batches; see crud.delete_campaign."""
+    return await session.run_sync(crud.delete_campaign, campaign_id, batch_size)
+
+
+async def create_organization(session: AsyncSession, **fields) -> Organization:
+    """Create a new Organization using provided fields."""
+    return await session.run_sync(crud.create_organization, **fields)
+
+
+async def get_organization_by_domain(
+    session: AsyncSession, domain: str, enrichment: bool = False, load: Sequence = ()
+) -> Organization | None:
+    """Fetch an Organization by its email domain."""
+    return await session.run_sync(
+        crud.get_organization_by_domain, domain, enrichment, load
+    )
+
+
+async def upsert_organizations(
+    session: AsyncSession,
+    rows: Iterable[Mapping[str, Any]],
+    batch_size: int = crud.ORGANIZATION_UPSERT_BATCH_SIZE,
+) -> dict[str, uuid.UUID]:
+    """Insert or update organizations keyed on email_domain."""
+    return await session.run_sync(crud.upsert_organizations, rows, batch_size)
+
+
+async def resolve_organization_ids(
+    session: AsyncSession, rows: Iterable[Mapping[str, Any]]
+) -> dict[str, uuid.UUID]:
+    """Map email domains to organization ids, upserting only cache misses."""
+    return await session.run_sync(crud.resolve_organization_ids, rows)
+
+
+async def create_lead(session: AsyncSession, **fields) -> Lead:
+    """Create a new Lead. Foreign keys must already exist."""
+    return await session.run_sync(crud.create_lead, **fields)
+
+
+async def bulk_import_leads(
+    session: AsyncSession,
+    rows: Iterable[Mapping[str, Any]],
+    batch_size: int = crud.LEAD_IMPORT_BATCH_SIZE,
+) -> crud.BulkImportResult:
+    """Insert many leads at once; see crud.bulk_import_leads."""
+    return await session.run_sync(crud.bulk_import_leads, rows, batch_size)
+
+
+async def get_leads_by_status(
+    session: AsyncSession, status: str, load: Sequence = ()
+) -> list[Lead]:
+    """Return all leads matching a status."""
+    return await session.run_sync(crud.get_leads_by_status, status, load)
+
+
+async def iter_leads_by_status(
+    session: AsyncSession,
+    status: str,
+    campaign_id=None,
+    chunk_size: int = crud.LEAD_STREAM_CHUNK_SIZE,
+    columns: Sequence[str] | None = None,
+    load: Sequence = (),
+) -> AsyncIterator[Lead]:
+    """Yield leads matching a status, ``chunk_size`` rows at a time.
+
+    Same keyset pagination as crud.iter_leads_by_status.
+    """
+    query = crud._leads_by_status_query(status, campaign_id, chunk_size, columns, load)
+    page = query
+    while True:
+        leads = (await session.scalars(page)).all()
+        for lead in leads:
+            yield lead
+        if len(leads) < chunk_size:
+            return
+        page = crud._next_lead_page(query, leads[-1])
+
+
+async def update_lead_status(
+    session: AsyncSession, lead_id, new_status: str
+) -> Lead | None:
+    """Update the status for a Lead."""
+    return await session.run_sync(crud.update_lead_status, lead_id, new_status)
+
+
+async def bulk_update_lead_status(
+    session: AsyncSession,
+    lead_ids: Iterable,
+    new_status: str,
+    timestamps: Iterable[str] = (),
+    from_statuses: Iterable[str] | None = None,
+    chunk_size: int = crud.LEAD_UPDATE_CHUNK_SIZE,
+) -> list[uuid.UUID]:
+    """Set the status of many leads; see crud.bulk_update_lead_status."""
+    return await session.run_sync(
+        crud.bulk_update_lead_status,
+        lead_ids,
+        new_status,
+        timestamps,
+        from_statuses,
+        chunk_size,
+    )
+
+
+async def claim_leads_for_sending(
+    session: AsyncSession,
+    campaign_id,
+    limit: int,
+    worker_id: str,
+    lease_seconds: int = crud.SEND_LEASE_SECONDS,
+    load: Sequence = (),
+) -> list[Lead]:
+    """Claim pending leads for one sending worker; see crud.claim_leads_for_sending."""
+    return await session.run_sync(
+        crud.claim_leads_for_sending, campaign_id, limit, worker_id, lease_seconds, load
+    )
+
+
+async def finish_claimed_leads(
+    session: AsyncSession,
+    lead_ids: Iterable,
+    worker_id: str,
+    new_status: str = "emailed",
+    timestamps: Iterable[str] = ("email_sent_at", "last_contacted_at"),
+) -> list[uuid.UUID]:
+    """Move leads claimed by ``worker_id`` out of the sending status."""
+    return await session.run_sync(
+        crud.finish_claimed_leads, lead_ids, worker_id, new_status, timestamps
+    )
+
+
+async def release_expired_leases(
+    session: AsyncSession, campaign_id=None
+) -> list[uuid.UUID]:
+    """Return leads whose sending lease has expired to the pending queue."""
+    return await session.run_sync(crud.release_expired_leases, campaign_id)
+
+
+async def archive_campaign(
+    session: AsyncSession, campaign_id, batch_size: int = archive.ARCHIVE_BATCH_SIZE
+) -> int:
+    """Move a campaign's leads to archived_leads; see archive.archive_campaign."""
+    return await session.run_sync(archive.archive_campaign, campaign_id, batch_size)
+
+
+async def archive_campaigns(
+    session: AsyncSession,
+    created_before: datetime,
+    batch_size: int = archive.ARCHIVE_BATCH_SIZE,
+) -> dict[uuid.UUID, int]:
+    """Archive every campaign created before ``created_before``."""
+    return await session.run_sync(archive.archive_campaigns, created_before, batch_size)
@@ -0,0 +1,127 @@
+"""
+Campaign archival: moving finished campaigns' leads out of ``leads``.
+
+archive_campaign() moves a campaign's leads into ``archived_leads``
+ARCHIVE_BATCH_SIZE at a time, then marks the campaign ARCHIVED_STATUS. On
+PostgreSQL each batch is a single ``DELETE ... RETURNING`` feeding an
+``INSERT``; SQLite copies and deletes the same batch in two statements.
+Every batch commits on its own, so row locks are held for one batch only
+and imports and sends in other campaigns carry on; an interrupted run is
+resumed by calling it again.
+
+The KPI triggers run on ``archived_leads`` too, so an archived campaign
+keeps its counters, and kpi.compute_campaign_kpis() counts archived leads.
+crud.delete_campaign() removes archived leads along with the campaign.
+"""
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.orm import Session
+
+from .crud import _save
+from .instrumentation import tracked
+from .models import ArchivedLead, Campaign, Lead
+
+ARCHIVE_BATCH_SIZE = 5000
+ARCHIVED_STATUS = "archived"
+
+_LEAD_COLUMNS = [column.name for column in Lead.__table__.columns]
+_COLUMN_LIST = ", ".join(_LEAD_COLUMNS)
+
+# The batch is materialized so it is picked once; see
+# crud.claim_leads_for_sending.
+_MOVE_BATCH = text(
+    f"""
+    WITH batch AS MATERIALIZED (
+        SELECT lead_id FROM leads
+        WHERE campaign_id = :campaign_id
+        LIMIT :batch_size
+        FOR UPDATE
+    ), moved AS (
+        DELETE FROM leads USING batch
+        WHERE leads.lead_id = batch.lead_id
+        RETURNING {", ".join(f"leads.{name}" for name in _LEAD_COLUMNS)}
+    )
+    INSERT INTO archived_leads ({_COLUMN_LIST})
+    SELECT {_COLUMN_LIST} FROM moved
+    """
+)
+
+
+@tracked
+def archive_campaign(
+    session: Session, campaign_id, batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """Move a campaign's leads to ``archived_leads``; returns how many moved.
+
+    Leads being sent are moved as well, so archive campaigns that are done
+    sending. Inside ``uow()`` the whole move is one transaction.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    postgres = session.get_bind().dialect.name == "postgresql"
+    moved = 0
+    while True:
+        if postgres:
+            count = session.execute(
+                _MOVE_BATCH, {"campaign_id": campaign_id, "batch_size": batch_size}
+            ).rowcount
+        else:
+            count = _move_batch(session, campaign_id, batch_size)
+        moved += count
+        _save(session)
+        if count < batch_size:
+            break
+    session.execute(
+        update(Campaign)
+        .where(Campaign.campaign_id == campaign_id)
+        .values(status=ARCHIVED_STATUS)
+    )
+    _save(session)
+    return moved
+
+
+@tracked
+def archive_campaigns(
+    session: Session, created_before: datetime, batch_size: int = ARCHIVE_BATCH_SIZE
+) -> dict[uuid.UUID, int]:
+    """Archive every campaign created before ``created_before``.
+
+    Campaigns already archived are skipped. Returns the leads moved per
+    campaign.
+    """
+    campaign_ids = session.scalars(
+        select(Campaign.campaign_id)
+        .where(
+            Campaign.created_at < created_before,
+            Campaign.status != ARCHIVED_STATUS,
+        )
+        .order_by(Campaign.created_at)
+    ).all()
+    return {
+        campaign_id: archive_campaign(session, campaign_id, batch_size)
+        for campaign_id in campaign_ids
+    }
+
+
+def _move_batch(session: Session, campaign_id, batch_size: int) -> int:
+    """Copy one batch to the archive and delete it, in the same transaction."""
+    batch = (
+        select(Lead.lead_id)
+        .where(Lead.campaign_id == campaign_id)
+        .order_by(Lead.lead_id)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    session.execute(
+        insert(ArchivedLead).from_select(
+            _LEAD_COLUMNS,
+            select(*(Lead.__table__.c[name] for name in _LEAD_COLUMNS)).where(
+                Lead.lead_id.in_(batch)
+            ),
+        )
+    )
+    return session.execute(
+        Lead.__table__.delete().where(Lead.lead_id.in_(batch))
+    ).rowcount
@@ -1,9 +1,31 @@
+"""
+Settings for the outreach package, resolved lazily on first use.
+
+Nothing happens at import time: ``.env`` is only read, and DATABASE_URL only
+checked, when a setting is first needed.
+"""
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _load_env() -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def get_database_url() -> str:
+    """Return DATABASE_URL from the environment or a ``.env`` file."""
+    _load_env()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in environment")
+    return database_url
 
-load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-print(DATABASE_URL)
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL not set in environment")
+def __getattr__(name: str):
+    # Keeps ``from outreach.config import DATABASE_URL`` working.
+    if name == "DATABASE_URL":
+        return get_database_url()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
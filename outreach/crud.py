@@ -1,56 +1,791 @@
-from sqlalchemy.orm import Session
+import io
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Iterable, Iterator, Mapping, Sequence
 
-from .models import Campaign, Organization, Lead
+from sqlalchemy import any_, delete, event, func, literal, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import (
+    Session,
+    joinedload,
+    load_only,
+    raiseload,
+    selectinload,
+    undefer_group,
+)
+from sqlalchemy.util import await_only
 
+from .instrumentation import tracked
+from .models import (
+    ENRICHMENT_GROUP,
+    ArchivedLead,
+    Campaign,
+    Lead,
+    Organization,
+    normalize_email,
+)
+from .unit_of_work import in_unit_of_work
 
+LEAD_IMPORT_BATCH_SIZE = 5000
+ORGANIZATION_UPSERT_BATCH_SIZE = 1000
+ORGANIZATION_CACHE_SIZE = 100_000
+LEAD_STREAM_CHUNK_SIZE = 1000
+LEAD_UPDATE_CHUNK_SIZE = 5000
+LEAD_DELETE_BATCH_SIZE = 5000
+SEND_LEASE_SECONDS = 300
+
+# Send queue statuses: claim_leads_for_sending moves leads from PENDING to
+# SENDING; finish_claimed_leads or release_expired_leases moves them on.
+PENDING_STATUS = "pending"
+SENDING_STATUS = "sending"
+
+# Lead columns that bulk_update_lead_status may stamp with the database clock.
+LEAD_TIMESTAMP_COLUMNS = ("email_sent_at", "last_contacted_at", "reply_received_at")
+
+# Loader option for enrichment jobs that need the deferred blob columns.
+LOAD_ENRICHMENT = undefer_group(ENRICHMENT_GROUP)
+
+# Relationship loader presets for the ``load`` argument of the query
+# functions. Touching a relationship that was not loaded costs one query per
+# object, so code that renders leads with their company asks for it up front.
+# selectinload fetches the related rows with one ``IN`` query per batch and
+# also works for UPDATE ... RETURNING (claims); joinedload adds the join to
+# the SELECT itself.
+LOAD_ORGANIZATION = selectinload(Lead.organization)
+LOAD_CAMPAIGN = selectinload(Lead.campaign)
+JOIN_ORGANIZATION = joinedload(Lead.organization, innerjoin=True)
+JOIN_CAMPAIGN = joinedload(Lead.campaign, innerjoin=True)
+LOAD_CAMPAIGN_LEADS = selectinload(Campaign.leads)
+LOAD_ORGANIZATION_LEADS = selectinload(Organization.leads)
+# Any relationship not loaded by another option raises on access.
+RAISE_ON_LAZY_LOAD = raiseload("*")
+
+# Session.info flag for strict loading: every ORM query of the session gets
+# raiseload("*", sql_only=True), the per-query equivalent of lazy="raise"
+# on every relationship. Lazy loads that would emit SQL raise instead, so N+1
+# patterns fail loudly; options on the query still load what they name.
+STRICT_LOADING = "outreach.strict_loading"
+_STRICT_LOADER = raiseload("*", sql_only=True)
+
+# Server-managed timestamps are left to the column defaults.
+_LEAD_IMPORT_COLUMNS = tuple(
+    column.name
+    for column in Lead.__table__.columns
+    if column.name not in ("created_at", "updated_at")
+)
+
+
+@dataclass
+class BulkImportResult:
+    """Outcome of a bulk lead import."""
+
+    inserted: int = 0
+    skipped: int = 0
+    lead_ids: list[uuid.UUID] = field(default_factory=list)
+
+
+class OrganizationIdCache:
+    """Process-local LRU cache mapping email domains to organization ids."""
+
+    def __init__(self, maxsize: int = ORGANIZATION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._ids: OrderedDict[str, uuid.UUID] = OrderedDict()
+
+    def get(self, domain: str) -> uuid.UUID | None:
+        organization_id = self._ids.get(domain)
+        if organization_id is not None:
+            self._ids.move_to_end(domain)
+        return organization_id
+
+    def update(self, ids: Mapping[str, uuid.UUID]) -> None:
+        for domain, organization_id in ids.items():
+            self._ids[domain] = organization_id
+            self._ids.move_to_end(domain)
+        while len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+    def clear(self) -> None:
+        self._ids.clear()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+# Consulted by the lead import path before hitting the database.
+organization_ids = OrganizationIdCache()
+
+# Session.info key for ids resolved in a transaction that has not committed yet.
+_PENDING_ORGANIZATION_IDS = "outreach.pending_organization_ids"
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_organization_ids(session: Session) -> None:
+    pending = session.info.pop(_PENDING_ORGANIZATION_IDS, None)
+    if pending:
+        organization_ids.update(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_organization_ids(session: Session) -> None:
+    session.info.pop(_PENDING_ORGANIZATION_IDS, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _apply_strict_loading(execute_state) -> None:
+    if execute_state.session.info.get(STRICT_LOADING) and not execute_state.is_column_load:
+        execute_state.statement = execute_state.statement.options(_STRICT_LOADER)
+
+
+@tracked
 def create_campaign(session: Session, name: str, description: str, status: str = "draft") -> Campaign:
     """Create a new Campaign and persist it."""
     campaign = Campaign(name=name, description=description, status=status)
     session.add(campaign)
-    session.commit()
-    session.refresh(campaign)
+    _save(session, campaign)
     return campaign
 
 
-def get_campaign_by_id(session: Session, campaign_id):
-    """Retrieve a Campaign by its primary key."""
-    return session.get(Campaign, campaign_id)
+@tracked
+def get_campaign_by_id(session: Session, campaign_id, load: Sequence = ()):
+    """Retrieve a Campaign by its primary key.
 
+    ``load`` takes loader options such as LOAD_CAMPAIGN_LEADS. As with
+    Session.get, a campaign already in the session is returned as it is,
+    without a query, so the options only apply to campaigns loaded here.
+    """
+    return session.get(Campaign, campaign_id, options=load)
 
+
+@tracked
 def create_organization(session: Session, **fields) -> Organization:
     """Create a new Organization using provided fields."""
     organization = Organization(**fields)
     session.add(organization)
-    session.commit()
-    session.refresh(organization)
+    _save(session, organization)
     return organization
 
 
-def get_organization_by_domain(session: Session, domain: str) -> Organization | None:
-    """Fetch an Organization by its email domain."""
-    return session.query(Organization).filter_by(email_domain=domain).first()
+@tracked
+def get_organization_by_domain(
+    session: Session, domain: str, enrichment: bool = False, load: Sequence = ()
+) -> Organization | None:
+    """Fetch an Organization by its email domain.
+
+    Pass ``enrichment=True`` to load the deferred website data in the same
+    query; ``load`` takes further loader options such as
+    LOAD_ORGANIZATION_LEADS.
+    """
+    query = session.query(Organization).filter_by(email_domain=domain).options(*load)
+    if enrichment:
+        query = query.options(LOAD_ENRICHMENT)
+    return query.first()
+
+
+@tracked
+def upsert_organizations(
+    session: Session,
+    rows: Iterable[Mapping[str, Any]],
+    batch_size: int = ORGANIZATION_UPSERT_BATCH_SIZE,
+) -> dict[str, uuid.UUID]:
+    """Insert or update organizations keyed on email_domain.
+
+    Each batch is a single ``INSERT ... ON CONFLICT (email_domain) DO UPDATE
+    ... RETURNING``. Existing values are only overwritten by non-null ones.
+    Returns the organization id for every domain seen.
+    """
+    resolved = {}
+    for batch in _batched(rows, batch_size):
+        resolved.update(_upsert_organization_batch(session, batch))
+    _remember_organization_ids(session, resolved)
+    _save(session)
+    return resolved
+
 
+@tracked
+def resolve_organization_ids(
+    session: Session, rows: Iterable[Mapping[str, Any]]
+) -> dict[str, uuid.UUID]:
+    """Map email domains to organization ids, upserting only cache misses."""
+    resolved = {}
+    misses = _resolve_from_cache(rows, resolved)
+    if misses:
+        resolved.update(upsert_organizations(session, misses))
+    return resolved
 
+
+@tracked
 def create_lead(session: Session, **fields) -> Lead:
     """Create a new Lead. Foreign keys must already exist."""
     lead = Lead(**fields)
     session.add(lead)
-    session.commit()
-    session.refresh(lead)
+    _save(session, lead)
     return lead
 
 
-def get_leads_by_status(session: Session, status: str) -> list[Lead]:
-    """Return all leads matching a status."""
-    return session.query(Lead).filter_by(status=status).all()
+@tracked
+def bulk_import_leads(
+    session: Session,
+    rows: Iterable[Mapping[str, Any]],
+    batch_size: int = LEAD_IMPORT_BATCH_SIZE,
+) -> BulkImportResult:
+    """Insert many leads at once.
+
+    ``rows`` is consumed lazily, ``batch_size`` rows at a time. Each row maps
+    Lead column names to values; a ``lead_id`` is generated when missing.
+    Rows whose ``lead_id`` already exists are skipped, so re-running an
+    import is harmless. On PostgreSQL every batch is streamed with
+    ``COPY FROM STDIN`` into a temporary staging table and merged into
+    ``leads``; the SQLite stand-in uses a multi-row INSERT instead.
+    """
+    postgres = session.get_bind().dialect.name == "postgresql"
+    if postgres:
+        session.execute(
+            text(
+                "CREATE TEMP TABLE leads_import_staging "
+                "(LIKE leads INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+        )
+
+    result = BulkImportResult()
+    resolved = {}
+    for batch in _batched(rows, batch_size):
+        batch = _attach_companies(session, batch, resolved)
+        records = [_lead_record(row) for row in batch]
+        if postgres:
+            lead_ids = _copy_leads(session, records)
+        else:
+            lead_ids = _insert_leads(session, records)
+        result.inserted += len(lead_ids)
+        result.skipped += len(records) - len(lead_ids)
+        result.lead_ids.extend(lead_ids)
+
+    if postgres:
+        session.execute(text("DROP TABLE leads_import_staging"))
+    _remember_organization_ids(session, resolved)
+    _save(session)
+    return result
+
+
+@tracked
+def get_leads_by_status(
+    session: Session, status: str, load: Sequence = ()
+) -> list[Lead]:
+    """Return all leads matching a status.
 
+    ``load`` takes loader options such as LOAD_ORGANIZATION.
+    """
+    return session.query(Lead).filter_by(status=status).options(*load).all()
 
+
+@tracked
+def iter_leads_by_status(
+    session: Session,
+    status: str,
+    campaign_id=None,
+    chunk_size: int = LEAD_STREAM_CHUNK_SIZE,
+    columns: Sequence[str] | None = None,
+    load: Sequence = (),
+) -> Iterator[Lead]:
+    """Yield leads matching a status, ``chunk_size`` rows at a time.
+
+    Leads come in ``(created_at, lead_id)`` order using keyset pagination,
+    so memory stays bounded by one chunk and each chunk is an index range
+    scan rather than an ever-growing OFFSET. A chunk is fully read before
+    any lead is yielded, which leaves the caller free to commit between
+    leads. ``columns`` limits loading to the named Lead attributes (the
+    primary key and ``created_at`` are always loaded); anything else is
+    fetched on first access. ``load`` takes loader options such as
+    JOIN_ORGANIZATION, applied to every chunk.
+    """
+    query = _leads_by_status_query(status, campaign_id, chunk_size, columns, load)
+    page = query
+    while True:
+        leads = session.scalars(page).all()
+        yield from leads
+        if len(leads) < chunk_size:
+            return
+        page = _next_lead_page(query, leads[-1])
+
+
+@tracked
 def update_lead_status(session: Session, lead_id, new_status: str) -> Lead | None:
     """Update the status for a Lead."""
     lead = session.get(Lead, lead_id)
     if not lead:
         return None
     lead.status = new_status
-    session.commit()
-    session.refresh(lead)
+    _save(session, lead)
     return lead
+
+
+@tracked
+def bulk_update_lead_status(
+    session: Session,
+    lead_ids: Iterable,
+    new_status: str,
+    timestamps: Iterable[str] = (),
+    from_statuses: Iterable[str] | None = None,
+    chunk_size: int = LEAD_UPDATE_CHUNK_SIZE,
+) -> list[uuid.UUID]:
+    """Set the status of many leads.
+
+    Issues one ``UPDATE ... RETURNING lead_id`` per ``chunk_size`` ids.
+    ``timestamps`` names columns from LEAD_TIMESTAMP_COLUMNS to set to the
+    current time in the same statement. With ``from_statuses`` only leads
+    currently in one of those statuses change, e.g. ``["pending"]`` for a
+    pending -> emailed transition; the check happens in SQL, so concurrent
+    workers cannot both apply it. Returns the ids that were updated.
+    """
+    values = {"status": new_status}
+    for name in timestamps:
+        if name not in LEAD_TIMESTAMP_COLUMNS:
+            raise ValueError(f"Not a lead timestamp column: {name}")
+        values[name] = func.now()
+
+    statement = update(Lead).values(values).returning(Lead.lead_id)
+    if from_statuses is not None:
+        statement = statement.where(Lead.status.in_(list(from_statuses)))
+
+    updated = []
+    for chunk in _batched(lead_ids, chunk_size):
+        result = session.execute(
+            statement.where(_any_of(session, Lead.lead_id, chunk)),
+            execution_options={"synchronize_session": False},
+        )
+        updated.extend(result.scalars())
+    _save(session)
+    return updated
+
+
+@tracked
+def claim_leads_for_sending(
+    session: Session,
+    campaign_id,
+    limit: int,
+    worker_id: str,
+    lease_seconds: int = SEND_LEASE_SECONDS,
+    load: Sequence = (),
+) -> list[Lead]:
+    """Claim up to ``limit`` pending leads of a campaign for one sending worker.
+
+    A single ``WITH ... (SELECT ... FOR UPDATE SKIP LOCKED) UPDATE ...
+    RETURNING`` moves the oldest pending leads to SENDING_STATUS,
+    stamped with ``worker_id`` and a lease expiring ``lease_seconds`` from
+    now. Rows another worker is claiming at the same moment are skipped
+    rather than waited on, so any number of workers can poll the same
+    campaign without double-sending or queueing behind each other. Returns
+    the claimed leads, detached unless inside ``uow()``; fewer than
+    ``limit`` means nothing more is claimable right now, as other workers
+    may hold the rest. Detached leads cannot lazy load, so pass
+    LOAD_ORGANIZATION or LOAD_CAMPAIGN in ``load`` for what the sender
+    renders. SQLite has no row locks to skip; claims there are only safe
+    from a single worker.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    # Materialized so the candidates are picked once: as a plain IN
+    # subquery the planner may rescan it per row, and every rescan skips
+    # different locked rows, claiming more than ``limit``.
+    candidates = (
+        select(Lead.lead_id)
+        .where(Lead.campaign_id == campaign_id, Lead.status == PENDING_STATUS)
+        .order_by(Lead.created_at, Lead.lead_id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("claim_candidates")
+        .prefix_with("MATERIALIZED")
+    )
+    statement = (
+        update(Lead)
+        .where(Lead.lead_id.in_(select(candidates.c.lead_id)))
+        .values(
+            status=SENDING_STATUS,
+            claimed_by=worker_id,
+            lease_expires_at=_seconds_from_now(session, lease_seconds),
+        )
+        .returning(Lead)
+        .options(*load)
+    )
+    leads = list(
+        session.scalars(
+            statement,
+            execution_options={
+                "synchronize_session": False,
+                "populate_existing": True,
+            },
+        )
+    )
+    _save_claimed(session, leads)
+    return leads
+
+
+@tracked
+def finish_claimed_leads(
+    session: Session,
+    lead_ids: Iterable,
+    worker_id: str,
+    new_status: str = "emailed",
+    timestamps: Iterable[str] = ("email_sent_at", "last_contacted_at"),
+) -> list[uuid.UUID]:
+    """Move leads claimed by ``worker_id`` out of SENDING_STATUS.
+
+    Leads whose lease was reaped, or that another worker has claimed since,
+    are left alone; compare the returned ids with ``lead_ids`` to find them.
+    """
+    values = {"status": new_status, "claimed_by": None, "lease_expires_at": None}
+    for name in timestamps:
+        if name not in LEAD_TIMESTAMP_COLUMNS:
+            raise ValueError(f"Not a lead timestamp column: {name}")
+        values[name] = func.now()
+
+    statement = (
+        update(Lead)
+        .where(Lead.status == SENDING_STATUS, Lead.claimed_by == worker_id)
+        .values(values)
+        .returning(Lead.lead_id)
+    )
+    finished = []
+    for chunk in _batched(lead_ids, LEAD_UPDATE_CHUNK_SIZE):
+        result = session.execute(
+            statement.where(_any_of(session, Lead.lead_id, chunk)),
+            execution_options={"synchronize_session": False},
+        )
+        finished.extend(result.scalars())
+    _save(session)
+    return finished
+
+
+@tracked
+def release_expired_leases(session: Session, campaign_id=None) -> list[uuid.UUID]:
+    """Return leads whose sending lease has expired to the pending queue.
+
+    Run periodically so leads claimed by a crashed worker are sent by
+    someone else. Returns the released ids.
+    """
+    statement = (
+        update(Lead)
+        .where(Lead.status == SENDING_STATUS, Lead.lease_expires_at < func.now())
+        .values(status=PENDING_STATUS, claimed_by=None, lease_expires_at=None)
+        .returning(Lead.lead_id)
+    )
+    if campaign_id is not None:
+        statement = statement.where(Lead.campaign_id == campaign_id)
+    released = list(
+        session.execute(
+            statement, execution_options={"synchronize_session": False}
+        ).scalars()
+    )
+    _save(session)
+    return released
+
+
+@tracked
+def delete_campaign(
+    session: Session, campaign_id, batch_size: int = LEAD_DELETE_BATCH_SIZE
+) -> int:
+    """Delete a campaign with its leads and archived leads.
+
+    Leads are deleted ``batch_size`` at a time with set-based DELETEs that
+    never load them, each batch committed on its own, so locks are held for
+    one batch and a huge campaign does not build one huge transaction; a
+    rerun after a failure picks up the remaining leads. The campaign row
+    goes last and takes its KPI row along through ON DELETE CASCADE. Inside
+    ``uow()`` everything is one transaction. Returns the number of leads
+    deleted; 0 and nothing else happens for an unknown campaign.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    deleted = 0
+    for model in (Lead, ArchivedLead):
+        while True:
+            batch = (
+                select(model.lead_id)
+                .where(model.campaign_id == campaign_id)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = session.execute(
+                delete(model).where(model.lead_id.in_(batch)),
+                execution_options={"synchronize_session": False},
+            )
+            deleted += result.rowcount
+            _save(session)
+            if result.rowcount < batch_size:
+                break
+    session.execute(delete(Campaign).where(Campaign.campaign_id == campaign_id))
+    _save(session)
+    return deleted
+
+
+def _save(session: Session, instance=None) -> None:
+    """Commit the work done by a crud function.
+
+    Inside a ``uow()`` block this only flushes and the block commits.
+    Otherwise the session commits and ``instance`` is refreshed, as crud
+    functions have always done.
+    """
+    if in_unit_of_work(session):
+        session.flush()
+        return
+    session.commit()
+    if instance is not None:
+        session.refresh(instance)
+
+
+def _save_claimed(session: Session, leads: list[Lead]) -> None:
+    """_save() for claimed leads, which are returned detached outside a uow.
+
+    The commit would expire them and cost one reload per lead on first
+    access; detached, they keep the values the claim returned.
+    """
+    if not in_unit_of_work(session):
+        for lead in leads:
+            session.expunge(lead)
+    _save(session)
+
+
+def _remember_organization_ids(
+    session: Session, resolved: Mapping[str, uuid.UUID]
+) -> None:
+    """Queue ids for the shared cache; they are only cached once committed."""
+    session.info.setdefault(_PENDING_ORGANIZATION_IDS, {}).update(resolved)
+
+
+def _leads_by_status_query(
+    status: str, campaign_id, chunk_size: int, columns, load: Sequence = ()
+):
+    """First-page query for iter_leads_by_status."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    query = select(Lead).where(Lead.status == status)
+    if campaign_id is not None:
+        query = query.where(Lead.campaign_id == campaign_id)
+    if columns is not None:
+        names = {"lead_id", "created_at", *columns}
+        query = query.options(load_only(*(getattr(Lead, name) for name in names)))
+    return query.options(*load).order_by(Lead.created_at, Lead.lead_id).limit(chunk_size)
+
+
+def _next_lead_page(query, last: Lead):
+    """Keyset continuation of ``query`` after the ``last`` lead seen."""
+    return query.where(
+        tuple_(Lead.created_at, Lead.lead_id) > tuple_(last.created_at, last.lead_id)
+    )
+
+
+def _batched(rows: Iterable, size: int) -> Iterator[list]:
+    """Yield successive lists of at most ``size`` items from ``rows``."""
+    if size < 1:
+        raise ValueError("batch_size must be at least 1")
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _upsert_statement(session: Session, model):
+    """Return a dialect INSERT construct supporting ON CONFLICT clauses."""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def _seconds_from_now(session: Session, seconds: int):
+    """SQL timestamp ``seconds`` after the database's now().
+
+    SQLite cannot add an interval to CURRENT_TIMESTAMP, so it gets its
+    datetime() modifier instead, in the same UTC text form.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        return func.datetime("now", f"{seconds:+d} seconds")
+    return func.now() + timedelta(seconds=seconds)
+
+
+def _any_of(session: Session, column, values: list):
+    """Membership test for ``column`` against many values.
+
+    PostgreSQL gets ``= ANY(:array)``, a single parameter whatever the
+    number of values; other dialects get a plain ``IN`` list.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return column == any_(literal(values, postgresql.ARRAY(column.type)))
+    return column.in_(values)
+
+
+def _resolve_from_cache(
+    rows: Iterable[Mapping[str, Any]], resolved: dict[str, uuid.UUID]
+) -> list[Mapping[str, Any]]:
+    """Fill ``resolved`` from the cache and return the rows that missed."""
+    misses = {}
+    for row in rows:
+        domain = row["email_domain"]
+        if domain in resolved or domain in misses:
+            continue
+        organization_id = organization_ids.get(domain)
+        if organization_id is None:
+            misses[domain] = row
+        else:
+            resolved[domain] = organization_id
+    return list(misses.values())
+
+
+def _upsert_organization_batch(
+    session: Session, rows: list[Mapping[str, Any]]
+) -> dict[str, uuid.UUID]:
+    """Upsert one batch of organizations without committing."""
+    columns = {column.name for column in Organization.__table__.columns}
+    by_domain = {}
+    for row in rows:
+        unknown = set(row) - columns
+        if unknown:
+            raise ValueError(
+                f"Unknown organization fields: {', '.join(sorted(unknown))}"
+            )
+        # A domain may only be touched once per statement; the last row wins.
+        by_domain[row["email_domain"]] = row
+
+    keys = sorted(set().union(*by_domain.values()) | {"organization_id"})
+    records = []
+    # Rows are locked in domain order, so concurrent upserts cannot deadlock.
+    for _, row in sorted(by_domain.items()):
+        record = {key: row.get(key) for key in keys}
+        if record["organization_id"] is None:
+            record["organization_id"] = uuid.uuid4()
+        records.append(record)
+
+    statement = _upsert_statement(session, Organization)
+    table = Organization.__table__
+    updates = {
+        key: func.coalesce(statement.excluded[key], table.c[key])
+        for key in keys
+        if key not in ("organization_id", "email_domain")
+    }
+    updates["updated_at"] = func.now()
+    statement = statement.on_conflict_do_update(
+        index_elements=["email_domain"], set_=updates
+    ).returning(Organization.email_domain, Organization.organization_id)
+    returned = session.execute(statement, records)
+    return {domain: organization_id for domain, organization_id in returned}
+
+
+def _attach_companies(
+    session: Session,
+    rows: list[Mapping[str, Any]],
+    resolved: dict[str, uuid.UUID],
+) -> list[Mapping[str, Any]]:
+    """Replace ``organization`` mappings on lead rows with a ``company_id``.
+
+    New ids land in ``resolved``; the caller hands them to
+    _remember_organization_ids once the whole batch is written.
+    """
+    organizations = [row["organization"] for row in rows if "organization" in row]
+    if not organizations:
+        return rows
+    misses = _resolve_from_cache(organizations, resolved)
+    for start in range(0, len(misses), ORGANIZATION_UPSERT_BATCH_SIZE):
+        batch = misses[start : start + ORGANIZATION_UPSERT_BATCH_SIZE]
+        resolved.update(_upsert_organization_batch(session, batch))
+
+    attached = []
+    for row in rows:
+        if "organization" in row:
+            row = dict(row)
+            organization = row.pop("organization")
+            row.setdefault("company_id", resolved[organization["email_domain"]])
+        attached.append(row)
+    return attached
+
+
+def _lead_record(row: Mapping[str, Any]) -> dict[str, Any]:
+    """Normalize an import row to the full set of importable Lead columns."""
+    unknown = set(row) - set(_LEAD_IMPORT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown lead fields: {', '.join(sorted(unknown))}")
+    record = {name: row.get(name) for name in _LEAD_IMPORT_COLUMNS}
+    if record["lead_id"] is None:
+        record["lead_id"] = uuid.uuid4()
+    if record["email_normalized"] is None:
+        record["email_normalized"] = normalize_email(record["email"])
+    return record
+
+
+def _copy_value(value) -> str:
+    """Render a value in PostgreSQL COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_leads(session: Session, records: list[dict]) -> list[uuid.UUID]:
+    """COPY a batch into the staging table and merge it into leads."""
+    connection = session.connection()
+    if connection.dialect.driver == "asyncpg":
+        # Called from outreach.aio through run_sync; asyncpg speaks COPY
+        # natively with binary encoding, no text rendering needed.
+        driver_connection = connection.connection.driver_connection
+        await_only(
+            driver_connection.copy_records_to_table(
+                "leads_import_staging",
+                records=[
+                    tuple(record[name] for name in _LEAD_IMPORT_COLUMNS)
+                    for record in records
+                ],
+                columns=_LEAD_IMPORT_COLUMNS,
+            )
+        )
+    else:
+        _copy_expert(connection, records)
+
+    columns = ", ".join(_LEAD_IMPORT_COLUMNS)
+    merged = session.execute(
+        text(
+            f"INSERT INTO leads ({columns}) "
+            f"SELECT {columns} FROM leads_import_staging AS staged "
+            # The primary key includes created_at, so it does not catch a
+            # lead_id imported earlier. The lookup skips those; one inserted
+            # concurrently still fails on the lead_ids key.
+            "WHERE NOT EXISTS "
+            "(SELECT 1 FROM leads WHERE leads.lead_id = staged.lead_id) "
+            "ON CONFLICT DO NOTHING RETURNING lead_id"
+        ).columns(lead_id=UUID(as_uuid=True))
+    )
+    lead_ids = list(merged.scalars())
+    session.execute(text("TRUNCATE leads_import_staging"))
+    return lead_ids
+
+
+def _copy_expert(connection, records: list[dict]) -> None:
+    """Stream a batch into the staging table with psycopg2's copy_expert."""
+    buffer = io.StringIO()
+    for record in records:
+        buffer.write("\t".join(_copy_value(record[name]) for name in _LEAD_IMPORT_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    columns = ", ".join(_LEAD_IMPORT_COLUMNS)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY leads_import_staging ({columns}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+
+def _insert_leads(session: Session, records: list[dict]) -> list[uuid.UUID]:
+    """Insert a batch with a single executemany (SQLite stand-in path)."""
+    statement = (
+        _upsert_statement(session, Lead)
+        .on_conflict_do_nothing(index_elements=["lead_id"])
+        .returning(Lead.lead_id)
+    )
+    return list(session.execute(statement, records).scalars())
@@ -1,6 +1,80 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from outreach.config import DATABASE_URL
+import os
+import threading
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from outreach.config import get_database_url
+from outreach.crud import STRICT_LOADING
+from outreach.engine import _env_bool, create_outreach_engine, pool_stats
+from outreach.instrumentation import Instrumentation, instrument_from_environment
+
+# Set to make SessionLocal sessions raise on lazy loads; see crud.STRICT_LOADING.
+STRICT_LOADING_ENV = "OUTREACH_STRICT_LOADING"
+
+_engine: Engine | None = None
+_instrumentation: Instrumentation | None = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """Return the process-wide engine, creating it on first use."""
+    global _engine, _instrumentation
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_outreach_engine(get_database_url())
+                _instrumentation = instrument_from_environment(engine)
+                _engine = engine
+    return _engine
+
+
+def _reset_pool_after_fork() -> None:
+    # A forked worker must not reuse the parent's sockets. close=False leaves
+    # them open for the parent while the child starts with an empty pool.
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+def get_pool_stats() -> dict:
+    """Return connection pool counters for the process-wide engine."""
+    return pool_stats(get_engine())
+
+
+def get_query_metrics():
+    """Return the process-wide engine's metrics sink.
+
+    None unless OUTREACH_DB_INSTRUMENT is set; see outreach.instrumentation.
+    """
+    get_engine()
+    return _instrumentation.sink if _instrumentation is not None else None
+
+
+class _LazyBindSession(Session):
+    """Session that binds to the process-wide engine when first used.
+
+    Sessions are strict about loading when OUTREACH_STRICT_LOADING is set.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if _env_bool(STRICT_LOADING_ENV, False):
+            self.info.setdefault(STRICT_LOADING, True)
+
+    def get_bind(self, *args, **kwargs):
+        if self.bind is None:
+            self.bind = get_engine()
+        return super().get_bind(*args, **kwargs)
+
+
+SessionLocal = sessionmaker(class_=_LazyBindSession, autocommit=False, autoflush=False)
+
+
+def __getattr__(name: str):
+    # Keeps ``from outreach.database import engine`` working without building
+    # the engine when the module is imported.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
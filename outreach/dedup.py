@@ -0,0 +1,157 @@
+"""
+Duplicate detection: has an address been imported, or contacted, before?
+
+Addresses are compared in their normalize_email() form, stored on every
+lead as ``email_normalized``. Lookups run in batches, one
+``= ANY(:emails)`` query per LOOKUP_CHUNK_SIZE addresses, against
+ix_leads_email_normalized_contacted, and look across all campaigns.
+
+For imports where most rows are new, DuplicateChecker can sit behind a
+BloomFilter warmed from ``leads``: an address the filter has never seen is
+certainly new and needs no query, so only the few possible duplicates go to
+the database.
+"""
+import hashlib
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .crud import _any_of, _batched
+from .models import Lead, normalize_email
+
+LOOKUP_CHUNK_SIZE = 5000
+WARM_CHUNK_SIZE = 50_000
+BLOOM_ERROR_RATE = 0.01
+
+
+def find_existing_emails(
+    session: Session,
+    emails: Iterable[str],
+    contacted_within: timedelta | None = None,
+    chunk_size: int = LOOKUP_CHUNK_SIZE,
+) -> set[str]:
+    """Return the normalized forms of ``emails`` that some lead already has.
+
+    With ``contacted_within``, only leads whose ``last_contacted_at`` falls
+    in that window count, e.g. ``timedelta(days=90)`` for a cool-down
+    across campaigns.
+    """
+    normalized = {normalize_email(email) for email in emails if email}
+    query = select(Lead.email_normalized).distinct()
+    if contacted_within is not None:
+        since = datetime.now(timezone.utc) - contacted_within
+        query = query.where(Lead.last_contacted_at >= since)
+
+    found = set()
+    for chunk in _batched(sorted(normalized), chunk_size):
+        found.update(
+            session.scalars(query.where(_any_of(session, Lead.email_normalized, chunk)))
+        )
+    return found
+
+
+class BloomFilter:
+    """Fixed-size set membership with false positives and no false negatives.
+
+    ``capacity`` items fit at ``error_rate`` false positives; the filter
+    keeps working past that, with a growing error rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def __len__(self) -> int:
+        """Items added, counting repeats."""
+        return self._count
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from two halves of one digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+
+def warm_email_filter(
+    session: Session,
+    contacted_within: timedelta | None = None,
+    error_rate: float = BLOOM_ERROR_RATE,
+    headroom: int = 0,
+    chunk_size: int = WARM_CHUNK_SIZE,
+) -> BloomFilter:
+    """Build a BloomFilter of the normalized emails in ``leads``.
+
+    Rows are streamed ``chunk_size`` at a time, so memory is the filter's
+    bit array (about 1.2 bytes per address at 1% errors). ``headroom`` sizes
+    it for that many more addresses, such as the rows about to be imported.
+    """
+    query = select(Lead.email_normalized).where(Lead.email_normalized.is_not(None))
+    if contacted_within is not None:
+        since = datetime.now(timezone.utc) - contacted_within
+        query = query.where(Lead.last_contacted_at >= since)
+
+    count = session.scalar(select(func.count()).select_from(query.subquery()))
+    bloom = BloomFilter(count + headroom or 1, error_rate)
+    bloom.update(session.scalars(query.execution_options(yield_per=chunk_size)))
+    return bloom
+
+
+class DuplicateChecker:
+    """Batch duplicate lookups for an import, optionally behind a BloomFilter.
+
+    Without ``contacted_within``, call remember() with the addresses of rows
+    as they are written so later batches of the same import also catch
+    them; they are looked up in the session's own transaction, so they need
+    not be committed yet.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        contacted_within: timedelta | None = None,
+        bloom: BloomFilter | None = None,
+    ):
+        self.session = session
+        self.contacted_within = contacted_within
+        self.bloom = bloom
+        self.lookups = 0
+
+    def existing(self, emails: Iterable[str]) -> set[str]:
+        """Normalized forms of ``emails`` that are already in ``leads``."""
+        candidates = {normalize_email(email) for email in emails if email}
+        if self.bloom is not None:
+            candidates = {email for email in candidates if email in self.bloom}
+        if not candidates:
+            return set()
+        self.lookups += len(candidates)
+        return find_existing_emails(self.session, candidates, self.contacted_within)
+
+    def remember(self, emails: Iterable[str]) -> None:
+        """Record addresses just written, so the filter passes them through."""
+        if self.bloom is not None:
+            self.bloom.update(normalize_email(email) for email in emails if email)
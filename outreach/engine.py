@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+# Environment variables read by engine_options(), with their defaults.
+POOL_SIZE_ENV = "OUTREACH_DB_POOL_SIZE"
+MAX_OVERFLOW_ENV = "OUTREACH_DB_MAX_OVERFLOW"
+POOL_TIMEOUT_ENV = "OUTREACH_DB_POOL_TIMEOUT"
+POOL_RECYCLE_ENV = "OUTREACH_DB_POOL_RECYCLE"
+POOL_PRE_PING_ENV = "OUTREACH_DB_POOL_PRE_PING"
+STATEMENT_TIMEOUT_ENV = "OUTREACH_DB_STATEMENT_TIMEOUT_MS"
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_TIMEOUT = 30
+DEFAULT_POOL_RECYCLE = 1800
+DEFAULT_POOL_PRE_PING = True
+DEFAULT_STATEMENT_TIMEOUT_MS = 0
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value in (None, "") else int(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def statement_timeout_setting(statement_timeout_ms: int | None = None) -> int:
+    """Return the statement timeout in milliseconds; 0 means none.
+
+    An explicit value wins over OUTREACH_DB_STATEMENT_TIMEOUT_MS.
+    """
+    if statement_timeout_ms is not None:
+        return statement_timeout_ms
+    return _env_int(STATEMENT_TIMEOUT_ENV, DEFAULT_STATEMENT_TIMEOUT_MS)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that also records how long checkouts wait for a connection."""
+
+    # Log as the stock pool does, so echo_pool and the sqlalchemy.pool
+    # logger levels apply rather than the root logger's.
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep the counters running.
+        pool = super().recreate()
+        pool.checkouts = self.checkouts
+        pool.wait_seconds = self.wait_seconds
+        pool.max_wait_seconds = self.max_wait_seconds
+        return pool
+
+
+def engine_options(url, statement_timeout_ms: int | None = None) -> dict:
+    """Return create_engine() keyword arguments for ``url`` from the environment.
+
+    Pool settings apply to server databases only; SQLite keeps the pool
+    SQLAlchemy picks for it.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": _env_int(POOL_SIZE_ENV, DEFAULT_POOL_SIZE),
+        "max_overflow": _env_int(MAX_OVERFLOW_ENV, DEFAULT_MAX_OVERFLOW),
+        "pool_timeout": _env_int(POOL_TIMEOUT_ENV, DEFAULT_POOL_TIMEOUT),
+        "pool_recycle": _env_int(POOL_RECYCLE_ENV, DEFAULT_POOL_RECYCLE),
+        "pool_pre_ping": _env_bool(POOL_PRE_PING_ENV, DEFAULT_POOL_PRE_PING),
+    }
+    if url.get_backend_name() == "postgresql":
+        statement_timeout_ms = statement_timeout_setting(statement_timeout_ms)
+        if statement_timeout_ms:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={statement_timeout_ms}"
+            }
+        if url.get_driver_name() == "psycopg2":
+            options["executemany_mode"] = "values_plus_batch"
+    return options
+
+
+def create_outreach_engine(
+    url, statement_timeout_ms: int | None = None, **overrides
+) -> Engine:
+    """Create an engine configured from the OUTREACH_DB_* environment variables.
+
+    ``statement_timeout_ms`` overrides OUTREACH_DB_STATEMENT_TIMEOUT_MS (0
+    disables it); any other keyword is passed on to create_engine().
+    """
+    options = engine_options(url, statement_timeout_ms)
+    if overrides.get("poolclass") not in (None, InstrumentedQueuePool):
+        # Sizing options are QueuePool specific.
+        for name in ("pool_size", "max_overflow", "pool_timeout"):
+            options.pop(name, None)
+    options.update(overrides)
+    return create_engine(url, **options)
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Return connection pool counters for ``engine``."""
+    pool = engine.pool
+    stats = {"status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            wait_seconds=pool.wait_seconds,
+            max_wait_seconds=pool.max_wait_seconds,
+        )
+    return stats
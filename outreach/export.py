@@ -0,0 +1,283 @@
+"""
+Bulk export of a campaign's leads, joined with their organization.
+
+export_leads() writes CSV, JSONL or Parquet in constant memory:
+
+* CSV on PostgreSQL is produced by the server with ``COPY (SELECT ...) TO
+  STDOUT`` and streamed straight into the file, unless a column is only
+  readable in Python, such as the compressed ``organization.website_raw_data``;
+  the rows are then rendered the way COPY renders them
+* everything else reads the rows through a server-side cursor,
+  EXPORT_CHUNK_SIZE at a time; Parquet writes one row group per chunk
+
+Column names match cli/import_leads.py: Lead columns as they are and
+organization columns as ``organization.<column>``, so an export can be
+imported again. Parquet needs the optional ``pyarrow`` dependency
+(``pip install customercenter[export]``).
+"""
+import csv
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Iterable, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.types import TypeDecorator
+
+from .models import Lead, Organization
+
+FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_CHUNK_SIZE = 10_000
+ORGANIZATION_PREFIX = "organization."
+
+# Everything that can be exported, in file order.
+EXPORT_COLUMNS = {
+    **{column.name: column for column in Lead.__table__.columns},
+    **{
+        ORGANIZATION_PREFIX + column.name: column
+        for column in Organization.__table__.columns
+        if column.name != "organization_id"
+    },
+}
+
+# What the enrichment and ESP tooling consume; lease bookkeeping, the
+# deferred blobs and timestamps of the organization row are left out.
+DEFAULT_EXPORT_COLUMNS = (
+    "lead_id",
+    "email",
+    "first_name",
+    "last_name",
+    "title",
+    "headline",
+    "linkedin_url",
+    "status",
+    "email_verification_status",
+    "email_icebreaker",
+    "language",
+    "source",
+    "external_id",
+    "external_datasetid",
+    "import_run",
+    "email_sent_at",
+    "reply_received_at",
+    "last_contacted_at",
+    "created_at",
+    "organization.name",
+    "organization.email_domain",
+    "organization.website_url",
+    "organization.linkedin_url",
+    "organization.estimated_num_employees",
+    "organization.country",
+    "organization.language",
+    "organization.time_zone",
+)
+
+
+def export_leads(
+    session: Session,
+    campaign_id,
+    path: str | os.PathLike,
+    format: str | None = None,
+    columns: Sequence[str] | None = None,
+    statuses: Iterable[str] | None = None,
+    import_runs: Iterable[str] | None = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> int:
+    """Write a campaign's leads to ``path``; returns the rows written.
+
+    ``format`` defaults to the file extension. ``columns`` picks from
+    EXPORT_COLUMNS (DEFAULT_EXPORT_COLUMNS when omitted); ``statuses`` and
+    ``import_runs`` keep only leads with one of those values. Rows come in
+    no particular order.
+    """
+    format = format or os.path.splitext(path)[1].lstrip(".").lower()
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported format {format!r}; use one of {FORMATS}")
+    columns = list(columns or DEFAULT_EXPORT_COLUMNS)
+    query = export_query(campaign_id, columns, statuses, import_runs)
+
+    if format == "parquet":
+        return _write_parquet(session, query, columns, path, chunk_size)
+    if (
+        format == "csv"
+        and session.get_bind().dialect.name == "postgresql"
+        and _server_renderable(columns)
+    ):
+        return _copy_csv(session, query, path)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if format == "csv":
+            return _write_csv(session, query, columns, file, chunk_size)
+        return _write_jsonl(session, query, columns, file, chunk_size)
+
+
+def export_query(
+    campaign_id,
+    columns: Sequence[str],
+    statuses: Iterable[str] | None = None,
+    import_runs: Iterable[str] | None = None,
+):
+    """SELECT of the named export columns for a campaign's leads."""
+    unknown = [name for name in columns if name not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+    query = (
+        select(*(EXPORT_COLUMNS[name].label(name) for name in columns))
+        .select_from(Lead)
+        .join(Organization, Organization.organization_id == Lead.company_id)
+        .where(Lead.campaign_id == campaign_id)
+    )
+    if statuses is not None:
+        query = query.where(Lead.status.in_(list(statuses)))
+    if import_runs is not None:
+        query = query.where(Lead.import_run.in_(list(import_runs)))
+    return query
+
+
+def _server_renderable(columns: Sequence[str]) -> bool:
+    """Whether COPY can render the columns: none is decoded by a TypeDecorator.
+
+    COPY would write a CompressedJSON column as its compressed bytea.
+    """
+    return not any(isinstance(EXPORT_COLUMNS[name].type, TypeDecorator) for name in columns)
+
+
+def _copy_csv(session: Session, query, path) -> int:
+    """Have PostgreSQL render the CSV and stream it into ``path``."""
+    compiled = query.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}
+    )
+    params = {
+        key: str(value) if isinstance(value, uuid.UUID) else value
+        for key, value in compiled.params.items()
+    }
+    cursor = session.connection().connection.cursor()
+    try:
+        select_sql = cursor.mogrify(str(compiled), params).decode()
+        with open(path, "wb") as file:
+            cursor.copy_expert(
+                f"COPY ({select_sql}) TO STDOUT WITH (FORMAT csv, HEADER)", file
+            )
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def _chunks(session: Session, query, chunk_size: int):
+    """Result rows ``chunk_size`` at a time from a server-side cursor."""
+    result = session.execute(query, execution_options={"yield_per": chunk_size})
+    return result.partitions()
+
+
+def _text_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _csv_timestamp(value: datetime) -> str:
+    """``value`` as COPY writes it, so both CSV paths agree.
+
+    That is PostgreSQL's ISO DateStyle: a space before the time, trailing
+    zeros of the fraction dropped and the offset in hours, with minutes
+    only when there are some.
+    """
+    text = value.strftime("%Y-%m-%d %H:%M:%S")
+    if value.microsecond:
+        text += f".{value.microsecond:06d}".rstrip("0")
+    offset = value.utcoffset()
+    if offset is not None:
+        seconds = int(offset.total_seconds())
+        hours, seconds = divmod(abs(seconds), 3600)
+        minutes, seconds = divmod(seconds, 60)
+        text += f"{'-' if offset.total_seconds() < 0 else '+'}{hours:02d}"
+        if minutes or seconds:
+            text += f":{minutes:02d}"
+        if seconds:
+            text += f":{seconds:02d}"
+    return text
+
+
+def _write_csv(session: Session, query, columns: list[str], file, chunk_size: int) -> int:
+    writer = csv.writer(file)
+    writer.writerow(columns)
+    count = 0
+    for rows in _chunks(session, query, chunk_size):
+        writer.writerows(
+            [
+                _csv_timestamp(value) if isinstance(value, datetime) else _text_value(value)
+                for value in row
+            ]
+            for row in rows
+        )
+        count += len(rows)
+    return count
+
+
+def _write_jsonl(session: Session, query, columns: list[str], file, chunk_size: int) -> int:
+    count = 0
+    for rows in _chunks(session, query, chunk_size):
+        for row in rows:
+            record = {
+                name: value if isinstance(value, (dict, list)) else _text_value(value)
+                for name, value in zip(columns, row)
+            }
+            file.write(json.dumps(record, ensure_ascii=False))
+            file.write("\n")
+        count += len(rows)
+    return count
+
+
+def _write_parquet(
+    session: Session, query, columns: list[str], path, chunk_size: int
+) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError(
+            "Parquet export needs pyarrow: pip install customercenter[export]"
+        ) from exc
+
+    schema = pa.schema(
+        [(name, _arrow_type(pa, EXPORT_COLUMNS[name])) for name in columns]
+    )
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in _chunks(session, query, chunk_size):
+            arrays = [
+                [_parquet_value(row[index]) for row in rows]
+                for index in range(len(columns))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(rows)
+        if not count:
+            writer.write_table(schema.empty_table())
+    return count
+
+
+def _arrow_type(pa, column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:  # CompressedJSON
+        return pa.string()
+    if python_type is datetime:
+        return pa.timestamp("us", tz="UTC")
+    if python_type is int:
+        return pa.int64()
+    # UUIDs and JSON documents are written as text.
+    return pa.string()
+
+
+def _parquet_value(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
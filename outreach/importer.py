@@ -0,0 +1,673 @@
+"""
+Streaming lead import from CSV or JSONL files.
+
+LeadImporter reads a file one record at a time, maps its columns onto Lead
+and Organization fields and writes them through crud.bulk_import_leads, one
+committed batch at a time, so memory stays at one batch whatever the file
+size. Organizations are resolved per batch on ``email_domain``, by default
+the domain of the lead's email. Those with a ``name`` are upserted; others
+are looked up and only created, named after their domain, when missing,
+so an import never renames an existing organization after its domain.
+
+Every lead is tagged with the run's ``import_run``. After each batch the
+byte offset reached is saved to a checkpoint file, and a run started again
+on the same file into the same campaign continues from there; a checkpoint
+of another campaign is refused unless the run is restarted. Lead ids are
+derived from the campaign, the run and the record's position in the file,
+so a batch that committed just before the process died is skipped, not
+duplicated, when it is read again, while the same file imported into two
+campaigns gets two sets of leads.
+
+import_in_parallel() spreads one file over several processes for large
+scraper exports, where parsing and mapping rows is the bottleneck.
+
+Mapping targets are Lead column names or ``organization.<column>``; source
+columns named like a target map onto it unless mapped elsewhere, and other
+columns are ignored.
+"""
+import copy
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, Mapping
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .crud import (
+    LEAD_IMPORT_BATCH_SIZE,
+    PENDING_STATUS,
+    _any_of,
+    _batched,
+    _remember_organization_ids,
+    _resolve_from_cache,
+    bulk_import_leads,
+)
+from .dedup import BloomFilter, DuplicateChecker, warm_email_filter
+from .engine import create_outreach_engine
+from .models import Lead, Organization, normalize_email
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl")
+ORGANIZATION_PREFIX = "organization."
+ORGANIZATION_LOOKUP_CHUNK_SIZE = 5000
+PROGRESS_INTERVAL = 5.0
+# For sizing email filters from a file size.
+ESTIMATED_ROW_BYTES = 200
+
+# Namespace for lead ids derived from (campaign_id, import_run, record offset).
+LEAD_ID_NAMESPACE = uuid.UUID("8f0d4c52-3a61-4b8e-9c3f-6f1e2d7a9b04")
+
+# Filled in by the importer, or maintained by the database and workers.
+_RESERVED_LEAD_FIELDS = {
+    "campaign_id",
+    "company_id",
+    "email_normalized",
+    "import_run",
+    "claimed_by",
+    "lease_expires_at",
+    "created_at",
+    "updated_at",
+}
+_RESERVED_ORGANIZATION_FIELDS = {"organization_id", "import_run", "created_at", "updated_at"}
+
+LEAD_FIELDS = {
+    column.name: column
+    for column in Lead.__table__.columns
+    if column.name not in _RESERVED_LEAD_FIELDS
+}
+ORGANIZATION_FIELDS = {
+    column.name: column
+    for column in Organization.__table__.columns
+    if column.name not in _RESERVED_ORGANIZATION_FIELDS
+}
+
+
+class InvalidRecord(ValueError):
+    """A record that cannot become a lead; it is counted and skipped."""
+
+
+@dataclass
+class ImportStats:
+    """Counts for one import, carried across resumed runs."""
+
+    rows: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    # Wall time of the latest run, and the rows earlier runs had done.
+    seconds: float = 0.0
+    resumed_rows: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput of this run alone."""
+        done = self.rows - self.resumed_rows
+        return done / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class ImportCheckpoint:
+    """Progress of an import, saved as JSON after every committed batch."""
+
+    source: str
+    import_run: str
+    campaign_id: str | None = None
+    offset: int = 0
+    # Exclusive end of a shard's byte range; None reads to the end of file.
+    end: int | None = None
+    completed: bool = False
+    stats: ImportStats | None = None
+
+    @classmethod
+    def load(cls, path: Path) -> "ImportCheckpoint | None":
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text())
+        stats = data.pop("stats", None)
+        stats = ImportStats(**stats) if stats is not None else None
+        return cls(**data, stats=stats)
+
+    def save(self, path: Path) -> None:
+        # Write then rename, so a crash never leaves a truncated checkpoint.
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(asdict(self), indent=2))
+        os.replace(tmp, path)
+
+
+class LeadImporter:
+    """Imports one CSV or JSONL file of leads into a campaign."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        campaign_id,
+        mapping: Mapping[str, str] | None = None,
+        format: str | None = None,
+        import_run: str | None = None,
+        status: str = PENDING_STATUS,
+        batch_size: int = LEAD_IMPORT_BATCH_SIZE,
+        checkpoint_path: str | os.PathLike | None = None,
+    ):
+        self.path = Path(path)
+        self.campaign_id = campaign_id
+        self.format = format or _detect_format(self.path)
+        if self.format not in FORMATS:
+            raise ValueError(f"Unsupported format {self.format!r}; use one of {FORMATS}")
+        self.mapping = dict(mapping or {})
+        for target in self.mapping.values():
+            if _field(target) is None:
+                raise ValueError(f"Unknown mapping target: {target}")
+        self.import_run = import_run
+        self.status = status
+        self.batch_size = batch_size
+        self.checkpoint_path = Path(
+            checkpoint_path or self.path.with_name(self.path.name + ".checkpoint.json")
+        )
+        # Source column -> (target column, is an organization field).
+        self._columns: dict[str, tuple[Any, bool]] = {}
+
+    def run(
+        self,
+        session: Session,
+        checker: DuplicateChecker | None = None,
+        restart: bool = False,
+        progress: Callable[[ImportStats], None] | None = None,
+    ) -> ImportStats:
+        """Import the file, continuing from its checkpoint unless ``restart``.
+
+        With a ``checker``, leads whose address already exists (or occurs
+        earlier in the file) are counted as duplicates and not written.
+        ``progress`` is called with the running totals after every batch.
+        A checkpoint of another file or campaign raises ValueError.
+        """
+        checkpoint = None if restart else ImportCheckpoint.load(self.checkpoint_path)
+        if checkpoint is not None:
+            self._check_checkpoint(checkpoint, self.checkpoint_path)
+        else:
+            checkpoint = ImportCheckpoint(
+                source=str(self.path.resolve()),
+                import_run=self.import_run or _default_import_run(self.path),
+                campaign_id=str(self.campaign_id),
+            )
+        if checkpoint.completed:
+            logger.info("%s was already imported as %s", self.path, checkpoint.import_run)
+            return checkpoint.stats
+        if checkpoint.offset > self.path.stat().st_size:
+            raise ValueError(f"{self.path} is shorter than its checkpoint; was it replaced?")
+        self.import_run = checkpoint.import_run
+        if checkpoint.offset:
+            logger.info("Resuming %s at byte %d", self.path, checkpoint.offset)
+        return self.import_range(session, checkpoint, self.checkpoint_path, checker, progress)
+
+    def import_range(
+        self,
+        session: Session,
+        checkpoint: ImportCheckpoint,
+        checkpoint_path: Path,
+        checker: DuplicateChecker | None = None,
+        progress: Callable[[ImportStats], None] | None = None,
+    ) -> ImportStats:
+        """Import the byte range ``checkpoint`` describes, saving progress to
+        ``checkpoint_path`` after every batch."""
+        stats = checkpoint.stats or ImportStats()
+        stats.resumed_rows = stats.rows
+        started = time.perf_counter()
+        records = self.records(checkpoint.offset, checkpoint.end)
+        for batch in _batched(records, self.batch_size):
+            rows = []
+            for offset, record in batch:
+                try:
+                    rows.append(self.lead_row(record, offset))
+                except InvalidRecord as exc:
+                    logger.warning("%s, record ending at byte %d: %s", self.path, offset, exc)
+                    stats.invalid += 1
+            if checker is not None:
+                rows = _drop_duplicates(rows, checker, stats)
+            if rows:
+                _attach_known_organizations(session, rows)
+                result = bulk_import_leads(session, rows, batch_size=self.batch_size)
+                stats.inserted += result.inserted
+                stats.skipped += result.skipped
+                if checker is not None:
+                    checker.remember(row["email"] for row in rows)
+
+            stats.rows += len(batch)
+            stats.seconds = time.perf_counter() - started
+            checkpoint.offset = batch[-1][0]
+            checkpoint.stats = stats
+            checkpoint.save(checkpoint_path)
+            if progress is not None:
+                progress(stats)
+
+        stats.seconds = time.perf_counter() - started
+        checkpoint.completed = True
+        checkpoint.stats = stats
+        checkpoint.save(checkpoint_path)
+        return stats
+
+    def records(
+        self, offset: int = 0, end: int | None = None
+    ) -> Iterator[tuple[int, dict | InvalidRecord]]:
+        """Yield ``(end offset, record)`` for records starting in ``[offset, end)``.
+
+        Records that fail to parse come back as InvalidRecord instances in
+        place of the dict, so they can be counted where they occur.
+        """
+        with self.path.open("rb") as file:
+            if self.format == "csv":
+                yield from _csv_records(file, offset, end)
+            else:
+                yield from _jsonl_records(file, offset, end)
+
+    def shards(self, count: int) -> list[tuple[int, int]]:
+        """Split the file's records into up to ``count`` byte ranges.
+
+        Boundaries are moved to the next line start. CSV records with
+        quoted line breaks must not straddle one, so parallel CSV imports
+        need files without them; JSONL is always safe.
+        """
+        size = self.path.stat().st_size
+        with self.path.open("rb") as file:
+            start = _csv_data_start(file) if self.format == "csv" else 0
+            boundaries = [start]
+            for i in range(1, count):
+                file.seek(max(start + (size - start) * i // count - 1, boundaries[-1]))
+                file.readline()
+                if file.tell() < size and file.tell() > boundaries[-1]:
+                    boundaries.append(file.tell())
+        boundaries.append(size)
+        return list(zip(boundaries, boundaries[1:]))
+
+    def lead_row(self, record: dict | InvalidRecord, offset: int) -> dict[str, Any]:
+        """Map one record to a crud.bulk_import_leads row."""
+        if isinstance(record, InvalidRecord):
+            raise record
+        lead = {}
+        organization = {}
+        for source, value in record.items():
+            try:
+                column, for_organization = self._columns[source]
+            except KeyError:
+                column, for_organization = self._columns.setdefault(
+                    source, self._resolve(source)
+                )
+            if column is None:
+                continue
+            value = _convert(column, value)
+            if value is None:
+                continue
+            if for_organization:
+                organization[column.name] = value
+            else:
+                lead[column.name] = value
+
+        email = lead.get("email")
+        if not email or "@" not in email:
+            raise InvalidRecord(f"missing or invalid email {email!r}")
+        organization.setdefault("email_domain", email.rsplit("@", 1)[1].strip().lower())
+
+        lead.setdefault(
+            "lead_id",
+            uuid.uuid5(LEAD_ID_NAMESPACE, f"{self.campaign_id}:{self.import_run}:{offset}"),
+        )
+        lead.setdefault("status", self.status)
+        lead["campaign_id"] = self.campaign_id
+        lead["import_run"] = self.import_run
+        lead["organization"] = organization
+        return lead
+
+    def _check_checkpoint(self, checkpoint: ImportCheckpoint, path: Path) -> None:
+        """Refuse a checkpoint left by an import of another file or campaign."""
+        if checkpoint.source != str(self.path.resolve()):
+            raise ValueError(f"{path} belongs to {checkpoint.source}, not {self.path}")
+        if checkpoint.campaign_id != str(self.campaign_id):
+            raise ValueError(
+                f"{path} belongs to an import into campaign {checkpoint.campaign_id}, "
+                f"not {self.campaign_id}; restart to import into this one"
+            )
+
+    def _resolve(self, source: str) -> tuple[Any, bool]:
+        """The column a source column goes to, and whether it is an
+        organization's: its mapping, else the field it is named after unless
+        another column is mapped there."""
+        target = self.mapping.get(source)
+        if target is None and source not in self.mapping.values():
+            target = source
+        column = _field(target)
+        return column, column is not None and target.startswith(ORGANIZATION_PREFIX)
+
+
+def import_in_parallel(
+    importer: LeadImporter,
+    database_url: str,
+    workers: int,
+    dedup: bool = False,
+    contacted_within: timedelta | None = None,
+    bloom: bool = False,
+    restart: bool = False,
+    progress: Callable[[ImportStats], None] | None = None,
+    progress_interval: float = PROGRESS_INTERVAL,
+) -> ImportStats:
+    """Import ``importer``'s file with ``workers`` processes.
+
+    The file is split into byte ranges (LeadImporter.shards). Workers import
+    their range with an engine of their own, each checkpointing to a file of
+    its own next to the importer's checkpoint; run again with the same file
+    to resume. Each record is read once: workers resolve organizations per
+    batch as LeadImporter.run does, with the ON CONFLICT upsert. It locks
+    rows in domain order, so workers cannot deadlock on it, and each
+    worker's id cache means it upserts a domain only the first time it
+    meets it.
+    ``progress`` gets the summed totals every ``progress_interval`` seconds.
+
+    ``dedup``, ``contacted_within`` and ``bloom`` configure a
+    DuplicateChecker in every worker. Workers only see each other's rows
+    once committed, so an address repeated in two shards can get through
+    when both batches are written at the same moment.
+    """
+    engine = create_outreach_engine(database_url)
+    session = Session(engine)
+    started = time.perf_counter()
+    try:
+        plan = None if restart else _load_shard_checkpoints(importer)
+        if plan is None:
+            import_run = importer.import_run or _default_import_run(importer.path)
+            plan = [
+                ImportCheckpoint(
+                    source=str(importer.path.resolve()),
+                    import_run=import_run,
+                    campaign_id=str(importer.campaign_id),
+                    offset=start,
+                    end=end,
+                )
+                for start, end in importer.shards(workers)
+            ]
+            _clear_shard_checkpoints(importer)
+            for index, checkpoint in enumerate(plan):
+                checkpoint.save(_shard_checkpoint_path(importer, index))
+        importer = copy.copy(importer)
+        importer.import_run = plan[0].import_run
+        resumed_rows = sum(checkpoint.stats.rows for checkpoint in plan if checkpoint.stats)
+        pending = [index for index, checkpoint in enumerate(plan) if not checkpoint.completed]
+        if not pending:
+            logger.info("%s was already imported as %s", importer.path, importer.import_run)
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            min(workers, len(pending)) or 1,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(logging.getLogger().getEffectiveLevel(),),
+        ) as pool:
+            ranges = [(plan[index].offset, plan[index].end) for index in pending]
+            email_filter = None
+            if dedup and bloom and pending:
+                email_filter = warm_email_filter(
+                    session,
+                    contacted_within,
+                    headroom=sum(end - start for start, end in ranges) // ESTIMATED_ROW_BYTES,
+                )
+            futures = [
+                pool.submit(
+                    _import_shard,
+                    importer,
+                    database_url,
+                    _shard_checkpoint_path(importer, index),
+                    dedup,
+                    contacted_within,
+                    email_filter,
+                )
+                for index in pending
+            ]
+            while futures:
+                done, running = wait(futures, timeout=progress_interval)
+                for future in done:
+                    future.result()  # re-raise a worker's error
+                futures = list(running)
+                if progress is not None:
+                    stats = _sum_shard_stats(importer, len(plan), resumed_rows)
+                    stats.seconds = time.perf_counter() - started
+                    progress(stats)
+    finally:
+        session.close()
+        engine.dispose()
+
+    stats = _sum_shard_stats(importer, len(plan), resumed_rows)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def _shard_checkpoint_path(importer: LeadImporter, index: int) -> Path:
+    path = importer.checkpoint_path
+    return path.with_name(f"{path.stem}.{index}{path.suffix}")
+
+
+def _load_shard_checkpoints(importer: LeadImporter) -> list[ImportCheckpoint] | None:
+    plan = []
+    while (path := _shard_checkpoint_path(importer, len(plan))).exists():
+        checkpoint = ImportCheckpoint.load(path)
+        importer._check_checkpoint(checkpoint, path)
+        plan.append(checkpoint)
+    return plan or None
+
+
+def _clear_shard_checkpoints(importer: LeadImporter) -> None:
+    index = 0
+    while (path := _shard_checkpoint_path(importer, index)).exists():
+        path.unlink()
+        index += 1
+
+
+def _sum_shard_stats(importer: LeadImporter, shards: int, resumed_rows: int) -> ImportStats:
+    total = ImportStats(resumed_rows=resumed_rows)
+    for index in range(shards):
+        stats = ImportCheckpoint.load(_shard_checkpoint_path(importer, index)).stats
+        if stats is not None:
+            for name in ("rows", "inserted", "skipped", "duplicates", "invalid"):
+                setattr(total, name, getattr(total, name) + getattr(stats, name))
+    return total
+
+
+def _init_worker(log_level: int) -> None:
+    logging.basicConfig(level=log_level)
+
+
+def _import_shard(
+    importer: LeadImporter,
+    database_url: str,
+    checkpoint_path: Path,
+    dedup: bool,
+    contacted_within: timedelta | None,
+    email_filter: BloomFilter | None,
+) -> ImportStats:
+    """Worker: import one shard over a connection of its own."""
+    engine = create_outreach_engine(database_url)
+    session = Session(engine)
+    try:
+        checker = None
+        if dedup:
+            checker = DuplicateChecker(session, contacted_within, email_filter)
+        checkpoint = ImportCheckpoint.load(checkpoint_path)
+        return importer.import_range(session, checkpoint, checkpoint_path, checker)
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _detect_format(path: Path) -> str:
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if ".csv" in suffixes:
+        return "csv"
+    if ".jsonl" in suffixes or ".ndjson" in suffixes:
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of {path}; pass format='csv' or 'jsonl'")
+
+
+def _default_import_run(path: Path) -> str:
+    return f"{path.stem}-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+
+def _field(target: str | None):
+    """The Lead or Organization column a mapping target names, if any."""
+    if target is None:
+        return None
+    if target.startswith(ORGANIZATION_PREFIX):
+        return ORGANIZATION_FIELDS.get(target[len(ORGANIZATION_PREFIX) :])
+    return LEAD_FIELDS.get(target)
+
+
+def _convert(column, value):
+    """Coerce a CSV string or JSON value to the column's Python type."""
+    if value is None or value == "":
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:  # CompressedJSON
+        python_type = dict
+    if isinstance(value, python_type):
+        return value
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is dict:
+            return json.loads(value) if isinstance(value, str) else value
+        if python_type is str:
+            return value if isinstance(value, str) else json.dumps(value)
+        return python_type(value)
+    except (TypeError, ValueError) as exc:
+        raise InvalidRecord(f"bad value for {column.name}: {value!r}") from exc
+
+
+def _attach_known_organizations(session: Session, rows: list[dict]) -> None:
+    """Give rows whose organization has no name its existing id.
+
+    Upserting those would need a name and overwrite the organization's own;
+    only domains not found are left to bulk_import_leads to create.
+    """
+    unnamed = [row for row in rows if "name" not in row["organization"]]
+    if not unnamed:
+        return
+    resolved = _existing_organization_ids(
+        session, [row["organization"]["email_domain"] for row in unnamed]
+    )
+    for row in unnamed:
+        domain = row["organization"]["email_domain"]
+        if domain in resolved:
+            row["company_id"] = resolved[domain]
+            del row["organization"]
+        else:
+            row["organization"].setdefault("name", domain)
+
+
+def _existing_organization_ids(session: Session, domains: list[str]) -> dict[str, uuid.UUID]:
+    """Ids of the organizations that exist among ``domains``, cache first."""
+    resolved = {}
+    misses = _resolve_from_cache([{"email_domain": domain} for domain in domains], resolved)
+    for chunk in _batched([miss["email_domain"] for miss in misses], ORGANIZATION_LOOKUP_CHUNK_SIZE):
+        found = dict(
+            session.execute(
+                select(Organization.email_domain, Organization.organization_id).where(
+                    _any_of(session, Organization.email_domain, chunk)
+                )
+            ).all()
+        )
+        _remember_organization_ids(session, found)
+        resolved.update(found)
+    return resolved
+
+
+def _drop_duplicates(rows: list[dict], checker: DuplicateChecker, stats: ImportStats) -> list[dict]:
+    """Rows whose address is neither in the database nor earlier in the batch."""
+    existing = checker.existing(row["email"] for row in rows)
+    kept = []
+    for row in rows:
+        normalized = normalize_email(row["email"])
+        if normalized in existing:
+            stats.duplicates += 1
+            continue
+        existing.add(normalized)
+        kept.append(row)
+    return kept
+
+
+class _Lines:
+    """Decoded lines of a binary file, tracking the byte offset reached.
+
+    Stops at the first line starting at or after ``end``.
+    """
+
+    def __init__(self, file, offset: int, end: int | None = None):
+        self.file = file
+        self.offset = offset
+        self.end = end
+        file.seek(offset)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.end is not None and self.offset >= self.end:
+            raise StopIteration
+        line = self.file.readline()
+        if not line:
+            raise StopIteration
+        if self.offset == 0 and line.startswith(b"\xef\xbb\xbf"):
+            line = line[3:]
+            self.offset += 3
+        self.offset += len(line)
+        return line.decode("utf-8")
+
+
+def _csv_header(file) -> tuple[list[str] | None, int]:
+    """The CSV header and the offset of the first record."""
+    lines = _Lines(file, 0)
+    return next(csv.reader(lines), None), lines.offset
+
+
+def _csv_data_start(file) -> int:
+    return _csv_header(file)[1]
+
+
+def _csv_records(file, offset: int, end: int | None) -> Iterator[tuple[int, dict]]:
+    # csv.reader pulls exactly the lines of one record per row, so the line
+    # offset after each row is where the next record starts.
+    header, data_start = _csv_header(file)
+    if header is None:
+        return
+    lines = _Lines(file, max(offset, data_start), end)
+    for values in csv.reader(lines):
+        if not values:
+            continue
+        if len(values) != len(header):
+            yield lines.offset, InvalidRecord(
+                f"{len(values)} fields where the header has {len(header)}"
+            )
+            continue
+        yield lines.offset, dict(zip(header, values))
+
+
+def _jsonl_records(file, offset: int, end: int | None) -> Iterator[tuple[int, dict]]:
+    lines = _Lines(file, offset, end)
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield lines.offset, InvalidRecord(f"not JSON: {exc}")
+            continue
+        if not isinstance(record, dict):
+            yield lines.offset, InvalidRecord("not a JSON object")
+            continue
+        yield lines.offset, record
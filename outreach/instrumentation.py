@@ -0,0 +1,542 @@
+"""
+Per-statement timing, row counts and a slow-query log for outreach engines.
+
+``instrument(engine)`` hooks the engine's cursor events. Every statement is
+attributed to the logical operation running when it executes: the
+outermost ``@tracked`` function (all public ``outreach.crud`` functions are
+tracked) or ``UNTRACKED``. For each operation the sink receives:
+
+* the latency and row count of every statement it ran
+* its own latency and number of round trips once it returns
+* statements slower than ``slow_query_ms``, with their EXPLAIN plan
+
+The default sink, QueryMetrics, keeps histograms in memory and renders them
+in the Prometheus text exposition format; subclass MetricsSink to forward
+the numbers anywhere else.
+
+    metrics = instrument(engine, slow_query_ms=200).sink
+    ...
+    print(metrics.prometheus_text())
+
+For an AsyncEngine, instrument its ``sync_engine``. The process-wide engine
+of ``outreach.database`` is instrumented when OUTREACH_DB_INSTRUMENT is set.
+
+``query_budget(engine, ...)`` is the test-time counterpart: it fails a block
+that runs more statements than allowed, or the same statement over and
+over, which is how an N+1 lazy-loading pattern shows up.
+"""
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .engine import _env_bool, _env_int
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by instrument_from_environment().
+INSTRUMENT_ENV = "OUTREACH_DB_INSTRUMENT"
+SLOW_QUERY_ENV = "OUTREACH_DB_SLOW_QUERY_MS"
+EXPLAIN_ENV = "OUTREACH_DB_EXPLAIN_SLOW_QUERIES"
+
+DEFAULT_SLOW_QUERY_MS = 500
+
+# Operation label for statements issued outside any tracked function.
+UNTRACKED = "untracked"
+
+# Histogram upper bounds: seconds for latencies, statements for round trips.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+# Statements EXPLAIN accepts; the plan is captured without running them again.
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+_START = "outreach.instrumentation.start"
+_SLOW_QUERY_LOG_CHARS = 2000
+# Transaction control is not a query for budget purposes.
+_TRANSACTION_CONTROL = ("savepoint", "release savepoint", "rollback to savepoint")
+
+
+@dataclass
+class SlowQuery:
+    """A statement that took longer than the slow-query threshold."""
+
+    operation: str
+    statement: str
+    parameters: Any
+    seconds: float
+    rows: int
+    plan: str | None = None
+
+
+class MetricsSink:
+    """Receives instrumentation events; the methods do nothing by default.
+
+    Methods are called on the thread that ran the statement and must be
+    thread-safe.
+    """
+
+    def record_statement(self, operation: str, seconds: float, rows: int) -> None:
+        """One statement finished."""
+
+    def record_operation(
+        self, operation: str, seconds: float, round_trips: int, rows: int
+    ) -> None:
+        """A tracked operation that ran at least one statement returned."""
+
+    def record_slow_query(self, query: SlowQuery) -> None:
+        """A statement exceeded the slow-query threshold."""
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count in the Prometheus layout."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[tuple[str, int]]:
+        """Yield ``(le, count)`` pairs, ending with ``+Inf``."""
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield ("+Inf" if bound == float("inf") else f"{bound:g}"), total
+
+
+class QueryMetrics(MetricsSink):
+    """In-memory sink, keyed by operation, with Prometheus text output."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statement_seconds: dict[str, Histogram] = {}
+        self.operation_seconds: dict[str, Histogram] = {}
+        self.round_trips: dict[str, Histogram] = {}
+        self.rows: dict[str, int] = {}
+        self.slow_queries: dict[str, int] = {}
+
+    def record_statement(self, operation: str, seconds: float, rows: int) -> None:
+        with self._lock:
+            _histogram(self.statement_seconds, operation, LATENCY_BUCKETS).observe(seconds)
+            self.rows[operation] = self.rows.get(operation, 0) + rows
+
+    def record_operation(
+        self, operation: str, seconds: float, round_trips: int, rows: int
+    ) -> None:
+        with self._lock:
+            _histogram(self.operation_seconds, operation, LATENCY_BUCKETS).observe(seconds)
+            _histogram(self.round_trips, operation, ROUND_TRIP_BUCKETS).observe(round_trips)
+
+    def record_slow_query(self, query: SlowQuery) -> None:
+        with self._lock:
+            self.slow_queries[query.operation] = self.slow_queries.get(query.operation, 0) + 1
+
+    def summary(self, operation: str) -> dict:
+        """Return call, statement and row totals for one operation."""
+        with self._lock:
+            calls = self.operation_seconds.get(operation)
+            statements = self.statement_seconds.get(operation)
+            return {
+                "calls": calls.count if calls else 0,
+                "seconds": calls.sum if calls else 0.0,
+                "statements": statements.count if statements else 0,
+                "statement_seconds": statements.sum if statements else 0.0,
+                "rows": self.rows.get(operation, 0),
+                "slow_queries": self.slow_queries.get(operation, 0),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            for values in (
+                self.statement_seconds,
+                self.operation_seconds,
+                self.round_trips,
+                self.rows,
+                self.slow_queries,
+            ):
+                values.clear()
+
+    def prometheus_text(self, prefix: str = "outreach_db") -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            _histogram_lines(
+                lines,
+                f"{prefix}_statement_duration_seconds",
+                "Latency of single SQL statements.",
+                self.statement_seconds,
+            )
+            _counter_lines(
+                lines,
+                f"{prefix}_statement_rows_total",
+                "Rows returned or affected by SQL statements.",
+                self.rows,
+            )
+            _histogram_lines(
+                lines,
+                f"{prefix}_operation_duration_seconds",
+                "Latency of tracked operations.",
+                self.operation_seconds,
+            )
+            _histogram_lines(
+                lines,
+                f"{prefix}_operation_round_trips",
+                "SQL statements per tracked operation.",
+                self.round_trips,
+            )
+            _counter_lines(
+                lines,
+                f"{prefix}_slow_statements_total",
+                "Statements over the slow-query threshold.",
+                self.slow_queries,
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _histogram(histograms: dict, operation: str, buckets) -> Histogram:
+    histogram = histograms.get(operation)
+    if histogram is None:
+        histogram = histograms[operation] = Histogram(buckets)
+    return histogram
+
+
+def _label(operation: str) -> str:
+    escaped = operation.replace("\\", "\\\\").replace('"', '\\"')
+    return f'operation="{escaped}"'
+
+
+def _histogram_lines(lines: list, name: str, help: str, histograms: dict) -> None:
+    lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for operation, histogram in sorted(histograms.items()):
+        label = _label(operation)
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f"{name}_sum{{{label}}} {histogram.sum:g}")
+        lines.append(f"{name}_count{{{label}}} {histogram.count}")
+
+
+def _counter_lines(lines: list, name: str, help: str, counters: dict) -> None:
+    lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+    for operation, value in sorted(counters.items()):
+        lines.append(f"{name}{{{_label(operation)}}} {value}")
+
+
+@dataclass
+class _Operation:
+    name: str
+    start: float = field(default_factory=time.perf_counter)
+    # [round trips, rows] per instrumentation that saw this operation's
+    # statements; each counts only the statements it saw.
+    counts: dict = field(default_factory=dict)
+
+    def record(self, instrumentation: "Instrumentation", rows: int) -> None:
+        counts = self.counts.setdefault(instrumentation, [0, 0])
+        counts[0] += 1
+        counts[1] += rows
+
+    def finish(self) -> None:
+        seconds = time.perf_counter() - self.start
+        for instrumentation, (round_trips, rows) in self.counts.items():
+            instrumentation.sink.record_operation(self.name, seconds, round_trips, rows)
+
+
+_current_operation: contextvars.ContextVar[_Operation | None] = contextvars.ContextVar(
+    "outreach_operation", default=None
+)
+
+
+def current_operation() -> str:
+    """Name of the operation statements are attributed to right now."""
+    operation = _current_operation.get()
+    return operation.name if operation else UNTRACKED
+
+
+@contextmanager
+def track_operation(name: str) -> Iterator[None]:
+    """Attribute the statements run inside the block to ``name``.
+
+    Nested operations belong to the outermost one, so a crud function
+    calling another counts as one logical operation.
+    """
+    if _current_operation.get() is not None:
+        yield
+        return
+    operation = _Operation(name)
+    token = _current_operation.set(operation)
+    try:
+        yield
+    finally:
+        _current_operation.reset(token)
+        operation.finish()
+
+
+def tracked(function: Callable) -> Callable:
+    """Decorator running every call of ``function`` as a tracked operation.
+
+    Generator functions are tracked from the first to the last item; the
+    operation is only current while the generator itself runs.
+    """
+    name = function.__name__
+
+    if inspect.isgeneratorfunction(function):
+
+        @functools.wraps(function)
+        def generator_wrapper(*args, **kwargs):
+            if _current_operation.get() is not None:
+                return (yield from function(*args, **kwargs))
+            operation = _Operation(name)
+            generator = function(*args, **kwargs)
+            try:
+                while True:
+                    token = _current_operation.set(operation)
+                    try:
+                        item = next(generator)
+                    except StopIteration as stop:
+                        return stop.value
+                    finally:
+                        _current_operation.reset(token)
+                    yield item
+            finally:
+                generator.close()
+                operation.finish()
+
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with track_operation(name):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+class Instrumentation:
+    """Cursor event listeners attached to one engine; see instrument().
+
+    Several may be attached to the same engine; each keeps its own start
+    times in the connection's info.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        sink: MetricsSink,
+        slow_query_ms: int | None = DEFAULT_SLOW_QUERY_MS,
+        explain: bool = True,
+    ):
+        self.engine = engine
+        self.sink = sink
+        self.slow_query_ms = slow_query_ms
+        self.explain = explain
+        self._start_key = (_START, id(self))
+
+    def attach(self) -> None:
+        event.listen(self.engine, "before_cursor_execute", self._before)
+        event.listen(self.engine, "after_cursor_execute", self._after)
+
+    def detach(self) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._before)
+        event.remove(self.engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info[self._start_key] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop(self._start_key, None)
+        if start is None:
+            return
+        seconds = time.perf_counter() - start
+        # -1 when the driver does not know, e.g. SELECTs on SQLite.
+        rows = max(cursor.rowcount, 0)
+
+        operation = _current_operation.get()
+        if operation is None:
+            name = UNTRACKED
+        else:
+            name = operation.name
+            operation.record(self, rows)
+        self.sink.record_statement(name, seconds, rows)
+
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            plan = None
+            if self.explain and not executemany:
+                plan = _explain(conn, statement, parameters)
+            query = SlowQuery(name, statement, parameters, seconds, rows, plan)
+            self.sink.record_slow_query(query)
+            logger.warning(
+                "Slow query in %s: %.1f ms, %d rows\n%s%s",
+                name,
+                seconds * 1000,
+                rows,
+                statement[:_SLOW_QUERY_LOG_CHARS],
+                f"\n{plan}" if plan else "",
+            )
+
+
+def _explain(conn, statement: str, parameters) -> str | None:
+    """Return the plan of a statement that just ran on ``conn``, if it has one.
+
+    EXPLAIN without ANALYZE does not execute the statement. It runs on the
+    raw DBAPI connection, so it fires no events of its own; on PostgreSQL a
+    savepoint keeps a failing EXPLAIN from aborting the caller's transaction.
+    """
+    if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+        return None
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        prefix = "EXPLAIN "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+
+    dbapi_connection = conn.connection.dbapi_connection
+    savepoint = dialect == "postgresql" and not getattr(dbapi_connection, "autocommit", False)
+    cursor = dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT outreach_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(
+                row[0] if len(row) == 1 else " ".join(str(value) for value in row)
+                for row in cursor.fetchall()
+            )
+        except Exception as exc:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT outreach_explain")
+            logger.debug("Could not EXPLAIN slow query: %s", exc)
+            return None
+        finally:
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT outreach_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def instrument(
+    engine: Engine,
+    sink: MetricsSink | None = None,
+    slow_query_ms: int | None = DEFAULT_SLOW_QUERY_MS,
+    explain: bool = True,
+) -> Instrumentation:
+    """Start recording statement metrics for ``engine``.
+
+    ``sink`` defaults to a new QueryMetrics. Statements taking at least
+    ``slow_query_ms`` milliseconds are logged, with their EXPLAIN plan when
+    ``explain`` is set; 0 or None turns the slow-query log off. Call
+    ``detach()`` on the result to stop.
+    """
+    instrumentation = Instrumentation(
+        engine, sink if sink is not None else QueryMetrics(), slow_query_ms, explain
+    )
+    instrumentation.attach()
+    return instrumentation
+
+
+def instrument_from_environment(
+    engine: Engine, sink: MetricsSink | None = None
+) -> Instrumentation | None:
+    """Instrument ``engine`` as configured by the OUTREACH_DB_* variables.
+
+    Returns None unless OUTREACH_DB_INSTRUMENT is set.
+    """
+    if not _env_bool(INSTRUMENT_ENV, False):
+        return None
+    return instrument(
+        engine,
+        sink,
+        slow_query_ms=_env_int(SLOW_QUERY_ENV, DEFAULT_SLOW_QUERY_MS),
+        explain=_env_bool(EXPLAIN_ENV, True),
+    )
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A block ran more statements than its query_budget() allows."""
+
+
+@dataclass
+class QueryLog:
+    """Statements run inside a query_budget() block, in order."""
+
+    statements: list[tuple[str, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def repeats(self) -> Counter:
+        """How often each statement text ran."""
+        return Counter(statement for _, statement in self.statements)
+
+    def by_operation(self) -> Counter:
+        """How many statements each operation ran."""
+        return Counter(operation for operation, _ in self.statements)
+
+
+@contextmanager
+def query_budget(
+    engine: Engine, max_queries: int | None = None, max_repeats: int | None = None
+) -> Iterator[QueryLog]:
+    """Fail the block if it runs too many statements on ``engine``.
+
+    Raises QueryBudgetExceeded when the block runs more than ``max_queries``
+    statements in total, or one statement text more than ``max_repeats``
+    times; lazy loads repeat the same SELECT with different parameters, so
+    the latter catches N+1 patterns regardless of the data size. Savepoint
+    statements are not counted. The error lists the statements per
+    operation and the most repeated one.
+
+        with query_budget(engine, max_queries=2):
+            names = [lead.organization.name for lead in crud.get_leads_by_status(
+                session, "pending", load=[crud.LOAD_ORGANIZATION]
+            )]
+    """
+    log = QueryLog()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().lower().startswith(_TRANSACTION_CONTROL):
+            log.statements.append((current_operation(), statement))
+
+    event.listen(engine, "after_cursor_execute", record)
+    try:
+        yield log
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
+
+    problems = []
+    if max_queries is not None and len(log) > max_queries:
+        problems.append(f"{len(log)} statements, budget {max_queries}")
+    if log.statements and max_repeats is not None:
+        statement, count = log.repeats().most_common(1)[0]
+        if count > max_repeats:
+            problems.append(
+                f"one statement ran {count} times, budget {max_repeats} "
+                f"(likely N+1):\n{statement[:_SLOW_QUERY_LOG_CHARS]}"
+            )
+    if problems:
+        operations = ", ".join(
+            f"{operation}: {count}" for operation, count in log.by_operation().items()
+        )
+        raise QueryBudgetExceeded(
+            f"Query budget exceeded; {'; '.join(problems)}\nby operation: {operations}"
+        )
@@ -0,0 +1,166 @@
+"""
+Campaign KPIs: funnel counts and response rates per campaign.
+
+The counters are:
+
+* ``imported``: leads in the campaign
+* ``verified``: leads whose email_verification_status is VERIFIED_EMAIL_STATUS
+* ``emailed``: leads with email_sent_at set
+* ``replied``: leads with reply_received_at set
+* ``positive_replies``: leads in one of POSITIVE_REPLY_STATUSES
+
+On PostgreSQL, triggers on ``leads`` keep them in the ``campaign_kpis``
+rollup table, so reading a dashboard is a primary-key lookup per campaign
+however many leads there are. Other databases, and compute_campaign_kpis(),
+aggregate ``leads`` directly in a single grouped query. Leads moved to
+``archived_leads`` (see outreach.archive) keep counting.
+
+Every write to a campaign's leads also updates that campaign's rollup row,
+so concurrent transactions writing leads of the *same* campaign queue on
+that row until they commit.
+"""
+import uuid
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import (
+    BigInteger,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.orm import Session
+
+from .crud import _any_of, _save
+from .models import (
+    POSITIVE_REPLY_STATUSES,
+    VERIFIED_EMAIL_STATUS,
+    ArchivedLead,
+    Campaign,
+    CampaignKPI,
+    Lead,
+)
+
+KPI_COUNTERS = ("imported", "verified", "emailed", "replied", "positive_replies")
+
+
+@dataclass(frozen=True)
+class CampaignKPIs:
+    """Funnel counts for one campaign."""
+
+    campaign_id: uuid.UUID
+    imported: int = 0
+    verified: int = 0
+    emailed: int = 0
+    replied: int = 0
+    positive_replies: int = 0
+
+    @property
+    def response_rate(self) -> float:
+        """Share of emailed leads that replied."""
+        return self.replied / self.emailed if self.emailed else 0.0
+
+    @property
+    def positive_response_rate(self) -> float:
+        """Share of emailed leads that replied positively."""
+        return self.positive_replies / self.emailed if self.emailed else 0.0
+
+
+def campaign_kpis(
+    session: Session, campaign_ids: Iterable | None = None
+) -> list[CampaignKPIs]:
+    """Return KPIs for the given campaigns, or for every campaign.
+
+    Reads the rollup table on PostgreSQL and aggregates ``leads`` elsewhere.
+    Campaigns without leads are included with zero counts.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return compute_campaign_kpis(session, campaign_ids)
+
+    query = select(
+        Campaign.campaign_id,
+        *(func.coalesce(getattr(CampaignKPI, name), 0) for name in KPI_COUNTERS),
+    ).outerjoin(CampaignKPI, CampaignKPI.campaign_id == Campaign.campaign_id)
+    if campaign_ids is not None:
+        query = query.where(_any_of(session, Campaign.campaign_id, list(campaign_ids)))
+    return [CampaignKPIs(*row) for row in session.execute(query)]
+
+
+def compute_campaign_kpis(
+    session: Session, campaign_ids: Iterable | None = None
+) -> list[CampaignKPIs]:
+    """Aggregate KPIs straight from ``leads`` and ``archived_leads``.
+
+    Bypasses the rollup. One grouped query; served by
+    ix_leads_campaign_id_status and ix_archived_leads_campaign_id when
+    filtering by campaign.
+    """
+    counts = _all_lead_counts(session, campaign_ids).subquery()
+
+    query = select(
+        Campaign.campaign_id,
+        *(func.coalesce(counts.c[name], 0) for name in KPI_COUNTERS),
+    ).outerjoin(counts, counts.c.campaign_id == Campaign.campaign_id)
+    if campaign_ids is not None:
+        query = query.where(_any_of(session, Campaign.campaign_id, list(campaign_ids)))
+    return [CampaignKPIs(*row) for row in session.execute(query)]
+
+
+def rebuild_campaign_kpis(session: Session) -> int:
+    """Recompute the rollup table from the leads; returns the rows written.
+
+    Only needed after writes that skip the triggers, such as TRUNCATE or
+    ``session_replication_role = replica`` loads. Lead writes are blocked
+    until the rebuild commits.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(
+            text("LOCK TABLE leads, archived_leads IN SHARE ROW EXCLUSIVE MODE")
+        )
+    session.execute(delete(CampaignKPI))
+    result = session.execute(
+        insert(CampaignKPI).from_select(
+            ("campaign_id", *KPI_COUNTERS), _all_lead_counts(session)
+        )
+    )
+    _save(session)
+    return result.rowcount
+
+
+def _all_lead_counts(session: Session, campaign_ids: Iterable | None = None):
+    """Grouped per-campaign counters over live and archived leads."""
+    parts = []
+    for model in (Lead, ArchivedLead):
+        counts = _lead_counts(model)
+        if campaign_ids is not None:
+            counts = counts.where(
+                _any_of(session, model.campaign_id, list(campaign_ids))
+            )
+        parts.append(counts)
+    both = union_all(*parts).subquery()
+    # sum() of bigint counts is numeric on PostgreSQL; keep them integers.
+    return select(
+        both.c.campaign_id,
+        *(cast(func.sum(both.c[name]), BigInteger).label(name) for name in KPI_COUNTERS),
+    ).group_by(both.c.campaign_id)
+
+
+def _lead_counts(model=Lead):
+    """Grouped per-campaign counters over ``leads`` or ``archived_leads``."""
+
+    def flag(condition):
+        return func.sum(case((condition, 1), else_=0))
+
+    return select(
+        model.campaign_id,
+        func.count().label("imported"),
+        flag(model.email_verification_status == VERIFIED_EMAIL_STATUS).label("verified"),
+        flag(model.email_sent_at.is_not(None)).label("emailed"),
+        flag(model.reply_received_at.is_not(None)).label("replied"),
+        flag(model.status.in_(POSITIVE_REPLY_STATUSES)).label("positive_replies"),
+    ).group_by(model.campaign_id)
@@ -1,16 +1,63 @@
 import logging
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, func
-from sqlalchemy.dialects.postgresql import JSONB, UUID
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    Table,
+    Text,
+    event,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    declared_attr,
+    mapped_column,
+    relationship,
+    validates,
+)
+
+from outreach.types import CompressedJSON, JSONDocument
 
 logger = logging.getLogger(__name__)
 
+# Scraped page and profile blobs; deferred so list and status queries only
+# transfer the small columns. Load them with undefer_group(ENRICHMENT_GROUP).
+ENRICHMENT_GROUP = "enrichment"
+
+
+def normalize_email(email: str | None) -> str | None:
+    """Canonical form of an address for duplicate detection.
+
+    Trims and lowercases it and drops a ``+tag`` from the local part, so
+    ``John.Doe+news@Example.com`` and ``john.doe@example.com`` match.
+    """
+    if email is None:
+        return None
+    email = email.strip().lower()
+    local, at, domain = email.rpartition("@")
+    if not at:
+        return email
+    return f"{local.split('+', 1)[0]}@{domain}"
+
 
 class Base(DeclarativeBase):
     """Base class for all ORM models."""
 
+    # Fetch server defaults (ids, timestamps) with INSERT/UPDATE ... RETURNING
+    # during flush instead of a follow-up SELECT.
+    __mapper_args__ = {"eager_defaults": True}
+
 
 class Campaign(Base):
     __tablename__ = "campaigns"
@@ -28,8 +75,11 @@ class Campaign(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    # passive_deletes: ON DELETE CASCADE removes the leads, so deleting a
+    # campaign does not load them first. Prefer crud.delete_campaign for
+    # large campaigns; it deletes the leads in batches.
     leads: Mapped[list["Lead"]] = relationship(
-        "Lead", back_populates="campaign", cascade="all, delete-orphan"
+        "Lead", back_populates="campaign", cascade="all, delete-orphan", passive_deletes=True
     )
 
     def __repr__(self) -> str:
@@ -38,19 +88,35 @@ class Campaign(Base):
 
 class Organization(Base):
     __tablename__ = "organizations"
+    __table_args__ = (
+        Index(
+            "ix_organizations_website_summary_data",
+            "website_summary_data",
+            postgresql_using="gin",
+            postgresql_ops={"website_summary_data": "jsonb_path_ops"},
+        ),
+    )
 
     organization_id: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
     )
     name: Mapped[str] = mapped_column(String, nullable=False)
-    email_domain: Mapped[str] = mapped_column(String, nullable=False)
+    email_domain: Mapped[str] = mapped_column(
+        String, unique=True, index=True, nullable=False
+    )
     external_id: Mapped[str | None] = mapped_column(String, nullable=True)
     external_source: Mapped[str | None] = mapped_column(String, nullable=True)
     website_url: Mapped[str | None] = mapped_column(String, nullable=True)
     linkedin_url: Mapped[str | None] = mapped_column(String, nullable=True)
     estimated_num_employees: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    website_summary_data: Mapped[dict | None] = mapped_column(String, nullable=True)
-    website_raw_data: Mapped[dict | None] = mapped_column(String, nullable=True)
+    website_summary_data: Mapped[dict | None] = mapped_column(
+        JSONDocument, nullable=True, deferred=True, deferred_group=ENRICHMENT_GROUP
+    )
+    # Write-once scrape output, rarely read back; compressed with the codec
+    # set by OUTREACH_JSON_CODEC (see outreach.types).
+    website_raw_data: Mapped[dict | None] = mapped_column(
+        CompressedJSON(), nullable=True, deferred=True, deferred_group=ENRICHMENT_GROUP
+    )
     country: Mapped[str | None] = mapped_column(String, nullable=True)
     language: Mapped[str | None] = mapped_column(String, nullable=True)
     time_zone: Mapped[str | None] = mapped_column(String, nullable=True)
@@ -69,7 +135,10 @@ class Organization(Base):
     )
 
     leads: Mapped[list["Lead"]] = relationship(
-        "Lead", back_populates="organization", cascade="all, delete-orphan"
+        "Lead",
+        back_populates="organization",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def __repr__(self) -> str:
@@ -77,25 +146,103 @@ class Organization(Base):
 
 
 class Lead(Base):
+    """A person to contact in a campaign.
+
+    On PostgreSQL ``leads`` is partitioned by month of ``created_at``; see
+    outreach.partitions. The partition key has to be part of the table's
+    primary key, so the key is ``(lead_id, created_at)``, while the mapper
+    still identifies a lead by ``lead_id`` alone. The ``lead_ids`` table
+    keeps lead_id unique across partitions; see LEAD_KEY_DDL.
+    """
+
     __tablename__ = "leads"
+    __table_args__ = (
+        PrimaryKeyConstraint("lead_id", "created_at", name="leads_pkey"),
+        # What the primary key guarantees on PostgreSQL only per partition;
+        # there LEAD_KEY_DDL's lead_ids table does.
+        Index("ix_leads_lead_id", "lead_id", unique=True).ddl_if(dialect="sqlite"),
+        Index("ix_leads_status_created_at", "status", "created_at", "lead_id"),
+        Index("ix_leads_campaign_id_status", "campaign_id", "status"),
+        Index(
+            "ix_leads_unsent",
+            "campaign_id",
+            "created_at",
+            postgresql_where=text("email_sent_at IS NULL"),
+            sqlite_where=text("email_sent_at IS NULL"),
+        ),
+        # Send queue: what claim_leads_for_sending scans, in claim order.
+        Index(
+            "ix_leads_send_queue",
+            "campaign_id",
+            "created_at",
+            "lead_id",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+        # Per-recipient send queues, for outreach.scheduler.
+        Index(
+            "ix_leads_pending_by_company",
+            "campaign_id",
+            "company_id",
+            "created_at",
+            "lead_id",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+        # Recent sends per campaign, for daily caps.
+        Index(
+            "ix_leads_campaign_email_sent_at",
+            "campaign_id",
+            "email_sent_at",
+            postgresql_where=text("email_sent_at IS NOT NULL"),
+            sqlite_where=text("email_sent_at IS NOT NULL"),
+        ),
+        # Has this address been contacted (recently), in any campaign?
+        Index(
+            "ix_leads_email_normalized_contacted",
+            "email_normalized",
+            "last_contacted_at",
+        ),
+        # Outstanding leases, for the reaper.
+        Index(
+            "ix_leads_sending_lease",
+            "lease_expires_at",
+            postgresql_where=text("status = 'sending'"),
+            sqlite_where=text("status = 'sending'"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict:
+        return {**Base.__mapper_args__, "primary_key": [cls.__table__.c.lead_id]}
 
     lead_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
+        UUID(as_uuid=True), server_default=func.gen_random_uuid()
     )
     campaign_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("campaigns.campaign_id"), nullable=False
+        UUID(as_uuid=True),
+        ForeignKey("campaigns.campaign_id", ondelete="CASCADE"),
+        nullable=False,
     )
     company_id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("organizations.organization_id"), nullable=False
+        UUID(as_uuid=True),
+        ForeignKey("organizations.organization_id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
     )
     first_name: Mapped[str | None] = mapped_column(String, nullable=True)
     last_name: Mapped[str | None] = mapped_column(String, nullable=True)
     email: Mapped[str] = mapped_column(String, index=True, nullable=False)
+    # normalize_email(email), kept in step by the ORM and the bulk importer.
+    email_normalized: Mapped[str | None] = mapped_column(String, nullable=True)
     external_id: Mapped[str | None] = mapped_column(String, nullable=True)
     title: Mapped[str | None] = mapped_column(String, nullable=True)
     headline: Mapped[str | None] = mapped_column(String, nullable=True)
     linkedin_url: Mapped[str | None] = mapped_column(String, nullable=True)
-    linkedin_data: Mapped[str | None] = mapped_column(String, nullable=True)
+    linkedin_data: Mapped[str | None] = mapped_column(
+        String, nullable=True, deferred=True, deferred_group=ENRICHMENT_GROUP
+    )
     email_verification_status: Mapped[str | None] = mapped_column(String, nullable=True)
     email_verification_message: Mapped[str | None] = mapped_column(
         String, nullable=True
@@ -103,7 +250,7 @@ class Lead(Base):
     email_icebreaker: Mapped[str | None] = mapped_column(String, nullable=True)
     status: Mapped[str] = mapped_column(String, nullable=False)
     external_datasetid: Mapped[str | None] = mapped_column(String, nullable=True)
-    import_run: Mapped[str | None] = mapped_column(String, nullable=True)
+    import_run: Mapped[str | None] = mapped_column(String, index=True, nullable=True)
     language: Mapped[str | None] = mapped_column(String, nullable=True)
     source: Mapped[str | None] = mapped_column(String, nullable=True)
     email_sent_at: Mapped[datetime | None] = mapped_column(
@@ -115,6 +262,11 @@ class Lead(Base):
     last_contacted_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
+    # Set while a sending worker holds the lead (status 'sending').
+    claimed_by: Mapped[str | None] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -127,16 +279,353 @@ class Lead(Base):
         "Organization", back_populates="leads"
     )
 
+    @validates("email")
+    def _set_email_normalized(self, key: str, email: str) -> str:
+        self.email_normalized = normalize_email(email)
+        return email
+
     def __repr__(self) -> str:
         return f"<Lead id={self.lead_id} email={self.email}>"
 
 
+class ArchivedLead(Base):
+    """A lead of an archived campaign, moved out of ``leads``; see outreach.archive.
+
+    Same columns as ``leads`` plus ``archived_at``, without the send-path
+    indexes or the organization key; archived leads are only read back
+    by campaign. They still count in the campaign's KPIs.
+    """
+
+    __table__ = Table(
+        "archived_leads",
+        Base.metadata,
+        *(
+            Column(
+                column.name,
+                column.type,
+                primary_key=column.name == "lead_id",
+                nullable=column.nullable,
+            )
+            for column in Lead.__table__.columns
+        ),
+        Column("archived_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+        ForeignKeyConstraint(["campaign_id"], ["campaigns.campaign_id"], ondelete="CASCADE"),
+        Index("ix_archived_leads_campaign_id", "campaign_id"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ArchivedLead id={self.lead_id} email={self.email}>"
+
+
+class Reply(Base):
+    """An incoming email, matched to the lead it answers; see outreach.replies.
+
+    ``lead_id`` and ``campaign_id`` are NULL for messages from unknown
+    addresses. There is no foreign key to ``leads``, whose rows move to
+    ``archived_leads`` and whose partitions get dropped; the campaign is
+    copied onto the reply so campaign searches need no join. Full-text
+    search uses a generated ``search_vector`` column on PostgreSQL and the
+    ``replies_fts`` FTS5 table on SQLite; both are created by REPLY_SEARCH_DDL.
+    """
+
+    __tablename__ = "replies"
+    __table_args__ = (
+        # A campaign's replies, newest first, for listing and search pages.
+        Index(
+            "ix_replies_campaign_id_received_at", "campaign_id", "received_at", "reply_id"
+        ),
+    )
+
+    reply_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
+    )
+    # The Message-ID header; ingesting a message twice stores it once.
+    message_id: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    lead_id: Mapped[UUID | None] = mapped_column(
+        UUID(as_uuid=True), index=True, nullable=True
+    )
+    campaign_id: Mapped[UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("campaigns.campaign_id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    from_email: Mapped[str] = mapped_column(String, nullable=False)
+    subject: Mapped[str | None] = mapped_column(String, nullable=True)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Set by the application's classifier, e.g. 'interested' or 'unsubscribe'.
+    classification: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<Reply id={self.reply_id} from={self.from_email}>"
+
+
+class CampaignKPI(Base):
+    """Per-campaign funnel counters, kept current by triggers on ``leads``.
+
+    See outreach.kpi for the definitions and for reading them.
+    """
+
+    __tablename__ = "campaign_kpis"
+
+    campaign_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("campaigns.campaign_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    imported: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    verified: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    emailed: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    replied: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    positive_replies: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default="0"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<CampaignKPI campaign_id={self.campaign_id} imported={self.imported}>"
+
+
+# Lead statuses and verification result counted by the KPI rollup.
+VERIFIED_EMAIL_STATUS = "valid"
+POSITIVE_REPLY_STATUSES = ("interested",)
+
+_POSITIVE_REPLY_SQL = ", ".join(f"'{status}'" for status in POSITIVE_REPLY_STATUSES)
+
+# Each changed row contributes ``sign`` (+1 new, -1 old) to every counter it
+# matches.
+_KPI_CHANGES = f"""
+            SELECT campaign_id,
+                   {{sign}} AS imported,
+                   {{sign}} * (email_verification_status IS NOT DISTINCT FROM '{VERIFIED_EMAIL_STATUS}')::int,
+                   {{sign}} * (email_sent_at IS NOT NULL)::int,
+                   {{sign}} * (reply_received_at IS NOT NULL)::int,
+                   {{sign}} * (status IN ({_POSITIVE_REPLY_SQL}))::int
+            FROM {{table}}"""
+
+# Adds the per-campaign sums over ``changes`` to campaign_kpis.
+_KPI_APPLY = """
+            INSERT INTO campaign_kpis AS k (
+                campaign_id, imported, verified, emailed, replied, positive_replies
+            )
+            SELECT campaign_id, sum(imported), sum(verified), sum(emailed),
+                   sum(replied), sum(positive_replies)
+            FROM ({changes}
+            ) AS changes (campaign_id, imported, verified, emailed, replied,
+                          positive_replies)
+            GROUP BY campaign_id
+            -- Updates that leave every counter unchanged (icebreakers,
+            -- enrichment) neither write nor lock the rollup row.
+            HAVING (sum(imported), sum(verified), sum(emailed), sum(replied),
+                    sum(positive_replies)) <> (0, 0, 0, 0, 0)
+            ON CONFLICT (campaign_id) DO UPDATE SET
+                imported = k.imported + excluded.imported,
+                verified = k.verified + excluded.verified,
+                emailed = k.emailed + excluded.emailed,
+                replied = k.replied + excluded.replied,
+                positive_replies = k.positive_replies + excluded.positive_replies,
+                updated_at = now();"""
+_KPI_NEW_ROWS = _KPI_CHANGES.format(sign="1", table="new_leads")
+_KPI_OLD_ROWS = _KPI_CHANGES.format(sign="-1", table="old_leads")
+_KPI_UPDATED_ROWS = _KPI_NEW_ROWS + "\n            UNION ALL" + _KPI_OLD_ROWS
+# Leads deleted by ON DELETE CASCADE belong to a campaign that is already
+# gone, together with its rollup row; re-creating that row would fail its
+# foreign key.
+_KPI_DELETED_ROWS = (
+    _KPI_OLD_ROWS + "\n            WHERE campaign_id IN (SELECT campaign_id FROM campaigns)"
+)
+
+# Statement-level triggers see every row a statement touched through its
+# transition tables, so a COPY merge or bulk status update costs one grouped
+# upsert into campaign_kpis rather than one per row. Each operation gets its
+# own branch because a transition table only exists for the events that
+# declare it. archived_leads runs the same function, so moving a lead into
+# the archive leaves its campaign's counters unchanged.
+CAMPAIGN_KPI_TRIGGER_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION campaign_kpis_apply_lead_changes() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN{_KPI_APPLY.format(changes=_KPI_NEW_ROWS)}
+        ELSIF TG_OP = 'UPDATE' THEN{_KPI_APPLY.format(changes=_KPI_UPDATED_ROWS)}
+        ELSE{_KPI_APPLY.format(changes=_KPI_DELETED_ROWS)}
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER leads_campaign_kpis_insert AFTER INSERT ON leads
+    REFERENCING NEW TABLE AS new_leads
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_kpis_apply_lead_changes()
+    """,
+    """
+    CREATE TRIGGER leads_campaign_kpis_update AFTER UPDATE ON leads
+    REFERENCING OLD TABLE AS old_leads NEW TABLE AS new_leads
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_kpis_apply_lead_changes()
+    """,
+    """
+    CREATE TRIGGER leads_campaign_kpis_delete AFTER DELETE ON leads
+    REFERENCING OLD TABLE AS old_leads
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_kpis_apply_lead_changes()
+    """,
+]
+
+# archived_leads may be created before leads, so it (re)creates the function.
+ARCHIVED_LEAD_KPI_TRIGGER_DDL = [
+    CAMPAIGN_KPI_TRIGGER_DDL[0],
+    """
+    CREATE TRIGGER archived_leads_campaign_kpis_insert AFTER INSERT ON archived_leads
+    REFERENCING NEW TABLE AS new_leads
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_kpis_apply_lead_changes()
+    """,
+    """
+    CREATE TRIGGER archived_leads_campaign_kpis_delete AFTER DELETE ON archived_leads
+    REFERENCING OLD TABLE AS old_leads
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_kpis_apply_lead_changes()
+    """,
+]
+
+# Text search configuration of Reply.search_vector.
+REPLY_SEARCH_CONFIG = "english"
+
+# PostgreSQL keeps a stemmed tsvector of subject and body in a generated
+# column, searched through a GIN index. SQLite keeps an external-content
+# FTS5 index in step with triggers, keyed by the replies rowid.
+REPLY_SEARCH_DDL = {
+    "postgresql": [
+        f"""
+        ALTER TABLE replies ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            to_tsvector('{REPLY_SEARCH_CONFIG}', coalesce(subject, '') || ' ' || body)
+        ) STORED
+        """,
+        "CREATE INDEX ix_replies_search_vector ON replies USING gin (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE replies_fts USING fts5(
+            subject, body, content='replies', content_rowid='rowid', tokenize='porter'
+        )
+        """,
+        """
+        CREATE TRIGGER replies_fts_insert AFTER INSERT ON replies BEGIN
+            INSERT INTO replies_fts (rowid, subject, body)
+            VALUES (new.rowid, new.subject, new.body);
+        END
+        """,
+        """
+        CREATE TRIGGER replies_fts_delete AFTER DELETE ON replies BEGIN
+            INSERT INTO replies_fts (replies_fts, rowid, subject, body)
+            VALUES ('delete', old.rowid, old.subject, old.body);
+        END
+        """,
+        """
+        CREATE TRIGGER replies_fts_update AFTER UPDATE OF subject, body ON replies BEGIN
+            INSERT INTO replies_fts (replies_fts, rowid, subject, body)
+            VALUES ('delete', old.rowid, old.subject, old.body);
+            INSERT INTO replies_fts (rowid, subject, body)
+            VALUES (new.rowid, new.subject, new.body);
+        END
+        """,
+    ],
+}
+
+for _dialect, _statements in REPLY_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            Reply.__table__,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
+# The FTS5 table is not in the metadata, so drop_all would leave it behind.
+event.listen(
+    Reply.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS replies_fts").execute_if(dialect="sqlite"),
+)
+
+# Rows outside every monthly partition land here until outreach.partitions
+# creates their month and moves them.
+LEAD_DEFAULT_PARTITION_DDL = "CREATE TABLE leads_default PARTITION OF leads DEFAULT"
+
+# The primary key of a partitioned leads has to include created_at, so it
+# only keeps lead_id unique within a partition. lead_ids holds every lead_id
+# in leads under its own primary key, kept in step by triggers, so a second
+# lead with a taken lead_id fails with a unique violation whatever its
+# created_at. Inserts and deletes are one statement per statement, through
+# the transition tables; a lead_id is only changed row by row, and rarely.
+LEAD_KEY_TABLE = "lead_ids"
+LEAD_KEY_DDL = [
+    f"CREATE TABLE {LEAD_KEY_TABLE} (lead_id uuid PRIMARY KEY)",
+    f"""
+    CREATE OR REPLACE FUNCTION lead_ids_apply_lead_changes() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO {LEAD_KEY_TABLE} SELECT lead_id FROM new_leads;
+        ELSIF TG_OP = 'DELETE' THEN
+            DELETE FROM {LEAD_KEY_TABLE} WHERE lead_id IN (SELECT lead_id FROM old_leads);
+        ELSE
+            UPDATE {LEAD_KEY_TABLE} SET lead_id = NEW.lead_id WHERE lead_id = OLD.lead_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER leads_lead_ids_insert AFTER INSERT ON leads
+    REFERENCING NEW TABLE AS new_leads
+    FOR EACH STATEMENT EXECUTE FUNCTION lead_ids_apply_lead_changes()
+    """,
+    """
+    CREATE TRIGGER leads_lead_ids_update AFTER UPDATE OF lead_id ON leads
+    FOR EACH ROW WHEN (OLD.lead_id IS DISTINCT FROM NEW.lead_id)
+    EXECUTE FUNCTION lead_ids_apply_lead_changes()
+    """,
+    """
+    CREATE TRIGGER leads_lead_ids_delete AFTER DELETE ON leads
+    REFERENCING OLD TABLE AS old_leads
+    FOR EACH STATEMENT EXECUTE FUNCTION lead_ids_apply_lead_changes()
+    """,
+]
+
+for _table, _statements in (
+    (
+        Lead.__table__,
+        [LEAD_DEFAULT_PARTITION_DDL, *LEAD_KEY_DDL, *CAMPAIGN_KPI_TRIGGER_DDL],
+    ),
+    (ArchivedLead.__table__, ARCHIVED_LEAD_KPI_TRIGGER_DDL),
+):
+    for _statement in _statements:
+        event.listen(
+            _table,
+            "after_create",
+            DDL(_statement).execute_if(dialect="postgresql"),
+        )
+
+
+# lead_ids is not in the metadata either.
+event.listen(
+    Lead.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {LEAD_KEY_TABLE}").execute_if(dialect="postgresql"),
+)
+
+
 def init_db():
     """Initialize the database and create all tables."""
-    from outreach.database import engine
+    from outreach.database import SessionLocal, engine
+    from outreach.partitions import ensure_lead_partitions
 
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        ensure_lead_partitions(db)
     logger.info("Database tables created.")
 
 
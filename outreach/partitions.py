@@ -0,0 +1,212 @@
+"""
+Monthly partitions of ``leads`` on PostgreSQL.
+
+``leads`` is partitioned by range of ``created_at``: one partition per
+calendar month (UTC) named ``leads_pYYYY_MM``, plus ``leads_default`` for
+rows that fall outside all of them. Old leads then go away by dropping a
+partition, which is instant and leaves no dead rows for vacuum, and every
+index stays the size of a month or so of leads.
+
+ensure_lead_partitions() creates the partitions for the current month and
+PARTITION_MONTHS_AHEAD months after it; run it daily, e.g. with
+cli/maintain_lead_partitions.py, so new leads never reach the default
+partition. drop_expired_lead_partitions() detaches and drops the months
+older than a retention period.
+
+Both take their locks on ``leads`` with LOCK_TIMEOUT_MS, so a statement
+waiting behind a long query fails rather than stalling every write queued
+behind it; run them again later. Dropped partitions fire no triggers, so
+campaign_kpis keep counting their leads, as for archived ones;
+kpi.rebuild_campaign_kpis() recounts from what is left. Their lead_ids are
+released from the ``lead_ids`` key table explicitly.
+
+Other databases have a plain ``leads`` table and nothing to do here.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .crud import _save
+from .instrumentation import tracked
+from .models import LEAD_KEY_TABLE, Lead
+
+logger = logging.getLogger(__name__)
+
+PARTITION_MONTHS_AHEAD = 3
+LOCK_TIMEOUT_MS = 2000
+DEFAULT_PARTITION = "leads_default"
+
+_NAME = re.compile(r"^leads_p(\d{4})_(\d{2})$")
+_COLUMN_LIST = ", ".join(column.name for column in Lead.__table__.columns)
+
+
+@dataclass(frozen=True)
+class LeadPartition:
+    """A monthly partition holding leads created in ``[start, end)``."""
+
+    name: str
+    start: date
+
+    @property
+    def end(self) -> date:
+        return _add_months(self.start, 1)
+
+    @classmethod
+    def for_month(cls, month: date) -> "LeadPartition":
+        return cls(f"leads_p{month.year:04d}_{month.month:02d}", month)
+
+
+def lead_partitions(session: Session) -> list[LeadPartition]:
+    """The monthly partitions of ``leads``, oldest first."""
+    if session.get_bind().dialect.name != "postgresql":
+        return []
+    names = session.scalars(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'leads'::regclass"
+        )
+    )
+    partitions = []
+    for name in names:
+        match = _NAME.match(name)
+        if match:
+            partitions.append(
+                LeadPartition(name, date(int(match[1]), int(match[2]), 1))
+            )
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+@tracked
+def ensure_lead_partitions(
+    session: Session,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    now: datetime | None = None,
+) -> list[str]:
+    """Create the missing partitions up to ``months_ahead`` months from now.
+
+    Returns the names of the partitions created. Leads of those months that
+    already sit in the default partition are moved into theirs.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return []
+    current = _month_of(now)
+    existing = {partition.start for partition in lead_partitions(session)}
+    created = []
+    for offset in range(months_ahead + 1):
+        month = _add_months(current, offset)
+        if month not in existing:
+            created.append(_create_partition(session, LeadPartition.for_month(month)))
+    _save(session)
+    if created:
+        logger.info("Created lead partitions %s", ", ".join(created))
+    return created
+
+
+@tracked
+def drop_expired_lead_partitions(
+    session: Session,
+    retain_months: int,
+    now: datetime | None = None,
+    drop: bool = True,
+) -> list[str]:
+    """Detach the partitions older than ``retain_months`` whole months.
+
+    The current month and the ``retain_months`` before it are kept. Detached
+    partitions are dropped unless ``drop`` is false, which leaves them as
+    standalone tables to dump or archive first. Returns their names.
+    """
+    if retain_months < 0:
+        raise ValueError("retain_months must not be negative")
+    if session.get_bind().dialect.name != "postgresql":
+        return []
+    cutoff = _add_months(_month_of(now), -retain_months)
+    expired = [
+        partition.name
+        for partition in lead_partitions(session)
+        if partition.end <= cutoff
+    ]
+    for name in expired:
+        _lock_timeout(session)
+        session.execute(text(f"ALTER TABLE leads DETACH PARTITION {name}"))
+        session.execute(
+            text(
+                f"DELETE FROM {LEAD_KEY_TABLE} "
+                f"WHERE lead_id IN (SELECT lead_id FROM {name})"
+            )
+        )
+        if drop:
+            session.execute(text(f"DROP TABLE {name}"))
+    _save(session)
+    if expired:
+        logger.info(
+            "%s lead partitions %s", "Dropped" if drop else "Detached", ", ".join(expired)
+        )
+    return expired
+
+
+def _create_partition(session: Session, partition: LeadPartition) -> str:
+    """Build a month's partition beside ``leads`` and attach it.
+
+    ATTACH PARTITION only needs a lock that lets reads and writes of
+    ``leads`` through, unlike CREATE TABLE ... PARTITION OF. The CHECK
+    constraint spares it a scan of the new table; leads already in the
+    default partition for the month are moved before it is attached.
+    """
+    name = partition.name
+    start, end = _bound(partition.start), _bound(partition.end)
+    session.execute(
+        text(
+            f"CREATE TABLE {name} (LIKE leads INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    session.execute(
+        text(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+            f"CHECK (created_at >= {start} AND created_at < {end})"
+        )
+    )
+    _lock_timeout(session)
+    # Moves within the partitions of leads, so the KPI triggers, which
+    # are on leads itself, do not count the moved leads again.
+    moved = session.execute(
+        text(
+            f"WITH moved AS ("
+            f"DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE created_at >= {start} AND created_at < {end} "
+            f"RETURNING {_COLUMN_LIST}) "
+            f"INSERT INTO {name} ({_COLUMN_LIST}) SELECT {_COLUMN_LIST} FROM moved"
+        )
+    ).rowcount
+    if moved:
+        logger.info("Moved %d leads from %s to %s", moved, DEFAULT_PARTITION, name)
+    session.execute(
+        text(
+            f"ALTER TABLE leads ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ({start}) TO ({end})"
+        )
+    )
+    return name
+
+
+def _lock_timeout(session: Session) -> None:
+    session.execute(text(f"SET LOCAL lock_timeout = {LOCK_TIMEOUT_MS}"))
+
+
+def _bound(month: date) -> str:
+    """A month's first instant as a literal, in UTC whatever the session's TimeZone."""
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def _month_of(now: datetime | None) -> date:
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    return date(now.year, now.month, 1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
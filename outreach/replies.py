@@ -0,0 +1,214 @@
+"""
+Incoming replies: bulk ingestion, classification and full-text search.
+
+ingest_replies() stores messages REPLY_INGEST_BATCH_SIZE at a time. Each
+batch looks up its senders' leads in one ``= ANY(:emails)`` query on
+``email_normalized`` (ix_leads_email_normalized_contacted), inserts the
+replies in one multi-row INSERT, and sets ``reply_received_at`` on the
+matched leads to their first reply, which the KPI triggers count as
+replied. A sender with leads in several campaigns is matched to the one
+contacted last. Messages are keyed by their Message-ID, so re-ingesting a
+mailbox is harmless.
+
+search_replies() finds replies whose subject or body matches a web-search
+style query (``pricing``, ``"call next week"``, ``pricing -unsubscribe``),
+newest first and a page at a time. On PostgreSQL it is a GIN index scan of
+the stemmed ``search_vector``, combined with the campaign index when a
+campaign is given, so its cost follows the matches rather than the number
+of replies. SQLite uses the ``replies_fts`` FTS5 table instead, with plain
+terms only.
+"""
+import re
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy import (
+    Integer,
+    func,
+    literal_column,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.orm import Session
+
+from .crud import _any_of, _batched, _save, _upsert_statement
+from .instrumentation import tracked
+from .models import REPLY_SEARCH_CONFIG, Lead, Reply, normalize_email
+
+REPLY_INGEST_BATCH_SIZE = 1000
+REPLY_SEARCH_LIMIT = 50
+
+_REPLY_FIELDS = ("message_id", "from_email", "subject", "body", "received_at")
+_SEARCH_TERM = re.compile(r"\w+")
+
+
+@dataclass
+class ReplyIngestResult:
+    """Outcome of a reply ingestion."""
+
+    inserted: int = 0
+    skipped: int = 0
+    unmatched: int = 0
+    reply_ids: list[uuid.UUID] = field(default_factory=list)
+
+
+@tracked
+def ingest_replies(
+    session: Session,
+    messages: Iterable[Mapping[str, Any]],
+    batch_size: int = REPLY_INGEST_BATCH_SIZE,
+) -> ReplyIngestResult:
+    """Store incoming messages as replies, matched to leads by sender.
+
+    Each message maps ``message_id``, ``from_email``, ``body`` and
+    ``received_at``, and optionally ``subject``. ``messages`` is consumed
+    lazily. Messages whose ``message_id`` is already stored are skipped;
+    those from unknown senders are stored without a lead.
+    """
+    result = ReplyIngestResult()
+    for batch in _batched(messages, batch_size):
+        records = [_reply_record(message) for message in batch]
+        leads = _match_leads(session, {record["from_email"] for record in records})
+        for record in records:
+            lead = leads.get(normalize_email(record["from_email"]))
+            record["lead_id"] = lead.lead_id if lead else None
+            record["campaign_id"] = lead.campaign_id if lead else None
+
+        statement = (
+            _upsert_statement(session, Reply)
+            .on_conflict_do_nothing(index_elements=["message_id"])
+            .returning(Reply.reply_id, Reply.lead_id)
+        )
+        inserted = session.execute(statement, records).all()
+        result.inserted += len(inserted)
+        result.skipped += len(records) - len(inserted)
+        result.unmatched += sum(lead_id is None for _, lead_id in inserted)
+        result.reply_ids.extend(reply_id for reply_id, _ in inserted)
+        _mark_replied(session, {lead_id for _, lead_id in inserted if lead_id})
+    _save(session)
+    return result
+
+
+@tracked
+def classify_replies(session: Session, classifications: Mapping[uuid.UUID, str]) -> int:
+    """Store classifier labels, one UPDATE per label; returns the rows updated."""
+    by_label = defaultdict(list)
+    for reply_id, label in classifications.items():
+        by_label[label].append(reply_id)
+    updated = 0
+    for label, reply_ids in by_label.items():
+        updated += session.execute(
+            update(Reply)
+            .where(_any_of(session, Reply.reply_id, reply_ids))
+            .values(classification=label),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+    _save(session)
+    return updated
+
+
+@tracked
+def search_replies(
+    session: Session,
+    query: str,
+    campaign_id: uuid.UUID | None = None,
+    limit: int = REPLY_SEARCH_LIMIT,
+    after: Reply | None = None,
+) -> list[Reply]:
+    """Replies matching ``query``, newest first, optionally in one campaign.
+
+    Pass the last reply of a page as ``after`` to get the next one.
+    """
+    statement = select(Reply)
+    if session.get_bind().dialect.name == "postgresql":
+        statement = statement.where(
+            literal_column("replies.search_vector").bool_op("@@")(
+                func.websearch_to_tsquery(REPLY_SEARCH_CONFIG, query)
+            )
+        )
+    else:
+        terms = _SEARCH_TERM.findall(query)
+        if not terms:
+            return []
+        matches = text(
+            "SELECT rowid FROM replies_fts WHERE replies_fts MATCH :match"
+        ).bindparams(match=" ".join(f'"{term}"' for term in terms))
+        statement = statement.where(
+            literal_column("replies.rowid").in_(matches.columns(rowid=Integer))
+        )
+    if campaign_id is not None:
+        statement = statement.where(Reply.campaign_id == campaign_id)
+    if after is not None:
+        statement = statement.where(
+            tuple_(Reply.received_at, Reply.reply_id)
+            < tuple_(after.received_at, after.reply_id)
+        )
+    statement = statement.order_by(
+        Reply.received_at.desc(), Reply.reply_id.desc()
+    ).limit(limit)
+    return list(session.scalars(statement))
+
+
+def _reply_record(message: Mapping[str, Any]) -> dict[str, Any]:
+    """Normalize a message to the Reply columns ingest_replies writes."""
+    unknown = set(message) - set(_REPLY_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown reply fields: {', '.join(sorted(unknown))}")
+    record = {name: message.get(name) for name in _REPLY_FIELDS}
+    record["reply_id"] = uuid.uuid4()
+    return record
+
+
+def _match_leads(session: Session, emails: set[str]) -> dict[str, Any]:
+    """The lead each normalized sender address answers for, if any."""
+    normalized = sorted({normalize_email(email) for email in emails})
+    rows = session.execute(
+        select(
+            Lead.email_normalized,
+            Lead.lead_id,
+            Lead.campaign_id,
+            Lead.last_contacted_at,
+            Lead.created_at,
+        ).where(_any_of(session, Lead.email_normalized, normalized))
+    )
+    matched = {}
+    for row in rows:
+        current = matched.get(row.email_normalized)
+        if current is None or _recency(row) > _recency(current):
+            matched[row.email_normalized] = row
+    return matched
+
+
+def _recency(row) -> tuple:
+    # Contacted leads first, the latest contact winning; then the newest lead.
+    contacted = row.last_contacted_at is not None
+    return contacted, row.last_contacted_at if contacted else row.created_at
+
+
+def _mark_replied(session: Session, lead_ids: set[uuid.UUID]) -> None:
+    """Set reply_received_at to the lead's earliest stored reply.
+
+    Mailboxes are not ingested in order, so an earlier reply found later
+    moves the time back.
+    """
+    if not lead_ids:
+        return
+    first_reply = (
+        select(func.min(Reply.received_at))
+        .where(Reply.lead_id == Lead.lead_id)
+        .scalar_subquery()
+    )
+    session.execute(
+        update(Lead)
+        .where(
+            _any_of(session, Lead.lead_id, sorted(lead_ids)),
+            or_(Lead.reply_received_at.is_(None), Lead.reply_received_at > first_reply),
+        )
+        .values(reply_received_at=first_reply),
+        execution_options={"synchronize_session": False},
+    )
@@ -0,0 +1,334 @@
+"""
+Send scheduling: which pending leads of a campaign go out next.
+
+SendScheduler keeps every recipient organization (one email domain) with
+pending leads in a heap ordered by the earliest moment it may receive mail,
+the latest of:
+
+* the end of its current one-minute window, once SendPolicy.domain_per_minute
+  mails went out in it
+* the next UTC day, once its SendPolicy.domain_daily_cap is spent
+* the next start of business hours in the organization's ``time_zone``
+
+next_batch() pops the domains that are due and claims their oldest pending
+leads in a single statement, the same way crud.claim_leads_for_sending
+does, so its cost grows with the batch size and not with the number of
+pending leads. Counts are loaded with two grouped index scans when the
+scheduler is created; call refresh() to pick up leads imported since.
+
+Limits are tracked in memory, so run one scheduler per campaign. PostgreSQL
+only.
+"""
+import heapq
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import Integer, bindparam, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Session
+
+from .crud import PENDING_STATUS, SEND_LEASE_SECONDS, SENDING_STATUS, _save_claimed
+from .models import Lead, Organization
+
+RATE_WINDOW = timedelta(minutes=1)
+
+# Deferred enrichment blobs are not needed to send and stay unloaded.
+_CLAIMED_COLUMNS = [
+    attribute.columns[0]
+    for attribute in Lead.__mapper__.column_attrs
+    if not attribute.deferred
+]
+
+# Takes up to quotas[i] of the oldest pending leads of company_ids[i], in one
+# statement. Status values are inlined so ix_leads_pending_by_company matches.
+# The picks are materialized so they run once, as in
+# crud.claim_leads_for_sending.
+_CLAIM_BY_COMPANY = (
+    text(
+        f"""
+        WITH picked AS MATERIALIZED (
+            SELECT candidate.lead_id
+            FROM unnest(:company_ids, :quotas) AS quota (company_id, quota)
+            CROSS JOIN LATERAL (
+                SELECT lead_id
+                FROM leads
+                WHERE campaign_id = :campaign_id
+                  AND company_id = quota.company_id
+                  AND status = '{PENDING_STATUS}'
+                ORDER BY created_at, lead_id
+                LIMIT quota.quota
+                FOR UPDATE SKIP LOCKED
+            ) AS candidate
+        )
+        UPDATE leads
+        SET status = '{SENDING_STATUS}',
+            claimed_by = :worker_id,
+            lease_expires_at = now() + make_interval(secs => :lease_seconds),
+            updated_at = now()
+        WHERE lead_id IN (SELECT lead_id FROM picked)
+        RETURNING {", ".join(column.name for column in _CLAIMED_COLUMNS)}
+        """
+    )
+    .bindparams(
+        bindparam("company_ids", type_=ARRAY(UUID(as_uuid=True))),
+        bindparam("quotas", type_=ARRAY(Integer)),
+    )
+    .columns(*_CLAIMED_COLUMNS)
+)
+
+
+@dataclass(frozen=True)
+class SendPolicy:
+    """Limits applied by SendScheduler; ``None`` disables a daily cap."""
+
+    domain_per_minute: int = 20
+    domain_daily_cap: int | None = 200
+    campaign_daily_cap: int | None = None
+    business_hours: tuple[time, time] = (time(9), time(17))
+    business_days: frozenset[int] = frozenset(range(5))  # Monday to Friday
+    default_time_zone: str = "UTC"
+
+    def __post_init__(self):
+        if self.domain_per_minute < 1:
+            raise ValueError("domain_per_minute must be at least 1")
+        if not self.business_days:
+            raise ValueError("business_days must not be empty")
+        if self.business_hours[0] >= self.business_hours[1]:
+            raise ValueError("business_hours must start before they end")
+        if _zone(self.default_time_zone) is None:
+            raise ValueError(f"Unknown time zone {self.default_time_zone!r}")
+
+
+@dataclass
+class _Domain:
+    """Scheduling state of one recipient organization."""
+
+    organization_id: uuid.UUID
+    zone: ZoneInfo
+    pending: int
+    window_start: datetime
+    day: date
+    window_sent: int = 0
+    day_sent: int = 0
+
+
+class SendScheduler:
+    """Hands out send batches for one campaign within a SendPolicy."""
+
+    def __init__(
+        self,
+        session: Session,
+        campaign_id,
+        policy: SendPolicy | None = None,
+        now: datetime | None = None,
+    ):
+        self.session = session
+        self.campaign_id = campaign_id
+        self.policy = policy or SendPolicy()
+        self.refresh(now)
+
+    def refresh(self, now: datetime | None = None) -> None:
+        """Reload pending counts and today's sends from the database."""
+        now = _utc(now)
+        day_start = datetime.combine(now.date(), time(), tzinfo=timezone.utc)
+
+        pending = (
+            select(Lead.company_id, func.count().label("pending"))
+            .where(Lead.campaign_id == self.campaign_id, Lead.status == PENDING_STATUS)
+            .group_by(Lead.company_id)
+            .subquery()
+        )
+        rows = self.session.execute(
+            select(Organization.organization_id, Organization.time_zone, pending.c.pending)
+            .join(pending, pending.c.company_id == Organization.organization_id)
+        )
+        sent = self.session.execute(
+            select(
+                Lead.company_id,
+                func.count(),
+                func.count().filter(Lead.email_sent_at > now - RATE_WINDOW),
+            )
+            .where(Lead.campaign_id == self.campaign_id, Lead.email_sent_at >= day_start)
+            .group_by(Lead.company_id)
+        )
+        sent_today = {company_id: (day, minute) for company_id, day, minute in sent}
+
+        self._campaign_day = now.date()
+        self._campaign_sent = sum(day for day, _ in sent_today.values())
+        self._domains = {}
+        self._heap = []
+        for organization_id, time_zone, count in rows:
+            day_sent, window_sent = sent_today.get(organization_id, (0, 0))
+            domain = _Domain(
+                organization_id=organization_id,
+                zone=_zone(time_zone) or _zone(self.policy.default_time_zone),
+                pending=count,
+                # Treat the last minute's sends as one window starting now.
+                window_start=now,
+                window_sent=window_sent,
+                day=now.date(),
+                day_sent=day_sent,
+            )
+            self._domains[organization_id] = domain
+            self._heap.append((self._ready_at(domain, now), organization_id))
+        heapq.heapify(self._heap)
+
+    @property
+    def pending(self) -> int:
+        """Pending leads still to be scheduled."""
+        return sum(domain.pending for domain in self._domains.values())
+
+    def next_ready_at(self) -> datetime | None:
+        """When the earliest domain becomes due, or None once all are done.
+
+        While SendPolicy.campaign_daily_cap is spent, that is no earlier
+        than the next UTC day, when the cap resets.
+        """
+        if not self._heap:
+            return None
+        ready_at = self._heap[0][0]
+        cap = self.policy.campaign_daily_cap
+        if cap is not None and self._campaign_sent >= cap:
+            ready_at = max(ready_at, _next_day(self._campaign_day))
+        return ready_at
+
+    def next_batch(
+        self,
+        limit: int,
+        worker_id: str,
+        now: datetime | None = None,
+        lease_seconds: int = SEND_LEASE_SECONDS,
+        load: Sequence = (),
+    ) -> list[Lead]:
+        """Claim up to ``limit`` leads that may be sent now.
+
+        The leads are moved to SENDING_STATUS for ``worker_id`` with a lease,
+        exactly as by crud.claim_leads_for_sending, including its ``load``
+        loader options; finish them with crud.finish_claimed_leads. Returns
+        an empty list when nothing is due.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        now = _utc(now)
+        if self._campaign_day != now.date():
+            self._campaign_day, self._campaign_sent = now.date(), 0
+        budget = limit
+        if self.policy.campaign_daily_cap is not None:
+            budget = min(budget, self.policy.campaign_daily_cap - self._campaign_sent)
+
+        quotas = {}
+        while self._heap and self._heap[0][0] <= now and budget > 0:
+            _, organization_id = heapq.heappop(self._heap)
+            domain = self._domains[organization_id]
+            ready_at = self._ready_at(domain, now)
+            if ready_at > now:
+                heapq.heappush(self._heap, (ready_at, organization_id))
+                continue
+            quota = min(budget, domain.pending, self._allowance(domain, now))
+            quotas[organization_id] = quota
+            budget -= quota
+        if not quotas:
+            return []
+
+        leads = self._claim(quotas, worker_id, lease_seconds, load)
+        claimed = Counter(lead.company_id for lead in leads)
+        for organization_id, quota in quotas.items():
+            domain = self._domains[organization_id]
+            count = claimed[organization_id]
+            self._record_sent(domain, count, now)
+            # A short claim means the rest went elsewhere (another worker,
+            # a status change); the next refresh() recounts.
+            domain.pending = domain.pending - count if count == quota else 0
+            if domain.pending:
+                heapq.heappush(self._heap, (self._ready_at(domain, now), organization_id))
+            else:
+                del self._domains[organization_id]
+        self._campaign_sent += len(leads)
+        return leads
+
+    def _claim(
+        self, quotas: dict, worker_id: str, lease_seconds: int, load: Sequence
+    ) -> list[Lead]:
+        statement = select(Lead).from_statement(_CLAIM_BY_COMPANY).options(*load)
+        leads = list(
+            self.session.scalars(
+                statement,
+                {
+                    "campaign_id": self.campaign_id,
+                    "company_ids": list(quotas),
+                    "quotas": list(quotas.values()),
+                    "worker_id": worker_id,
+                    "lease_seconds": lease_seconds,
+                },
+                execution_options={"populate_existing": True},
+            )
+        )
+        _save_claimed(self.session, leads)
+        return leads
+
+    def _allowance(self, domain: _Domain, now: datetime) -> int:
+        """Mails ``domain`` may still receive in its window and today."""
+        window_sent = domain.window_sent if now < domain.window_start + RATE_WINDOW else 0
+        allowance = self.policy.domain_per_minute - window_sent
+        if self.policy.domain_daily_cap is not None:
+            day_sent = domain.day_sent if domain.day == now.date() else 0
+            allowance = min(allowance, self.policy.domain_daily_cap - day_sent)
+        return allowance
+
+    def _record_sent(self, domain: _Domain, count: int, now: datetime) -> None:
+        if now >= domain.window_start + RATE_WINDOW:
+            domain.window_start, domain.window_sent = now, 0
+        if domain.day != now.date():
+            domain.day, domain.day_sent = now.date(), 0
+        domain.window_sent += count
+        domain.day_sent += count
+
+    def _ready_at(self, domain: _Domain, now: datetime) -> datetime:
+        """Earliest moment from ``now`` at which ``domain`` may receive mail."""
+        ready_at = now
+        if self._allowance(domain, now) <= 0:
+            window_end = domain.window_start + RATE_WINDOW
+            if self._allowance(domain, window_end) > 0:
+                ready_at = window_end
+            else:
+                ready_at = _next_day(now.date())
+        return self._business_time(domain.zone, ready_at)
+
+    def _business_time(self, zone: ZoneInfo, moment: datetime) -> datetime:
+        """``moment`` if within business hours in ``zone``, else the next opening."""
+        local = moment.astimezone(zone)
+        opens, closes = self.policy.business_hours
+        for offset in range(8):
+            day = local.date() + timedelta(days=offset)
+            if day.weekday() not in self.policy.business_days:
+                continue
+            closing = datetime.combine(day, closes, tzinfo=zone)
+            if local < closing:
+                opening = datetime.combine(day, opens, tzinfo=zone)
+                return max(local, opening).astimezone(timezone.utc)
+        raise AssertionError("unreachable: business_days is not empty")
+
+
+def _next_day(day: date) -> datetime:
+    """Start of the UTC day after ``day``, when the daily caps reset."""
+    return datetime.combine(day + timedelta(days=1), time(), tzinfo=timezone.utc)
+
+
+def _utc(now: datetime | None) -> datetime:
+    return datetime.now(timezone.utc) if now is None else now.astimezone(timezone.utc)
+
+
+@lru_cache(maxsize=None)
+def _zone(name: str | None) -> ZoneInfo | None:
+    """ZoneInfo for an IANA name, or None when missing or unknown."""
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
@@ -0,0 +1,114 @@
+import gzip
+import json
+import os
+from functools import lru_cache
+
+from sqlalchemy import JSON, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
+
+# JSONB (with its containment operators) on PostgreSQL, plain JSON on the
+# SQLite stand-in.
+JSONDocument = JSONB().with_variant(JSON(), "sqlite")
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# "none" stores the serialized JSON as is; no JSON text starts like either
+# magic number, so reads still tell the three apart.
+CODECS = ("gzip", "zstd", "none")
+
+# Codec CompressedJSON columns write when none is given; unset means zstd
+# if the zstandard package is installed, gzip otherwise.
+CODEC_ENV = "OUTREACH_JSON_CODEC"
+
+
+@lru_cache(maxsize=None)
+def _zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _zstd():
+    """Return the zstandard module; it is only needed for the zstd codec."""
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError(
+            "The zstd codec requires the 'zstandard' package to be installed"
+        ) from exc
+    return zstandard
+
+
+def _check_codec(codec: str) -> str:
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec {codec!r}; expected one of {CODECS}")
+    return codec
+
+
+def default_codec() -> str:
+    """The codec named by OUTREACH_JSON_CODEC, else zstd when available, else gzip."""
+    codec = os.getenv(CODEC_ENV)
+    if codec:
+        return _check_codec(codec.strip().lower())
+    return "zstd" if _zstd_available() else "gzip"
+
+
+def compress_json(value, codec: str | None = None) -> bytes:
+    """Serialize a JSON-compatible value and compress it with ``codec``.
+
+    ``codec`` defaults to default_codec().
+    """
+    codec = _check_codec(codec or default_codec())
+    data = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    if codec == "gzip":
+        # mtime=0 keeps the output deterministic for identical documents.
+        return gzip.compress(data, mtime=0)
+    if codec == "zstd":
+        return _zstd().ZstdCompressor().compress(data)
+    return data
+
+
+def decompress_json(payload: bytes):
+    """Inverse of compress_json; the codec is detected from the payload."""
+    payload = bytes(payload)
+    if payload.startswith(GZIP_MAGIC):
+        data = gzip.decompress(payload)
+    elif payload.startswith(ZSTD_MAGIC):
+        data = _zstd().ZstdDecompressor().decompress(payload)
+    else:
+        data = payload
+    try:
+        return json.loads(data)
+    except ValueError as exc:
+        raise ValueError("Payload is neither compressed nor plain JSON") from exc
+
+
+class CompressedJSON(TypeDecorator):
+    """A JSON document stored compressed in a binary (bytea) column.
+
+    Meant for large write-once documents that are rarely read back.
+    ``codec`` fixes what the column writes; left out, it follows
+    default_codec() at write time, so OUTREACH_JSON_CODEC=none turns
+    compression off. Reads detect the codec, so changing it needs no data
+    rewrite.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, codec: str | None = None):
+        super().__init__()
+        self.codec = codec if codec is None else _check_codec(codec)
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_json(value, self.codec)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_json(value)
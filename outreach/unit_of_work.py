@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from sqlalchemy.orm import Session
+
+# Session.info flag telling crud functions to flush instead of committing.
+UNIT_OF_WORK = "outreach.unit_of_work"
+
+
+@contextmanager
+def uow(session_factory: Callable[[], Session] | None = None) -> Iterator[Session]:
+    """Run a block of crud calls as a single transaction.
+
+    Inside the block crud functions only flush; server defaults come back
+    through INSERT/UPDATE ... RETURNING, so there is no refresh either. The
+    transaction commits once when the block exits and rolls back if it
+    raises. Objects stay readable after the block. Uses
+    ``outreach.database.SessionLocal`` unless another session factory is
+    given.
+
+        with outreach.uow() as session:
+            campaign = crud.create_campaign(session, "Q3", "...")
+            crud.create_lead(session, campaign_id=campaign.campaign_id, ...)
+    """
+    if session_factory is None:
+        from outreach.database import SessionLocal as session_factory
+
+    session = session_factory()
+    session.info[UNIT_OF_WORK] = True
+    session.expire_on_commit = False
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def in_unit_of_work(session: Session) -> bool:
+    """Return True when the session belongs to a ``uow()`` block."""
+    return session.info.get(UNIT_OF_WORK, False)
@@ -0,0 +1,186 @@
+"""The crud and archive test cases, run against both the sync modules and outreach.aio."""
+import asyncio
+import inspect
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+from outreach import aio, archive, crud
+from tests.conftest import TEST_DATABASE_URL, truncate_tables
+from tests.test_crud import _import_rows
+
+
+class SyncCrud:
+    """Calls outreach.crud and outreach.archive functions with a bound Session."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def __getattr__(self, name):
+        function = getattr(crud, name, None) or getattr(archive, name)
+        return lambda *args, **kwargs: function(self.session, *args, **kwargs)
+
+
+class AsyncCrud:
+    """Calls outreach.aio functions with a bound AsyncSession, to completion."""
+
+    def __init__(self, session, loop):
+        self.session = session
+        self.loop = loop
+
+    def __getattr__(self, name):
+        function = getattr(aio, name)
+
+        def call(*args, **kwargs):
+            result = function(self.session, *args, **kwargs)
+            if inspect.isasyncgen(result):
+                result = _collect(result)
+            return self.loop.run_until_complete(result)
+
+        return call
+
+
+async def _collect(generator):
+    return [item async for item in generator]
+
+
+@pytest.fixture(params=["sync", "async"])
+def api(request, schema):
+    if request.param == "sync":
+        yield SyncCrud(request.getfixturevalue("session"))
+        return
+    # The async engine has connections of its own, so these writes commit.
+    crud.organization_ids.clear()
+    loop = asyncio.new_event_loop()
+    async_engine = aio.create_outreach_async_engine(TEST_DATABASE_URL)
+    session = aio.AsyncSessionLocal(bind=async_engine)
+    try:
+        yield AsyncCrud(session, loop)
+    finally:
+        loop.run_until_complete(session.close())
+        loop.run_until_complete(async_engine.dispose())
+        loop.close()
+        truncate_tables()
+
+
+def test_async_url():
+    assert aio.async_url("postgresql://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+    assert aio.async_url(TEST_DATABASE_URL).startswith("postgresql+asyncpg://")
+    with pytest.raises(ValueError):
+        aio.async_url("sqlite://")
+
+
+def test_create_and_get_campaign(api):
+    campaign = api.create_campaign("Test Campaign", "Testing...")
+    fetched = api.get_campaign_by_id(campaign.campaign_id)
+    assert fetched is not None
+    assert fetched.name == "Test Campaign"
+    assert fetched.description == "Testing..."
+
+
+def test_organization_crud(api):
+    org = api.create_organization(name="Acme Inc", email_domain="acme.com")
+    fetched = api.get_organization_by_domain("acme.com")
+    assert fetched.organization_id == org.organization_id
+    assert fetched.name == "Acme Inc"
+
+
+def test_lead_crud(api):
+    campaign = api.create_campaign("Camp", "Desc")
+    org = api.create_organization(name="Org", email_domain="org.com")
+    lead = api.create_lead(
+        campaign_id=campaign.campaign_id,
+        company_id=org.organization_id,
+        email="john@example.com",
+        status="new",
+    )
+
+    assert [found.lead_id for found in api.get_leads_by_status("new")] == [lead.lead_id]
+    updated = api.update_lead_status(lead.lead_id, "contacted")
+    assert updated.status == "contacted"
+    assert api.get_leads_by_status("contacted")[0].lead_id == lead.lead_id
+
+
+def test_bulk_import_and_stream(api):
+    campaign = api.create_campaign("Camp", "Desc")
+    org = api.create_organization(name="Org", email_domain="org.com")
+
+    result = api.bulk_import_leads(
+        _import_rows(campaign.campaign_id, org.organization_id, 12), batch_size=5
+    )
+    assert result.inserted == 12
+
+    leads = list(api.iter_leads_by_status("new", chunk_size=5, columns=["email"]))
+    assert sorted(lead.lead_id for lead in leads) == sorted(result.lead_ids)
+
+
+def test_bulk_organizations_and_status(api):
+    campaign = api.create_campaign("Camp", "Desc")
+    ids = api.upsert_organizations(
+        [{"name": "Acme", "email_domain": "acme.com"}, {"name": "Ini", "email_domain": "ini.io"}]
+    )
+    assert api.resolve_organization_ids([{"name": "Acme", "email_domain": "acme.com"}]) == {
+        "acme.com": ids["acme.com"]
+    }
+
+    lead_ids = api.bulk_import_leads(
+        _import_rows(campaign.campaign_id, ids["ini.io"], 3)
+    ).lead_ids
+    updated = api.bulk_update_lead_status(
+        lead_ids, "emailed", timestamps=["email_sent_at"], from_statuses=["new"]
+    )
+    assert sorted(updated) == sorted(lead_ids)
+    assert len(api.get_leads_by_status("emailed")) == 3
+
+
+def test_archive_and_delete_campaign(api):
+    campaign_id = api.create_campaign("Camp", "Desc").campaign_id
+    org = api.create_organization(name="Org", email_domain="org.com")
+    api.bulk_import_leads(_import_rows(campaign_id, org.organization_id, 7))
+
+    assert api.archive_campaign(campaign_id, batch_size=3) == 7
+    assert api.get_leads_by_status("new") == []
+    # Already archived.
+    assert api.archive_campaigns(datetime.now(timezone.utc)) == {}
+
+    assert api.delete_campaign(campaign_id, batch_size=3) == 7
+    assert api.get_campaign_by_id(campaign_id) is None
+
+
+def test_relationship_presets(api):
+    campaign = api.create_campaign("Camp", "Desc")
+    org = api.create_organization(name="Org", email_domain="org.com")
+    api.bulk_import_leads(_import_rows(campaign.campaign_id, org.organization_id, 4))
+
+    # AsyncSessions cannot lazy load, so these only work with the presets.
+    leads = api.get_leads_by_status("new", load=[crud.LOAD_ORGANIZATION])
+    assert {lead.organization.name for lead in leads} == {"Org"}
+    leads = list(
+        api.iter_leads_by_status("new", chunk_size=3, load=[crud.JOIN_CAMPAIGN])
+    )
+    assert {lead.campaign.name for lead in leads} == {"Camp"}
+
+
+def test_async_unit_of_work_commits_once(committed_session):
+    engine_ = aio.create_outreach_async_engine(TEST_DATABASE_URL)
+
+    async def work():
+        async with aio.uow(lambda: aio.AsyncSessionLocal(bind=engine_)) as session:
+            campaign = await aio.create_campaign(session, "Camp", "Desc")
+            org = await aio.create_organization(session, name="Org", email_domain="org.com")
+            await aio.create_lead(
+                session,
+                campaign_id=campaign.campaign_id,
+                company_id=org.organization_id,
+                email="a@org.com",
+                status="new",
+            )
+        async with aio.AsyncSessionLocal(bind=engine_) as session:
+            leads = await aio.get_leads_by_status(session, "new")
+        await engine_.dispose()
+        return campaign, leads
+
+    campaign, leads = asyncio.run(work())
+    assert [lead.campaign_id for lead in leads] == [campaign.campaign_id]
@@ -0,0 +1,113 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from outreach import archive, crud, kpi, models
+from tests.test_crud import _import_rows
+
+
+def _campaign(session, name, leads):
+    campaign = crud.create_campaign(session, name, "Desc")
+    org = crud.create_organization(
+        session, name=name, email_domain=f"{name.lower()}.example"
+    )
+    lead_ids = crud.bulk_import_leads(
+        session, _import_rows(campaign.campaign_id, org.organization_id, leads)
+    ).lead_ids
+    crud.bulk_update_lead_status(session, lead_ids[:4], "emailed", ["email_sent_at"])
+    return campaign.campaign_id
+
+
+def _count(session, model, campaign_id):
+    return session.scalar(
+        select(func.count()).select_from(model).where(model.campaign_id == campaign_id)
+    )
+
+
+def test_archive_campaign_keeps_kpis(session):
+    campaign_id = _campaign(session, "Old", 25)
+    other_id = _campaign(session, "Live", 3)
+    before = kpi.campaign_kpis(session, [campaign_id])
+
+    assert archive.archive_campaign(session, campaign_id, batch_size=10) == 25
+    assert _count(session, models.Lead, campaign_id) == 0
+    assert _count(session, models.ArchivedLead, campaign_id) == 25
+    assert _count(session, models.Lead, other_id) == 3
+    assert crud.get_campaign_by_id(session, campaign_id).status == archive.ARCHIVED_STATUS
+
+    # The archive triggers add back what leaving ``leads`` subtracted.
+    assert kpi.campaign_kpis(session, [campaign_id]) == before
+    assert kpi.compute_campaign_kpis(session, [campaign_id]) == before
+    assert before[0].emailed == 4
+
+    archived = session.scalars(select(models.ArchivedLead)).first()
+    assert archived.archived_at is not None
+    assert archived.linkedin_data == "tab\there\nand a \\ backslash"
+
+    # Nothing left to move; the live campaign is not old enough.
+    assert archive.archive_campaign(session, campaign_id) == 0
+    long_ago = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    assert archive.archive_campaigns(session, long_ago) == {}
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    assert archive.archive_campaigns(session, tomorrow) == {other_id: 3}
+
+
+def test_delete_campaign_in_batches(session, query_budget):
+    campaign_id = _campaign(session, "Gone", 25)
+    other_id = _campaign(session, "Kept", 3)
+    archive.archive_campaign(session, campaign_id, batch_size=10)
+    crud.bulk_import_leads(
+        session,
+        _import_rows(
+            campaign_id, session.scalar(select(models.Organization.organization_id)), 5
+        ),
+    )
+
+    # Three batches of archived leads and one of leads: no per-lead work.
+    with query_budget(max_queries=10):
+        assert crud.delete_campaign(session, campaign_id, batch_size=10) == 30
+    assert crud.get_campaign_by_id(session, campaign_id) is None
+    assert _count(session, models.ArchivedLead, campaign_id) == 0
+    assert session.get(models.CampaignKPI, campaign_id) is None
+    assert [row.imported for row in kpi.campaign_kpis(session, [other_id])] == [3]
+    assert crud.delete_campaign(session, uuid.uuid4()) == 0
+
+
+def test_orm_delete_leaves_leads_to_the_database(session, query_budget):
+    campaign_id = _campaign(session, "Orm", 5)
+    other_id = _campaign(session, "Other", 2)
+    campaign = crud.get_campaign_by_id(session, campaign_id)
+
+    # passive_deletes: the leads are neither loaded nor deleted one by one.
+    with query_budget(max_queries=1):
+        session.delete(campaign)
+        session.flush()
+    session.commit()
+    assert _count(session, models.Lead, campaign_id) == 0
+    assert [row.campaign_id for row in kpi.campaign_kpis(session)] == [other_id]
+
+
+def test_archive_campaign_sqlite():
+    sqlite_engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=sqlite_engine)
+    db = sessionmaker(bind=sqlite_engine)()
+    try:
+        campaign = models.Campaign(campaign_id=uuid.uuid4(), name="Camp", status="done")
+        org = models.Organization(
+            organization_id=uuid.uuid4(), name="Org", email_domain="org.com"
+        )
+        db.add_all([campaign, org])
+        db.commit()
+        crud.bulk_import_leads(
+            db, _import_rows(campaign.campaign_id, org.organization_id, 7)
+        )
+
+        assert archive.archive_campaign(db, campaign.campaign_id, batch_size=3) == 7
+        assert _count(db, models.Lead, campaign.campaign_id) == 0
+        assert kpi.campaign_kpis(db) == [kpi.CampaignKPIs(campaign.campaign_id, 7)]
+        assert crud.delete_campaign(db, campaign.campaign_id, batch_size=3) == 7
+        assert db.scalar(select(func.count()).select_from(models.ArchivedLead)) == 0
+    finally:
+        db.close()
@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from outreach import crud
+from outreach.dedup import (
+    BloomFilter,
+    DuplicateChecker,
+    find_existing_emails,
+    warm_email_filter,
+)
+from outreach.models import Lead, normalize_email
+from tests.conftest import SEED_LEADS, seeded_email
+
+
+def _campaign_with_leads(session, emails, contacted=()):
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    rows = [
+        {
+            "campaign_id": campaign.campaign_id,
+            "organization": {"name": "Org", "email_domain": "example.com"},
+            "email": email,
+            "status": "pending",
+        }
+        for email in emails
+    ]
+    result = crud.bulk_import_leads(session, rows)
+    contacted_ids = [
+        lead_id for lead_id, email in zip(result.lead_ids, emails) if email in contacted
+    ]
+    crud.bulk_update_lead_status(
+        session, contacted_ids, "emailed", ["email_sent_at", "last_contacted_at"]
+    )
+    return campaign
+
+
+def test_normalize_email():
+    assert normalize_email(" John.Doe+News@Example.COM ") == "john.doe@example.com"
+    assert normalize_email("a+b+c@x.io") == "a@x.io"
+    assert normalize_email("no-at-sign") == "no-at-sign"
+    assert normalize_email(None) is None
+
+
+def test_email_normalized_is_kept_in_step(session):
+    campaign = _campaign_with_leads(session, ["Bulk+x@Example.com"])
+    lead = crud.create_lead(
+        session,
+        campaign_id=campaign.campaign_id,
+        company_id=session.scalar(select(Lead.company_id)),
+        email="Orm+y@Example.com",
+        status="pending",
+    )
+    assert lead.email_normalized == "orm@example.com"
+    lead.email = "Changed@Example.com"
+    assert lead.email_normalized == "changed@example.com"
+
+    imported = session.scalar(select(Lead).where(Lead.email == "Bulk+x@Example.com"))
+    assert imported.email_normalized == "bulk@example.com"
+
+
+def test_find_existing_emails(session):
+    _campaign_with_leads(session, ["old@example.com", "recent@example.com"], ["recent@example.com"])
+    _campaign_with_leads(session, ["other@example.com"])
+
+    candidates = ["OLD+tag@example.com", "recent@example.com", "other@example.com", "new@example.com"]
+    assert find_existing_emails(session, candidates, chunk_size=2) == {
+        "old@example.com",
+        "recent@example.com",
+        "other@example.com",
+    }
+    assert find_existing_emails(
+        session, candidates, contacted_within=timedelta(days=30)
+    ) == {"recent@example.com"}
+
+
+def test_find_existing_emails_in_seeded_data(seeded_session):
+    known = [seeded_email(number).upper() for number in range(0, SEED_LEADS, 7)]
+    unknown = [f"nobody{number}@seed1.example" for number in range(1000)]
+
+    found = find_existing_emails(seeded_session, known + unknown, chunk_size=1000)
+    assert found == {email.lower() for email in known}
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    added = [f"lead{i}@example.com" for i in range(1000)]
+    bloom.update(added)
+    assert len(bloom) == 1000
+    assert all(email in bloom for email in added)
+    false_positives = sum(f"other{i}@example.com" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+    with pytest.raises(ValueError):
+        BloomFilter(0)
+
+
+def test_duplicate_checker_with_warm_filter(session):
+    _campaign_with_leads(session, [f"lead{i}@example.com" for i in range(50)])
+    checker = DuplicateChecker(session, bloom=warm_email_filter(session, headroom=100))
+
+    batch = ["lead1@example.com", "Lead2+x@example.com"] + [
+        f"new{i}@example.com" for i in range(40)
+    ]
+    assert checker.existing(batch) == {"lead1@example.com", "lead2@example.com"}
+    # Only the filter's positives were looked up.
+    assert checker.lookups < 10
+
+    # Rows written by the import itself are caught in later batches.
+    _campaign_with_leads(session, ["new1@example.com"])
+    checker.remember(["new1@example.com"])
+    assert checker.existing(["new1@example.com"]) == {"new1@example.com"}
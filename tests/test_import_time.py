@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Cold-start budget for importing the data layer, in milliseconds.
+IMPORT_BUDGET_MS = int(os.getenv("OUTREACH_IMPORT_BUDGET_MS", "1500"))
+
+
+def _import(code: str) -> subprocess.CompletedProcess:
+    """Run ``code`` in a fresh interpreter with -X importtime and no DATABASE_URL."""
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _cumulative_ms(importtime_output: str) -> float:
+    """Sum the cumulative time of top-level imports reported by -X importtime."""
+    total_us = 0
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000
+
+
+def test_import_has_no_side_effects():
+    result = _import(
+        "import sys, outreach.crud, outreach.database, outreach.config; "
+        "print(sorted({'dotenv', 'psycopg2'} & set(sys.modules)))"
+    )
+    # Nothing printed, no DATABASE_URL required, no driver or .env loaded.
+    assert result.stdout == "[]\n"
+
+
+def test_package_import_is_lightweight():
+    result = _import("import sys, outreach; print('sqlalchemy' in sys.modules)")
+    assert result.stdout == "False\n"
+
+
+def test_import_time_budget():
+    result = _import("import outreach.crud, outreach.database")
+    elapsed_ms = _cumulative_ms(result.stderr)
+    assert elapsed_ms < IMPORT_BUDGET_MS, (
+        f"Importing the data layer took {elapsed_ms:.0f} ms "
+        f"(budget {IMPORT_BUDGET_MS} ms)"
+    )
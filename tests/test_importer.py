@@ -0,0 +1,226 @@
+import csv
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from outreach import crud
+from outreach.dedup import DuplicateChecker
+from outreach.importer import ImportCheckpoint, LeadImporter, import_in_parallel
+from outreach.models import Lead, Organization
+from tests.conftest import TEST_DATABASE_URL
+
+
+def _write_csv(path, rows):
+    with path.open("w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def _count(session, model=Lead):
+    return session.scalar(select(func.count()).select_from(model))
+
+
+def test_import_csv_with_mapping(session, tmp_path):
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    path = _write_csv(
+        tmp_path / "leads.csv",
+        [
+            {
+                "E-mail": "ann@acme.com",
+                "first_name": "Ann",
+                "Company": "Acme",
+                "Employees": "12",
+                "notes": "ignored",
+            },
+            {
+                "E-mail": "bob@acme.com",
+                "first_name": "Bob, \"Jr\"\nthe second",
+                "Company": "Acme",
+                "Employees": "",
+                "notes": "",
+            },
+            {"E-mail": "no-address", "first_name": "", "Company": "", "Employees": "", "notes": ""},
+            {"E-mail": "cy@other.org", "first_name": "Cy", "Company": "", "Employees": "x", "notes": ""},
+        ],
+    )
+    importer = LeadImporter(
+        path,
+        campaign.campaign_id,
+        mapping={
+            "E-mail": "email",
+            "Company": "organization.name",
+            "Employees": "organization.estimated_num_employees",
+        },
+        import_run="run-1",
+        batch_size=2,
+    )
+    stats = importer.run(session)
+
+    assert (stats.rows, stats.inserted, stats.invalid) == (4, 2, 2)
+    leads = session.scalars(select(Lead).order_by(Lead.email)).all()
+    assert [lead.first_name for lead in leads] == ["Ann", "Bob, \"Jr\"\nthe second"]
+    assert {lead.import_run for lead in leads} == {"run-1"}
+    assert {lead.status for lead in leads} == {"pending"}
+    acme = crud.get_organization_by_domain(session, "acme.com")
+    assert (acme.name, acme.estimated_num_employees) == ("Acme", 12)
+    assert ImportCheckpoint.load(importer.checkpoint_path).completed
+
+
+def test_import_jsonl_keeps_existing_organizations(session, tmp_path):
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    crud.create_organization(session, name="Acme Inc", email_domain="acme.com")
+    path = tmp_path / "leads.jsonl"
+    path.write_text(
+        "\n".join(
+            [
+                json.dumps({"email": "ann@acme.com", "title": "CTO"}),
+                "not json",
+                json.dumps({"email": "bob@new.io", "email_sent_at": "2026-10-01T09:00:00+00:00"}),
+                "",
+            ]
+        )
+    )
+    stats = LeadImporter(path, campaign.campaign_id).run(session)
+
+    assert (stats.inserted, stats.invalid) == (2, 1)
+    assert crud.get_organization_by_domain(session, "acme.com").name == "Acme Inc"
+    assert crud.get_organization_by_domain(session, "new.io").name == "new.io"
+    bob = session.scalar(select(Lead).where(Lead.email == "bob@new.io"))
+    assert bob.email_sent_at.isoformat() == "2026-10-01T09:00:00+00:00"
+
+
+def test_import_resumes_after_interruption(session, tmp_path):
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    path = _write_csv(
+        tmp_path / "leads.csv",
+        [{"email": f"lead{i}@example.com"} for i in range(10)],
+    )
+
+    def crash_after_two_batches(stats):
+        if stats.rows == 6:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        LeadImporter(path, campaign.campaign_id, batch_size=3).run(
+            session, progress=crash_after_two_batches
+        )
+    assert _count(session) == 6
+
+    # Lose the last checkpoint, as if the process died right after a commit.
+    checkpoint_path = path.with_name(path.name + ".checkpoint.json")
+    checkpoint = ImportCheckpoint.load(checkpoint_path)
+    first_run = checkpoint.import_run
+    checkpoint.offset = sum(len(line) for line in path.read_bytes().splitlines(True)[:4])
+    checkpoint.stats.rows = 3
+    checkpoint.save(checkpoint_path)
+
+    stats = LeadImporter(path, campaign.campaign_id, batch_size=3).run(session)
+    assert (stats.rows, stats.resumed_rows) == (10, 3)
+    assert stats.skipped == 3
+    assert _count(session) == 10
+    assert set(session.scalars(select(Lead.import_run))) == {first_run}
+
+    # A finished import is not repeated.
+    again = LeadImporter(path, campaign.campaign_id, batch_size=3).run(session)
+    assert again.rows == 10
+    assert _count(session) == 10
+
+
+def test_checkpoint_is_tied_to_its_campaign(session, tmp_path):
+    first = crud.create_campaign(session, "First", "Desc")
+    second = crud.create_campaign(session, "Second", "Desc")
+    path = _write_csv(
+        tmp_path / "leads.csv", [{"email": f"lead{i}@example.com"} for i in range(5)]
+    )
+    LeadImporter(path, first.campaign_id, import_run="scrape-1").run(session)
+
+    with pytest.raises(ValueError, match="campaign"):
+        LeadImporter(path, second.campaign_id, import_run="scrape-1").run(session)
+
+    # Same file and run name, another campaign: new leads, not skipped ones.
+    stats = LeadImporter(path, second.campaign_id, import_run="scrape-1").run(
+        session, restart=True
+    )
+    assert (stats.inserted, stats.skipped) == (5, 0)
+    counts = dict(
+        session.execute(select(Lead.campaign_id, func.count()).group_by(Lead.campaign_id)).all()
+    )
+    assert counts == {first.campaign_id: 5, second.campaign_id: 5}
+
+
+def test_import_skips_existing_addresses(session, tmp_path):
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    first = _write_csv(tmp_path / "first.csv", [{"email": "ann@acme.com"}])
+    LeadImporter(first, campaign.campaign_id).run(session)
+
+    second = _write_csv(
+        tmp_path / "second.csv",
+        [
+            {"email": "Ann+promo@acme.com"},
+            {"email": "bob@acme.com"},
+            {"email": "BOB@acme.com"},
+        ],
+    )
+    stats = LeadImporter(second, campaign.campaign_id).run(
+        session, checker=DuplicateChecker(session)
+    )
+    assert (stats.inserted, stats.duplicates) == (1, 2)
+    assert _count(session) == 2
+    assert _count(session, Organization) == 1
+
+
+def test_importer_rejects_unknown_mapping_targets(tmp_path):
+    with pytest.raises(ValueError, match="Unknown mapping target"):
+        LeadImporter(tmp_path / "leads.csv", None, mapping={"Mail": "e_mail"})
+    with pytest.raises(ValueError, match="format"):
+        LeadImporter(tmp_path / "leads.txt", None)
+
+
+def test_shards_cover_every_record_once(tmp_path):
+    path = _write_csv(
+        tmp_path / "leads.csv",
+        [{"email": f"lead{i}@example.com", "title": "x" * (i % 7)} for i in range(100)],
+    )
+    importer = LeadImporter(path, None)
+    shards = importer.shards(7)
+    assert len(shards) == 7
+    emails = [
+        record["email"] for start, end in shards for _, record in importer.records(start, end)
+    ]
+    assert emails == [f"lead{i}@example.com" for i in range(100)]
+
+
+def test_import_in_parallel(committed_session, tmp_path):
+    # The workers use their own connections, so the setup must be committed.
+    session = committed_session
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    crud.create_organization(session, name="Acme Inc", email_domain="acme.com")
+    path = tmp_path / "leads.jsonl"
+    path.write_text(
+        "".join(
+            json.dumps(
+                {
+                    "email": f"lead{i}@{['acme.com', 'beta.io', 'gamma.dev'][i % 3]}",
+                    **({"company": "Gamma"} if i % 3 == 2 else {}),
+                }
+            )
+            + "\n"
+            for i in range(300)
+        )
+    )
+    importer = LeadImporter(
+        path, campaign.campaign_id, mapping={"company": "organization.name"}, batch_size=40
+    )
+    stats = import_in_parallel(importer, TEST_DATABASE_URL, workers=3, dedup=True)
+
+    assert (stats.rows, stats.inserted, stats.duplicates) == (300, 300, 0)
+    assert _count(session) == 300
+    names = dict(session.execute(select(Organization.email_domain, Organization.name)).all())
+    assert names == {"acme.com": "Acme Inc", "beta.io": "beta.io", "gamma.dev": "Gamma"}
+
+    again = import_in_parallel(importer, TEST_DATABASE_URL, workers=3)
+    assert again.rows == 300
+    assert _count(session) == 300
@@ -0,0 +1,149 @@
+import logging
+import uuid
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from outreach import crud, models
+from outreach.instrumentation import (
+    UNTRACKED,
+    MetricsSink,
+    QueryMetrics,
+    current_operation,
+    instrument,
+    track_operation,
+    tracked,
+)
+from tests.conftest import engine
+from tests.test_crud import _import_rows
+
+
+def test_statements_are_attributed_to_the_outermost_crud_call(session):
+    instrumentation = instrument(engine, slow_query_ms=None)
+    metrics = instrumentation.sink
+    try:
+        campaign = crud.create_campaign(session, "Camp", "Desc")
+        org = crud.create_organization(session, name="Org", email_domain="org.com")
+        crud.bulk_import_leads(
+            session, _import_rows(campaign.campaign_id, org.organization_id, 30)
+        )
+        # upsert_organizations runs inside resolve_organization_ids.
+        crud.resolve_organization_ids(
+            session, [{"name": "New", "email_domain": "new.example"}]
+        )
+        leads = list(
+            crud.iter_leads_by_status(session, "new", campaign.campaign_id, chunk_size=10)
+        )
+    finally:
+        instrumentation.detach()
+
+    assert len(leads) == 30
+    assert metrics.summary("create_campaign")["calls"] == 1
+    assert metrics.summary("upsert_organizations")["calls"] == 0
+    assert metrics.summary("resolve_organization_ids")["statements"] >= 1
+    stream = metrics.summary("iter_leads_by_status")
+    # Three full chunks and an empty one.
+    assert stream["calls"] == 1
+    assert stream["statements"] == 4
+    assert stream["rows"] == 30
+    assert metrics.round_trips["iter_leads_by_status"].sum == 4
+
+    exposition = metrics.prometheus_text()
+    assert "# TYPE outreach_db_statement_duration_seconds histogram" in exposition
+    assert 'outreach_db_statement_rows_total{operation="iter_leads_by_status"} 30' in exposition
+    assert (
+        'outreach_db_operation_round_trips_bucket{operation="iter_leads_by_status",le="+Inf"} 1'
+        in exposition
+    )
+
+    # Nothing is recorded once detached.
+    crud.get_campaign_by_id(session, uuid.uuid4())
+    assert metrics.summary("get_campaign_by_id")["statements"] == 0
+
+
+def test_instrumentations_on_one_engine_count_independently(session):
+    outer = instrument(engine, slow_query_ms=None)
+    try:
+        crud.create_campaign(session, "Camp", "Desc")
+        inner = instrument(engine, slow_query_ms=None)
+        try:
+            crud.get_campaign_by_id(session, uuid.uuid4())
+        finally:
+            inner.detach()
+        crud.get_campaign_by_id(session, uuid.uuid4())
+    finally:
+        outer.detach()
+
+    assert outer.sink.summary("get_campaign_by_id")["statements"] == 2
+    assert outer.sink.round_trips["get_campaign_by_id"].sum == 2
+    assert inner.sink.summary("get_campaign_by_id")["statements"] == 1
+    assert inner.sink.round_trips["get_campaign_by_id"].sum == 1
+    assert "create_campaign" not in inner.sink.round_trips
+    assert outer.sink.summary("create_campaign")["calls"] == 1
+
+
+def test_slow_queries_are_logged_with_their_plan(session, caplog):
+    crud.create_campaign(session, "Camp", "Desc")
+    instrumentation = instrument(engine, slow_query_ms=5)
+    try:
+        with caplog.at_level(logging.WARNING, logger="outreach.instrumentation"):
+            with track_operation("report"):
+                assert current_operation() == "report"
+                session.execute(
+                    select(models.Campaign.name, func.pg_sleep(0.01)).where(
+                        models.Campaign.status == "draft"
+                    )
+                ).all()
+    finally:
+        instrumentation.detach()
+
+    assert current_operation() == UNTRACKED
+    assert instrumentation.sink.summary("report")["slow_queries"] == 1
+    (record,) = caplog.records
+    assert "Slow query in report" in record.getMessage()
+    assert "Seq Scan on campaigns" in record.getMessage()
+    # The EXPLAIN left the test's transaction usable.
+    assert session.scalar(select(func.count()).select_from(models.Campaign)) == 1
+
+
+class _RecordingSink(MetricsSink):
+    def __init__(self):
+        self.slow = []
+
+    def record_slow_query(self, query):
+        self.slow.append(query)
+
+
+def test_pluggable_sink_and_sqlite_plans():
+    sqlite_engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=sqlite_engine)
+    sink = _RecordingSink()
+    # Every statement counts as slow.
+    instrumentation = instrument(sqlite_engine, sink, slow_query_ms=1e-9)
+
+    @tracked
+    def lookup(db):
+        return crud.get_organization_by_domain(db, "org.com")
+
+    db = sessionmaker(bind=sqlite_engine)()
+    try:
+        assert lookup(db) is None
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+        instrumentation.detach()
+
+    assert [query.operation for query in sink.slow] == ["lookup", UNTRACKED]
+    assert "organizations" in sink.slow[0].plan
+
+
+def test_histogram_buckets():
+    metrics = QueryMetrics()
+    for seconds in (0.0005, 0.003, 0.003, 20):
+        metrics.record_statement("op", seconds, 1)
+    buckets = dict(metrics.statement_seconds["op"].cumulative())
+    assert buckets["0.001"] == 1
+    assert buckets["0.005"] == 3
+    assert buckets["10"] == 3
+    assert buckets["+Inf"] == 4
+    assert metrics.rows == {"op": 4}
@@ -0,0 +1,97 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, delete, text
+from sqlalchemy.orm import sessionmaker
+
+from outreach import crud, kpi, models
+from tests.conftest import SEED_CAMPAIGNS, SEED_LEADS
+from tests.test_crud import _import_rows
+
+
+def _funnel(session, campaign, org):
+    """Import 10 leads and move them through the funnel."""
+    lead_ids = crud.bulk_import_leads(
+        session, _import_rows(campaign.campaign_id, org.organization_id, 10)
+    ).lead_ids
+    session.execute(
+        models.Lead.__table__.update()
+        .where(models.Lead.lead_id.in_(lead_ids[:8]))
+        .values(email_verification_status="valid")
+    )
+    session.commit()
+    crud.bulk_update_lead_status(session, lead_ids[:6], "emailed", ["email_sent_at"])
+    crud.bulk_update_lead_status(session, lead_ids[:3], "replied", ["reply_received_at"])
+    crud.bulk_update_lead_status(session, lead_ids[:1], "interested")
+    return lead_ids
+
+
+def test_rollup_tracks_lead_writes(session):
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    idle = crud.create_campaign(session, "Idle", "No leads")
+    org = crud.create_organization(session, name="Org", email_domain="org.com")
+    lead_ids = _funnel(session, campaign, org)
+    crud.create_lead(
+        session,
+        campaign_id=campaign.campaign_id,
+        company_id=org.organization_id,
+        email="late@org.com",
+        status="new",
+    )
+
+    expected = kpi.CampaignKPIs(campaign.campaign_id, 11, 8, 6, 3, 1)
+    by_id = {row.campaign_id: row for row in kpi.campaign_kpis(session)}
+    assert by_id[campaign.campaign_id] == expected
+    assert by_id[idle.campaign_id] == kpi.CampaignKPIs(idle.campaign_id)
+    assert kpi.compute_campaign_kpis(session, [campaign.campaign_id]) == [expected]
+    assert expected.response_rate == 0.5
+    assert expected.positive_response_rate == pytest.approx(1 / 6)
+
+    session.execute(delete(models.Lead).where(models.Lead.lead_id == lead_ids[0]))
+    session.commit()
+    (after_delete,) = kpi.campaign_kpis(session, [campaign.campaign_id])
+    assert after_delete == kpi.CampaignKPIs(campaign.campaign_id, 10, 7, 5, 2, 0)
+
+
+def test_rebuild_after_truncate(session):
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    org = crud.create_organization(session, name="Org", email_domain="org.com")
+    _funnel(session, campaign, org)
+
+    # TRUNCATE fires no row or statement triggers, so the rollup goes stale.
+    session.execute(text("TRUNCATE leads"))
+    session.commit()
+    assert kpi.campaign_kpis(session)[0].imported == 10
+
+    assert kpi.rebuild_campaign_kpis(session) == 0
+    assert kpi.campaign_kpis(session) == [kpi.CampaignKPIs(campaign.campaign_id)]
+
+
+def test_rollup_matches_aggregation_on_seeded_data(seeded_session):
+    rollup = sorted(kpi.campaign_kpis(seeded_session), key=lambda row: row.campaign_id)
+    computed = sorted(
+        kpi.compute_campaign_kpis(seeded_session), key=lambda row: row.campaign_id
+    )
+    assert len(rollup) == SEED_CAMPAIGNS
+    assert sum(row.imported for row in rollup) == SEED_LEADS
+    assert rollup == computed
+
+
+def test_campaign_kpis_sqlite():
+    sqlite_engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=sqlite_engine)
+    db = sessionmaker(bind=sqlite_engine)()
+    try:
+        campaign = models.Campaign(campaign_id=uuid.uuid4(), name="Camp", status="draft")
+        org = models.Organization(
+            organization_id=uuid.uuid4(), name="Org", email_domain="org.com"
+        )
+        db.add_all([campaign, org])
+        db.commit()
+        crud.bulk_import_leads(
+            db, _import_rows(campaign.campaign_id, org.organization_id, 4)
+        )
+
+        assert kpi.campaign_kpis(db) == [kpi.CampaignKPIs(campaign.campaign_id, 4)]
+    finally:
+        db.close()
@@ -0,0 +1,149 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from outreach import crud, kpi, models, partitions
+from tests.test_crud import _import_rows
+
+
+def _partition_of(session, lead_id):
+    return session.scalar(
+        text("SELECT tableoid::regclass::text FROM leads WHERE lead_id = :lead_id"),
+        {"lead_id": lead_id},
+    )
+
+
+def _campaign_with_leads(session, count, created_at=()):
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    org = crud.create_organization(session, name="Org", email_domain="org.com")
+    lead_ids = crud.bulk_import_leads(
+        session, _import_rows(campaign.campaign_id, org.organization_id, count)
+    ).lead_ids
+    dated = []
+    for moment in created_at:
+        lead = crud.create_lead(
+            session,
+            campaign_id=campaign.campaign_id,
+            company_id=org.organization_id,
+            email=f"dated{len(dated)}@org.com",
+            status="new",
+            created_at=moment,
+        )
+        dated.append(lead.lead_id)
+    return campaign.campaign_id, lead_ids, dated
+
+
+def test_ensure_lead_partitions_moves_leads_out_of_the_default(session):
+    month = partitions.LeadPartition.for_month(partitions._month_of(None))
+    later_month = partitions._add_months(month.start, 2)
+    later = datetime(later_month.year, later_month.month, 15, tzinfo=timezone.utc)
+    campaign_id, lead_ids, (later_id,) = _campaign_with_leads(session, 5, [later])
+    assert _partition_of(session, lead_ids[0]) == partitions.DEFAULT_PARTITION
+    before = kpi.campaign_kpis(session, [campaign_id])
+
+    created = partitions.ensure_lead_partitions(session, months_ahead=2)
+    assert len(created) == 3
+    assert created[0] == month.name
+    assert [partition.name for partition in partitions.lead_partitions(session)] == created
+    assert _partition_of(session, lead_ids[0]) == month.name
+    assert _partition_of(session, later_id) == created[-1]
+
+    # Moving leads between partitions leaves the counters alone, and the
+    # ORM still finds a lead by lead_id.
+    assert kpi.campaign_kpis(session, [campaign_id]) == before
+    assert session.get(models.Lead, lead_ids[0]).lead_id == lead_ids[0]
+    assert partitions.ensure_lead_partitions(session, months_ahead=2) == []
+
+    # New leads go straight to their month; re-imports are still skipped.
+    company_id = session.scalar(select(models.Lead.company_id))
+    rows = _import_rows(campaign_id, company_id, 5)
+    rerun = crud.bulk_import_leads(
+        session, [{**row, "lead_id": lead_id} for row, lead_id in zip(rows, lead_ids)]
+    )
+    assert rerun.skipped == 5
+
+
+def test_lead_id_is_unique_across_partitions(session):
+    january = datetime(2025, 1, 20, tzinfo=timezone.utc)
+    campaign_id, (lead_id,), (dated_id,) = _campaign_with_leads(session, 1, [january])
+    partitions.ensure_lead_partitions(session, months_ahead=0, now=january)
+    company_id = session.scalar(select(models.Lead.company_id))
+
+    def duplicate(existing_id):
+        session.expunge_all()
+        with pytest.raises(IntegrityError, match="lead_ids_pkey"):
+            crud.create_lead(
+                session,
+                lead_id=existing_id,
+                campaign_id=campaign_id,
+                company_id=company_id,
+                email="again@org.com",
+                status="new",
+                created_at=january + timedelta(days=40),
+            )
+        session.rollback()
+
+    # The primary key alone would take either: other months, other partitions.
+    duplicate(lead_id)
+    duplicate(dated_id)
+    with pytest.raises(IntegrityError, match="lead_ids_pkey"):
+        session.execute(
+            update(models.Lead)
+            .where(models.Lead.lead_id == dated_id)
+            .values(lead_id=lead_id)
+        )
+    session.rollback()
+
+    # Changed and deleted lead_ids are released.
+    renamed_id = uuid.uuid4()
+    session.execute(
+        update(models.Lead).where(models.Lead.lead_id == dated_id).values(lead_id=renamed_id)
+    )
+    session.execute(text("DELETE FROM leads WHERE lead_id = :id"), {"id": lead_id})
+    assert set(session.scalars(text("SELECT lead_id FROM lead_ids"))) == {renamed_id}
+
+
+def test_drop_expired_lead_partitions(session):
+    january = datetime(2025, 1, 20, tzinfo=timezone.utc)
+    campaign_id, _, (old_id, kept_id) = _campaign_with_leads(
+        session, 0, [january, january + timedelta(days=31)]
+    )
+    assert partitions.ensure_lead_partitions(session, months_ahead=2, now=january) == [
+        "leads_p2025_01",
+        "leads_p2025_02",
+        "leads_p2025_03",
+    ]
+
+    march = datetime(2025, 3, 10, tzinfo=timezone.utc)
+    with pytest.raises(ValueError):
+        partitions.drop_expired_lead_partitions(session, -1, now=march)
+    assert partitions.drop_expired_lead_partitions(session, 1, now=march) == [
+        "leads_p2025_01"
+    ]
+    assert _partition_of(session, old_id) is None
+    assert session.scalar(text("SELECT count(*) FROM lead_ids")) == 1
+    assert _partition_of(session, kept_id) == "leads_p2025_02"
+    # The rollup still counts the dropped month.
+    assert [row.imported for row in kpi.campaign_kpis(session, [campaign_id])] == [2]
+
+    assert partitions.drop_expired_lead_partitions(
+        session, 0, now=march, drop=False
+    ) == ["leads_p2025_02"]
+    assert session.scalar(text("SELECT count(*) FROM leads_p2025_02")) == 1
+    assert session.scalar(select(func.count()).select_from(models.Lead)) == 0
+
+
+def test_partitions_are_postgresql_only():
+    sqlite_engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=sqlite_engine)
+    db = sessionmaker(bind=sqlite_engine)()
+    try:
+        assert partitions.ensure_lead_partitions(db) == []
+        assert partitions.drop_expired_lead_partitions(db, 1) == []
+        assert partitions.lead_partitions(db) == []
+    finally:
+        db.close()
@@ -0,0 +1,165 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+
+from outreach import crud, kpi, models, replies
+from tests.test_crud import _import_rows
+
+RECEIVED = datetime(2026, 3, 2, 9, 30, tzinfo=timezone.utc)
+
+
+def _message(number, email, body, subject="Re: Intro", hours=0):
+    return {
+        "message_id": f"<{number}@mail.example>",
+        "from_email": email,
+        "subject": subject,
+        "body": body,
+        "received_at": RECEIVED + timedelta(hours=hours),
+    }
+
+
+def _campaigns(session):
+    org = crud.create_organization(session, name="Org", email_domain="example.com")
+    first = crud.create_campaign(session, "First", "Desc")
+    second = crud.create_campaign(session, "Second", "Desc")
+    crud.bulk_import_leads(session, _import_rows(first.campaign_id, org.organization_id, 5))
+    # lead0 is in both campaigns and was contacted last in the second.
+    (second_lead,) = crud.bulk_import_leads(
+        session, _import_rows(second.campaign_id, org.organization_id, 1)
+    ).lead_ids
+    crud.bulk_update_lead_status(session, [second_lead], "emailed", ["last_contacted_at"])
+    return first.campaign_id, second.campaign_id
+
+
+def test_ingest_replies_matches_leads_in_batches(session, query_budget):
+    first_id, second_id = _campaigns(session)
+    messages = [
+        _message(0, "Lead0+reply@Example.com", "Sounds good"),
+        _message(1, "lead1@example.com", "Not now", hours=1),
+        _message(2, "lead1@example.com", "Actually, yes", hours=2),
+        _message(3, "stranger@elsewhere.example", "Who is this?"),
+    ]
+
+    # Per batch: one lead lookup, one INSERT, one UPDATE of the leads.
+    with query_budget(max_queries=7):
+        result = replies.ingest_replies(session, messages, batch_size=2)
+    assert (result.inserted, result.skipped, result.unmatched) == (4, 0, 1)
+
+    stored = {reply.message_id: reply for reply in session.scalars(select(models.Reply))}
+    assert stored["<0@mail.example>"].campaign_id == second_id
+    assert stored["<1@mail.example>"].campaign_id == first_id
+    assert stored["<3@mail.example>"].lead_id is None
+
+    lead1 = session.get(models.Lead, stored["<1@mail.example>"].lead_id)
+    assert lead1.reply_received_at == RECEIVED + timedelta(hours=1)
+    assert [row.replied for row in kpi.campaign_kpis(session, [first_id, second_id])] == [1, 1]
+
+    # Re-ingesting the mailbox stores nothing twice.
+    rerun = replies.ingest_replies(session, messages + [_message(4, "lead2@example.com", "Hi")])
+    assert (rerun.inserted, rerun.skipped) == (1, 4)
+
+    # An earlier reply found later moves reply_received_at back.
+    replies.ingest_replies(session, [_message(5, "lead1@example.com", "Hi", hours=-1)])
+    session.refresh(lead1)
+    assert lead1.reply_received_at == RECEIVED - timedelta(hours=1)
+
+    assert replies.classify_replies(
+        session,
+        {
+            stored["<0@mail.example>"].reply_id: "interested",
+            stored["<1@mail.example>"].reply_id: "not_now",
+            uuid.uuid4(): "interested",
+        },
+    ) == 2
+    session.expire_all()
+    assert stored["<1@mail.example>"].classification == "not_now"
+
+
+def test_search_replies(session):
+    first_id, second_id = _campaigns(session)
+    replies.ingest_replies(
+        session,
+        [
+            _message(0, "lead1@example.com", "What is your pricing for 50 seats?"),
+            _message(1, "lead2@example.com", "Send me the price list", hours=1),
+            _message(2, "lead3@example.com", "Please unsubscribe me", hours=2),
+            _message(3, "lead0@example.com", "Pricing looks fine", hours=3),
+            _message(4, "lead4@example.com", "Call me", subject="Pricing question", hours=4),
+        ],
+    )
+
+    def bodies(*args, **kwargs):
+        return [reply.body for reply in replies.search_replies(session, *args, **kwargs)]
+
+    # Stemmed, newest first, within the campaign; lead0 replied to the second.
+    assert bodies("pricing", first_id) == [
+        "Call me",
+        "Send me the price list",
+        "What is your pricing for 50 seats?",
+    ]
+    assert bodies("pricing", second_id) == ["Pricing looks fine"]
+    assert bodies('pricing -"price list"', first_id) == [
+        "Call me",
+        "What is your pricing for 50 seats?",
+    ]
+    first_page = replies.search_replies(session, "pricing", limit=2)
+    assert [reply.body for reply in first_page] == ["Call me", "Pricing looks fine"]
+    assert bodies("pricing", limit=2, after=first_page[-1]) == [
+        "Send me the price list",
+        "What is your pricing for 50 seats?",
+    ]
+
+    # The match itself is a GIN index lookup.
+    session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = "\n".join(
+        session.scalars(
+            text(
+                "EXPLAIN SELECT reply_id FROM replies "
+                "WHERE search_vector @@ websearch_to_tsquery('english', 'pricing')"
+            )
+        )
+    )
+    assert "Bitmap Index Scan on ix_replies_search_vector" in plan
+
+
+def test_search_replies_sqlite():
+    sqlite_engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=sqlite_engine)
+    db = sessionmaker(bind=sqlite_engine)()
+    try:
+        campaign = models.Campaign(campaign_id=uuid.uuid4(), name="Camp", status="active")
+        org = models.Organization(
+            organization_id=uuid.uuid4(), name="Org", email_domain="example.com"
+        )
+        db.add_all([campaign, org])
+        db.commit()
+        crud.bulk_import_leads(
+            db, _import_rows(campaign.campaign_id, org.organization_id, 2)
+        )
+        result = replies.ingest_replies(
+            db,
+            [
+                _message(0, "lead0@example.com", "What about pricing?"),
+                _message(1, "lead1@example.com", "Send the price list", hours=1),
+                _message(2, "other@example.com", "Unrelated", hours=2),
+            ],
+        )
+        assert result.unmatched == 1
+
+        found = replies.search_replies(db, "pricing", campaign.campaign_id)
+        assert [reply.body for reply in found] == [
+            "Send the price list",
+            "What about pricing?",
+        ]
+        assert replies.search_replies(db, "*") == []
+
+        # The FTS index follows edits and deletes.
+        found[0].body = "No thanks"
+        db.delete(found[1])
+        db.commit()
+        assert replies.search_replies(db, "pricing") == []
+    finally:
+        db.close()
+        models.Base.metadata.drop_all(bind=sqlite_engine)
@@ -0,0 +1,105 @@
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+
+from outreach import crud
+from outreach.scheduler import SendPolicy, SendScheduler
+
+# A Wednesday, 10:00 UTC.
+NOW = datetime(2026, 10, 14, 10, 0, tzinfo=timezone.utc)
+
+
+def _queue(session, domains):
+    """Create a campaign with ``count`` pending leads per (domain, time zone)."""
+    campaign = crud.create_campaign(session, "Camp", "Desc")
+    rows = []
+    for domain, time_zone, count in domains:
+        rows.extend(
+            {
+                "campaign_id": campaign.campaign_id,
+                "organization": {
+                    "name": domain,
+                    "email_domain": domain,
+                    "time_zone": time_zone,
+                },
+                "email": f"lead{i}@{domain}",
+                "status": "pending",
+            }
+            for i in range(count)
+        )
+    crud.bulk_import_leads(session, rows)
+    return campaign
+
+
+def _domains(leads):
+    return sorted(lead.email.split("@")[1] for lead in leads)
+
+
+def _per_domain(leads):
+    return sorted(Counter(_domains(leads)).values())
+
+
+def test_domain_rate_limit(session):
+    campaign = _queue(session, [("acme.com", "UTC", 10), ("ini.io", "UTC", 2)])
+    policy = SendPolicy(domain_per_minute=3)
+    scheduler = SendScheduler(session, campaign.campaign_id, policy, now=NOW)
+    assert scheduler.pending == 12
+
+    first = scheduler.next_batch(100, "w1", now=NOW)
+    assert _domains(first) == ["acme.com"] * 3 + ["ini.io"] * 2
+    assert {lead.status for lead in first} == {crud.SENDING_STATUS}
+    assert scheduler.next_batch(100, "w1", now=NOW + timedelta(seconds=30)) == []
+    assert scheduler.next_ready_at() == NOW + timedelta(minutes=1)
+
+    second = scheduler.next_batch(
+        100, "w1", now=NOW + timedelta(minutes=1), load=[crud.LOAD_ORGANIZATION]
+    )
+    assert _domains(second) == ["acme.com"] * 3
+    assert {lead.organization.email_domain for lead in second} == {"acme.com"}
+    assert not {lead.lead_id for lead in first} & {lead.lead_id for lead in second}
+    assert scheduler.pending == 4
+
+
+def test_business_hours_in_recipient_time_zone(session):
+    # 10:00 UTC is 19:00 in Tokyo and 06:00 in New York.
+    campaign = _queue(
+        session,
+        [
+            ("tokyo.jp", "Asia/Tokyo", 1),
+            ("nyc.com", "America/New_York", 1),
+            ("zurich.ch", "Europe/Zurich", 1),
+            ("unknown.io", "Mars/Olympus", 1),
+        ],
+    )
+    scheduler = SendScheduler(session, campaign.campaign_id, now=NOW)
+
+    assert _domains(scheduler.next_batch(10, "w1", now=NOW)) == ["unknown.io", "zurich.ch"]
+    # New York opens at 09:00 EDT, 13:00 UTC.
+    assert scheduler.next_ready_at() == datetime(2026, 10, 14, 13, 0, tzinfo=timezone.utc)
+    assert _domains(scheduler.next_batch(10, "w1", now=NOW + timedelta(hours=3))) == ["nyc.com"]
+    # Tokyo opens the next morning, 00:00 UTC.
+    assert scheduler.next_ready_at() == datetime(2026, 10, 15, 0, 0, tzinfo=timezone.utc)
+
+
+def test_daily_caps(session):
+    campaign = _queue(session, [("acme.com", "UTC", 10), ("ini.io", "UTC", 10)])
+    policy = SendPolicy(domain_per_minute=100, domain_daily_cap=4, campaign_daily_cap=6)
+    scheduler = SendScheduler(session, campaign.campaign_id, policy, now=NOW)
+
+    assert _per_domain(scheduler.next_batch(100, "w1", now=NOW)) == [2, 4]
+    assert scheduler.next_batch(100, "w1", now=NOW + timedelta(hours=1)) == []
+    # ini.io is still under its cap, but the campaign has to wait a day.
+    midnight = datetime.combine(NOW.date() + timedelta(days=1), time(), tzinfo=timezone.utc)
+    assert scheduler.next_ready_at() == midnight
+
+    # Both caps reset with the day.
+    tomorrow = datetime.combine(NOW.date() + timedelta(days=1), time(9), tzinfo=timezone.utc)
+    assert _per_domain(scheduler.next_batch(100, "w1", now=tomorrow)) == [2, 4]
+
+
+def test_policy_validation():
+    with pytest.raises(ValueError):
+        SendPolicy(business_days=frozenset())
+    with pytest.raises(ValueError):
+        SendPolicy(default_time_zone="Nowhere/Special")
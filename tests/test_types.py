@@ -0,0 +1,40 @@
+import pytest
+
+from outreach import types
+from outreach.types import CompressedJSON, compress_json, decompress_json
+
+
+def test_compress_json_round_trip():
+    document = {"html": "<p>hello</p>" * 50, "links": [1, 2, 3]}
+    payload = compress_json(document, codec="gzip")
+    assert payload.startswith(b"\x1f\x8b")
+    assert len(payload) < len(str(document))
+    assert decompress_json(payload) == document
+
+
+def test_compress_json_rejects_unknown_codec():
+    with pytest.raises(ValueError):
+        compress_json({}, codec="brotli")
+    with pytest.raises(ValueError):
+        decompress_json(b"plain bytes")
+
+
+def test_codec_follows_the_environment(monkeypatch):
+    document = {"html": "<p>hello</p>"}
+    monkeypatch.delenv(types.CODEC_ENV, raising=False)
+    monkeypatch.setattr(types, "_zstd_available", lambda: False)
+    assert types.default_codec() == "gzip"
+    monkeypatch.setattr(types, "_zstd_available", lambda: True)
+    assert types.default_codec() == "zstd"
+
+    monkeypatch.setenv(types.CODEC_ENV, "none")
+    column = CompressedJSON()
+    payload = column.process_bind_param(document, None)
+    assert payload == b'{"html":"<p>hello</p>"}'
+    assert column.process_result_value(payload, None) == document
+    # A codec given to the column wins over the environment.
+    assert CompressedJSON("gzip").process_bind_param(document, None).startswith(b"\x1f\x8b")
+
+    monkeypatch.setenv(types.CODEC_ENV, "brotli")
+    with pytest.raises(ValueError):
+        column.process_bind_param(document, None)